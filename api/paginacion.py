@@ -0,0 +1,97 @@
+"""
+Paginación por cursor (keyset) para la API.
+
+En lugar de ``OFFSET`` (que recorre todas las filas anteriores), el cursor
+guarda los valores de ordenamiento de la última fila entregada y la página
+siguiente se obtiene con un ``WHERE`` sobre esos valores.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no se pudo decodificar"""
+
+
+def codificar_cursor(valores):
+    """Codifica los valores de ordenamiento de una fila como cursor opaco"""
+    datos = json.dumps(
+        valores,
+        separators=(',', ':'),
+        default=lambda o: o.isoformat(),
+    )
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, campos):
+    """Decodifica un cursor con un valor por cada campo del modelo en ``campos``
+
+    Cada valor se convierte con ``to_python()`` del campo: un cursor bien
+    codificado pero con tipos incorrectos también es inválido.
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError) as exc:
+        raise CursorInvalido(str(exc))
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        raise CursorInvalido('El cursor no corresponde a este ordenamiento')
+    try:
+        return [campo.to_python(valor) for campo, valor in zip(campos, valores)]
+    except (ValidationError, ValueError, TypeError) as exc:
+        raise CursorInvalido(str(exc))
+
+
+def leer_limite(params):
+    """Lee ``limite`` de la query string acotándolo a ``LIMITE_MAXIMO``"""
+    try:
+        limite = int(params.get('limite', LIMITE_POR_DEFECTO))
+    except (TypeError, ValueError):
+        limite = LIMITE_POR_DEFECTO
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def _filtro_posterior(orden, valores):
+    """Construye el WHERE de "filas después de ``valores``" para ``orden``"""
+    filtro = Q()
+    iguales = {}
+    for campo, valor in zip(orden, valores):
+        nombre = campo.lstrip('-')
+        lookup = 'lt' if campo.startswith('-') else 'gt'
+        filtro |= Q(**iguales, **{f'{nombre}__{lookup}': valor})
+        iguales[nombre] = valor
+    return filtro
+
+
+def paginar(queryset, campos, orden, params):
+    """Pagina ``queryset.values_list(*campos)`` por cursor.
+
+    ``orden`` debe terminar en un campo único (p. ej. ``id``) y todos sus
+    campos deben estar incluidos en ``campos``.
+
+    Retorna ``(filas, siguiente_cursor)``; ``siguiente_cursor`` es ``None``
+    en la última página.
+    """
+    indices = [campos.index(campo.lstrip('-')) for campo in orden]
+    limite = leer_limite(params)
+
+    queryset = queryset.order_by(*orden)
+    cursor = params.get('cursor')
+    if cursor:
+        campos_orden = [queryset.model._meta.get_field(campo.lstrip('-')) for campo in orden]
+        queryset = queryset.filter(_filtro_posterior(orden, decodificar_cursor(cursor, campos_orden)))
+
+    filas = list(queryset.values_list(*campos)[:limite + 1])
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor([ultima[i] for i in indices])
+    return filas, siguiente
@@ -0,0 +1,71 @@
+"""
+Serializadores compactos para la API.
+
+Trabajan sobre tuplas de ``values_list()`` (sin instanciar modelos) y
+producen un formato columnar: ``{"campos": [...], "filas": [[...], ...]}``.
+Las filas que no necesitan conversión se envían tal cual, sin copiarlas.
+"""
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+
+
+def url_media(nombre):
+    """URL pública de un archivo guardado en un ImageField (None si no hay)"""
+    return default_storage.url(nombre) if nombre else None
+
+
+class SerializadorFilas:
+    """Serializa filas de ``values_list()`` con nombres públicos de columna.
+
+    ``columnas`` es una lista de ``(nombre_publico, campo_orm)``;
+    ``conversores`` asocia ``nombre_publico`` a una función de conversión.
+    """
+
+    def __init__(self, columnas, conversores=None):
+        self.nombres = [nombre for nombre, _ in columnas]
+        self.campos = [campo for _, campo in columnas]
+        conversores = conversores or {}
+        self._conversores = [
+            (self.nombres.index(nombre), funcion)
+            for nombre, funcion in conversores.items()
+        ]
+
+    def fila(self, fila):
+        if not self._conversores:
+            return fila
+        fila = list(fila)
+        for indice, funcion in self._conversores:
+            fila[indice] = funcion(fila[indice])
+        return fila
+
+    def filas(self, filas):
+        if not self._conversores:
+            return filas
+        return [self.fila(fila) for fila in filas]
+
+    def objeto(self, fila):
+        """Serializa una sola fila como objeto JSON (para vistas de detalle)"""
+        return dict(zip(self.nombres, self.fila(fila)))
+
+    def pagina(self, filas, siguiente=None):
+        return {
+            'campos': self.nombres,
+            'filas': self.filas(filas),
+            'siguiente': siguiente,
+        }
+
+
+def respuesta_json(datos, status=200):
+    """JsonResponse compacto (sin espacios y con UTF-8 directo)"""
+    return JsonResponse(
+        datos,
+        status=status,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
+
+
+def respuesta_error(mensaje, status):
+    return respuesta_json({'error': mensaje}, status=status)
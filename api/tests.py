@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from juego.models import Intento
+from retos.models import Categoria, Reto
+from .paginacion import codificar_cursor
+
+
+class ListaRetosApiTests(TestCase):
+    """Paginación por cursor, ``intentados`` y GET condicional del listado"""
+
+    def setUp(self):
+        cache.clear()
+        categoria = Categoria.objects.create(nombre='Lógica')
+        self.retos = [
+            Reto.objects.create(
+                titulo=f'Reto {i}', descripcion='-', enunciado='-', respuesta_correcta='42',
+                categoria=categoria,
+            )
+            for i in range(5)
+        ]
+        self.url = reverse('api:lista_retos')
+
+    def test_recorrido_con_cursor(self):
+        ids, cursor, paginas = [], None, 0
+        while True:
+            params = {'orden': 'fecha', 'limite': 2}
+            if cursor:
+                params['cursor'] = cursor
+            datos = self.client.get(self.url, params).json()
+            ids += [fila[datos['campos'].index('id')] for fila in datos['filas']]
+            cursor, paginas = datos['siguiente'], paginas + 1
+            if cursor is None:
+                break
+        self.assertEqual(paginas, 3)
+        self.assertEqual(sorted(ids), sorted(reto.pk for reto in self.retos))
+
+    def test_cursor_invalido_responde_400(self):
+        for cursor in ('no-es-base64!', codificar_cursor([1]), codificar_cursor(['abc', 1])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {'orden': 'fecha', 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_intentados_sin_repetidos(self):
+        usuario = get_user_model().objects.create_user('api', password='clave-api')
+        reto = self.retos[0]
+        reto.max_intentos = 5
+        reto.save()
+        for _ in range(3):
+            Intento.registrar(usuario, reto, 'mal')
+        self.client.force_login(usuario)
+        self.assertEqual(self.client.get(self.url).json()['intentados'], [reto.pk])
+
+    def test_if_none_match_responde_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class MisEstadisticasApiTests(TestCase):
+    """El ETag de mis-estadisticas cambia con la posición en el ranking"""
+
+    def test_otro_usuario_puntua(self):
+        cache.clear()
+        User = get_user_model()
+        usuario, otro = User.objects.create_user('yo'), User.objects.create_user('otro')
+        categoria = Categoria.objects.create(nombre='Lógica')
+        reto, dificil = (
+            Reto.objects.create(
+                titulo=titulo, descripcion='-', enunciado='-', respuesta_correcta='42',
+                categoria=categoria, puntos=puntos,
+            )
+            for titulo, puntos in (('Reto', 10), ('Difícil', 50))
+        )
+        Intento.registrar(usuario, reto, '42')
+        self.client.force_login(usuario)
+        url = reverse('api:mis_estadisticas')
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['posicion_ranking'], 1)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        # Otro usuario puntúa más (sin tocar el perfil de este ni el catálogo) y pasa delante
+        Intento.registrar(otro, dificil, '42')
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posicion_ranking'], 2)
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('retos/', views.lista_retos, name='lista_retos'),
+    path('retos/<int:pk>/', views.detalle_reto, name='detalle_reto'),
+    path('retos/<int:pk>/intentar/', views.intentar_reto, name='intentar_reto'),
+    path('ranking/', views.ranking, name='ranking'),
+    path('mis-estadisticas/', views.mis_estadisticas, name='mis_estadisticas'),
+    path('progreso-global/', views.progreso_global, name='progreso_global'),
+]
@@ -0,0 +1,348 @@
+"""
+API JSON de solo lectura (v1) para el cliente móvil.
+
+Mismos filtros y ordenamientos que las vistas HTML, pero trabajando sobre
+``values_list()`` en lugar de instancias de modelos, con paginación por
+cursor y ETags. El único endpoint de escritura es ``intentar_reto``, que
+reutiliza ``Intento.registrar`` (la misma lógica que la vista HTML). Acepta
+la cabecera ``Idempotency-Key``: un reintento con la misma clave devuelve el
+veredicto del primero (con ``Idempotent-Replayed: true``) sin crear otro
+intento.
+"""
+
+import json
+from functools import wraps
+
+from django.db.models import Count, Sum, Max, Q, Case, When, F, FloatField
+from django.views.decorators.http import require_GET, require_POST
+
+from retos.models import Reto, ContadorGeneracion
+from retos.condicional import condicional, etag_usuario
+from retos.configuracion import cache_configuracion
+from retos.limitacion import limitar_envios
+from retos.views import ORDENAMIENTOS_RETOS, filtrar_retos, etag_lista_retos, etag_detalle_reto
+from juego.models import Intento, Ranking, ResultadoIntento
+from juego.views import clave_idempotencia, etag_ranking
+from cuentas.models import PerfilUsuario
+from .paginacion import paginar, CursorInvalido
+from .serializadores import SerializadorFilas, respuesta_json, respuesta_error, url_media
+
+RETO_LISTA = SerializadorFilas([
+    ('id', 'id'),
+    ('titulo', 'titulo'),
+    ('descripcion', 'descripcion'),
+    ('categoria_id', 'categoria_id'),
+    ('categoria', 'categoria__nombre'),
+    ('color', 'categoria__color'),
+    ('dificultad', 'dificultad'),
+    ('puntos', 'puntos'),
+    ('max_intentos', 'max_intentos'),
+    ('orden_prioridad', 'orden_prioridad'),
+    ('mostrar_aleatorio', 'mostrar_aleatorio'),
+    ('intentos_totales', 'intentos_totales'),
+    ('intentos_exitosos', 'intentos_exitosos'),
+    ('imagen', 'imagen_reto'),
+    ('icono', 'icono_por_defecto'),
+    ('fecha_creacion', 'fecha_creacion'),
+], conversores={'imagen': url_media})
+
+# Nunca incluye respuesta_correcta
+RETO_DETALLE = SerializadorFilas([
+    ('id', 'id'),
+    ('titulo', 'titulo'),
+    ('descripcion', 'descripcion'),
+    ('enunciado', 'enunciado'),
+    ('ejemplo_entrada', 'ejemplo_entrada'),
+    ('explicacion', 'explicacion'),
+    ('categoria_id', 'categoria_id'),
+    ('categoria', 'categoria__nombre'),
+    ('dificultad', 'dificultad'),
+    ('puntos', 'puntos'),
+    ('max_intentos', 'max_intentos'),
+    ('intentos_totales', 'intentos_totales'),
+    ('intentos_exitosos', 'intentos_exitosos'),
+    ('imagen', 'imagen_reto'),
+    ('icono', 'icono_por_defecto'),
+    ('fecha_creacion', 'fecha_creacion'),
+    ('fecha_modificacion', 'fecha_modificacion'),
+], conversores={'imagen': url_media})
+
+RANKING = SerializadorFilas([
+    ('posicion', 'posicion'),
+    ('usuario_id', 'usuario_id'),
+    ('username', 'usuario__username'),
+    ('puntuacion_total', 'puntuacion_total'),
+    ('retos_completados', 'retos_completados'),
+])
+
+HISTORIAL = SerializadorFilas([
+    ('id', 'id'),
+    ('reto_id', 'reto_id'),
+    ('reto', 'reto__titulo'),
+    ('es_correcto', 'es_correcto'),
+    ('puntuacion_obtenida', 'puntuacion_obtenida'),
+    ('fecha_intento', 'fecha_intento'),
+])
+
+RETO_RESUMEN = SerializadorFilas([
+    ('id', 'id'),
+    ('titulo', 'titulo'),
+    ('dificultad', 'dificultad'),
+    ('intentos_totales', 'intentos_totales'),
+    ('intentos_exitosos', 'intentos_exitosos'),
+])
+
+
+def login_requerido(view_func):
+    """Como ``login_required`` pero responde 401 en JSON en lugar de redirigir"""
+    @wraps(view_func)
+    def _wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return respuesta_error('Autenticación requerida.', 401)
+        return view_func(request, *args, **kwargs)
+    return _wrapper
+
+
+def etag_mis_estadisticas(request, *args, **kwargs):
+    catalogo = ContadorGeneracion.obtener(ContadorGeneracion.CATALOGO)
+    # posicion_ranking cambia cuando puntúan otros usuarios
+    ranking = ContadorGeneracion.obtener(ContadorGeneracion.RANKING)
+    return f"stats-{catalogo}-{ranking}-{etag_usuario(request)}"
+
+
+def etag_progreso_global(request, *args, **kwargs):
+    resumen = Reto.objects.aggregate(ultima=Max('fecha_modificacion'), total=Count('id'))
+    ultima = resumen['ultima'].timestamp() if resumen['ultima'] else 0
+    generacion = ContadorGeneracion.obtener(ContadorGeneracion.RANKING)
+    return f"global-{resumen['total']}-{ultima}-{generacion}"
+
+
+@require_GET
+@condicional(etag_lista_retos)
+def lista_retos(request):
+    """Listado de retos con los filtros y ordenamientos de ``ListaRetosView``"""
+    orden = request.GET.get('orden') or cache_configuracion.orden_por_defecto
+    if orden == 'aleatorio' and not request.GET.get('orden'):
+        # El orden aleatorio no admite cursor; la API usa el orden por fecha
+        orden = 'fecha'
+    if orden not in ORDENAMIENTOS_RETOS:
+        return respuesta_error(f"Orden no soportado: {orden}", 400)
+
+    queryset = filtrar_retos(Reto.objects.filter(activo=True), request.GET, request.user)
+    try:
+        filas, siguiente = paginar(
+            queryset,
+            RETO_LISTA.campos,
+            ORDENAMIENTOS_RETOS[orden] + ('id',),
+            request.GET,
+        )
+    except CursorInvalido:
+        return respuesta_error('Cursor inválido.', 400)
+
+    datos = RETO_LISTA.pagina(filas, siguiente)
+    if request.user.is_authenticated:
+        datos['intentados'] = list(
+            Intento.objects.filter(usuario=request.user, reto_id__in=[fila[0] for fila in filas])
+            .values_list('reto_id', flat=True)
+            .order_by()  # sin el Meta.ordering: fecha_intento entraría en el DISTINCT
+            .distinct()
+        )
+    return respuesta_json(datos)
+
+
+@require_GET
+@login_requerido
+@condicional(etag_detalle_reto)
+def detalle_reto(request, pk):
+    """Detalle de un reto sin la respuesta correcta, con el estado del usuario"""
+    fila = Reto.objects.filter(pk=pk, activo=True).values_list(*RETO_DETALLE.campos).first()
+    if fila is None:
+        return respuesta_error('Reto no encontrado.', 404)
+
+    reto = RETO_DETALLE.objeto(fila)
+    progreso = Intento.objects.filter(usuario=request.user, reto_id=pk).aggregate(
+        realizados=Count('id'),
+        correctos=Count('id', filter=Q(es_correcto=True)),
+    )
+    restantes = max(0, reto['max_intentos'] - progreso['realizados'])
+    resuelto = progreso['correctos'] > 0
+
+    # La explicación sólo se entrega cuando el reto ya no se puede intentar
+    if not (resuelto or restantes == 0):
+        reto['explicacion'] = None
+
+    reto['tasa_exito'] = (
+        round(reto['intentos_exitosos'] / reto['intentos_totales'] * 100, 2)
+        if reto['intentos_totales'] else 0
+    )
+    reto['usuario'] = {
+        'intentos_realizados': progreso['realizados'],
+        'intentos_restantes': restantes,
+        'resuelto': resuelto,
+    }
+    return respuesta_json(reto)
+
+
+def respuesta_limitada(request, espera):
+    return respuesta_error(f'Demasiados envíos seguidos. Vuelve a intentarlo en {espera} s.', 429)
+
+
+@require_POST
+@limitar_envios(respuesta_limitada)
+@login_requerido
+def intentar_reto(request, pk):
+    """Registra un intento y devuelve el veredicto y los intentos restantes"""
+    reto = Reto.objects.filter(pk=pk, activo=True).first()
+    if reto is None:
+        return respuesta_error('Reto no encontrado.', 404)
+
+    if request.content_type == 'application/json':
+        try:
+            respuesta_usuario = json.loads(request.body or b'{}').get('respuesta', '')
+        except (ValueError, AttributeError):
+            return respuesta_error('JSON inválido.', 400)
+    else:
+        respuesta_usuario = request.POST.get('respuesta', '')
+
+    try:
+        clave = clave_idempotencia(request)
+    except ValueError as error:
+        return respuesta_error(str(error), 400)
+
+    resultado = Intento.registrar(request.user, reto, respuesta_usuario, clave)
+    status = {
+        ResultadoIntento.YA_RESUELTO: 409,
+        ResultadoIntento.SIN_INTENTOS: 409,
+        ResultadoIntento.RESPUESTA_VACIA: 400,
+        ResultadoIntento.CLAVE_REUTILIZADA: 422,
+    }.get(resultado.estado, 201)
+
+    response = respuesta_json({
+        'estado': resultado.estado,
+        'es_correcto': resultado.es_correcto,
+        'puntuacion_obtenida': resultado.puntuacion_obtenida,
+        'intentos_restantes': resultado.intentos_restantes,
+        'mensaje': resultado.mensaje,
+    }, status=status)
+    if resultado.repetido:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+@require_GET
+@condicional(etag_ranking)
+def ranking(request):
+    """Ranking paginado por cursor sobre la posición"""
+    try:
+        filas, siguiente = paginar(
+            Ranking.objects.all(),
+            RANKING.campos,
+            ('posicion', 'usuario_id'),
+            request.GET,
+        )
+    except CursorInvalido:
+        return respuesta_error('Cursor inválido.', 400)
+
+    datos = RANKING.pagina(filas, siguiente)
+    if request.user.is_authenticated and not request.GET.get('cursor'):
+        fila = Ranking.objects.filter(usuario=request.user).values_list(*RANKING.campos).first()
+        datos['usuario'] = RANKING.objeto(fila) if fila else None
+    return respuesta_json(datos)
+
+
+@require_GET
+@login_requerido
+@condicional(etag_mis_estadisticas)
+def mis_estadisticas(request):
+    """Estadísticas del usuario con consultas agrupadas (una por dimensión)"""
+    usuario = request.user
+    intentos = Intento.objects.filter(usuario=usuario)
+    correctos = intentos.filter(es_correcto=True)
+
+    totales = intentos.aggregate(
+        total=Count('id'),
+        correctos=Count('id', filter=Q(es_correcto=True)),
+    )
+
+    por_dificultad = {
+        dificultad: {'nombre': nombre, 'completados': 0, 'puntos': 0}
+        for dificultad, nombre in Reto.DIFICULTAD_CHOICES
+    }
+    for dificultad, completados, puntos in correctos.values_list('reto__dificultad').annotate(
+        Count('id'), Sum('puntuacion_obtenida')
+    ).order_by():
+        if dificultad in por_dificultad:
+            por_dificultad[dificultad].update(completados=completados, puntos=puntos or 0)
+
+    por_categoria = {
+        nombre: {'completados': 0, 'puntos': 0}
+        for nombre in Reto.objects.exclude(categoria__isnull=True)
+        .values_list('categoria__nombre', flat=True).distinct()
+    }
+    for nombre, completados, puntos in correctos.filter(reto__categoria__isnull=False).values_list(
+        'reto__categoria__nombre'
+    ).annotate(Count('id'), Sum('puntuacion_obtenida')).order_by():
+        por_categoria[nombre] = {'completados': completados, 'puntos': puntos or 0}
+
+    perfil = PerfilUsuario.objects.filter(usuario=usuario).values_list(
+        'puntuacion_total', 'retos_completados'
+    ).first() or (0, 0)
+    posicion = Ranking.objects.filter(usuario=usuario).values_list('posicion', flat=True).first()
+    historial = intentos.order_by('-fecha_intento').values_list(*HISTORIAL.campos)[:20]
+
+    return respuesta_json({
+        'intentos_totales': totales['total'],
+        'intentos_correctos': totales['correctos'],
+        'puntuacion_total': perfil[0],
+        'retos_completados': perfil[1],
+        'posicion_ranking': posicion,
+        'por_dificultad': por_dificultad,
+        'por_categoria': por_categoria,
+        'historial': HISTORIAL.pagina(list(historial)),
+    })
+
+
+@require_GET
+@login_requerido
+@condicional(etag_progreso_global)
+def progreso_global(request):
+    """Progreso global del sistema con agregados agrupados"""
+    activos = Reto.objects.filter(activo=True)
+    intentos = Intento.objects.aggregate(
+        total=Count('id'),
+        correctos=Count('id', filter=Q(es_correcto=True)),
+    )
+
+    retos_dificiles = activos.annotate(
+        tasa_exito=Case(
+            When(intentos_totales=0, then=0),
+            default=F('intentos_exitosos') * 100.0 / F('intentos_totales'),
+            output_field=FloatField()
+        )
+    ).order_by('tasa_exito').values_list(*RETO_RESUMEN.campos)[:10]
+    retos_populares = activos.order_by('-intentos_totales').values_list(*RETO_RESUMEN.campos)[:10]
+
+    distribucion = {
+        dificultad: {'nombre': nombre, 'cantidad': 0, 'intentos': 0}
+        for dificultad, nombre in Reto.DIFICULTAD_CHOICES
+    }
+    for dificultad, cantidad in activos.values_list('dificultad').annotate(Count('id')).order_by():
+        if dificultad in distribucion:
+            distribucion[dificultad]['cantidad'] = cantidad
+    for dificultad, cantidad in Intento.objects.values_list('reto__dificultad').annotate(
+        Count('id')
+    ).order_by():
+        if dificultad in distribucion:
+            distribucion[dificultad]['intentos'] = cantidad
+
+    total = intentos['total']
+    return respuesta_json({
+        'total_retos': activos.count(),
+        'total_usuarios': Ranking.objects.count(),
+        'total_intentos': total,
+        'intentos_correctos': intentos['correctos'],
+        'tasa_exito_global': round(intentos['correctos'] / total * 100, 2) if total else 0,
+        'retos_dificiles': RETO_RESUMEN.pagina(list(retos_dificiles)),
+        'retos_populares': RETO_RESUMEN.pagina(list(retos_populares)),
+        'distribucion_dificultad': distribucion,
+    })
@@ -6,6 +6,10 @@ from django.urls import path, reverse
 from django.template.response import TemplateResponse
 from django import forms
 from .models import PerfilUsuario
+from .purga import purgar_usuario, purgar_usuarios
+from juego.admin import ExportacionAdminMixin
+from retos.admin import es_autocompletado, filtrar_prefijo
+from juego.models import Ranking
 
 class PerfilUsuarioForm(forms.ModelForm):
     class Meta:
@@ -25,10 +29,22 @@ class UserAdmin(BaseUserAdmin):
     inlines = (PerfilUsuarioInline,)
     list_display = ('imagen_usuario', 'username', 'email', 'first_name', 'last_name', 'is_staff', 'get_puntuacion', 'get_nivel', 'view_action')
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'date_joined')
+    actions = ['purgar_seleccionados']
     # Permitir borrado masivo, pero filtrando al propio usuario en la ejecución
     def get_actions(self, request):
         return super().get_actions(request)
 
+    def get_queryset(self, request):
+        # Foto, puntuación y nivel leen el perfil: traerlo en la misma consulta
+        return super().get_queryset(request).select_related('perfil')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Autocompletado: prefijo de usuario o email (índices *_prefijo_idx)
+        termino = search_term.strip()
+        if es_autocompletado(request) and termino:
+            return filtrar_prefijo(queryset, ['username', 'email'], termino), False
+        return super().get_search_results(request, queryset, search_term)
+
     def has_delete_permission(self, request, obj=None):
         # Impedir que el usuario autenticado se elimine a sí mismo
         if obj is not None and obj.pk == request.user.pk:
@@ -42,7 +58,25 @@ class UserAdmin(BaseUserAdmin):
         omitidos = inicial - queryset.count()
         if omitidos:
             self.message_user(request, f"Se omitió tu propio usuario en la eliminación masiva ({omitidos} elemento/s).")
-        return super().delete_queryset(request, queryset)
+        # Purga rápida: sin recalcular perfil y ranking por cada intento borrado
+        purgar_usuarios(queryset)
+
+    def delete_model(self, request, obj):
+        purgar_usuario(obj)
+
+    def get_deleted_objects(self, objs, request):
+        # La fila de Ranking (sin permiso de borrado en su admin) la retira la purga
+        deleted_objects, model_count, perms_needed, protected = super().get_deleted_objects(objs, request)
+        perms_needed.discard(Ranking._meta.verbose_name)
+        return deleted_objects, model_count, perms_needed, protected
+
+    def purgar_seleccionados(self, request, queryset):
+        """Borra las cuentas seleccionadas y sus intentos por la vía rápida"""
+        queryset = queryset.exclude(pk=request.user.pk)
+        usuarios, intentos = purgar_usuarios(queryset)
+        self.message_user(request, f"Se purgaron {usuarios} usuario/s y {intentos} intento/s.")
+    purgar_seleccionados.short_description = "Purgar usuarios seleccionados (borrado rápido)"
+    purgar_seleccionados.allowed_permissions = ('delete',)
 
     # Ruta adicional para ver un usuario en modo solo lectura
     def get_urls(self):
@@ -96,7 +130,7 @@ class UserAdmin(BaseUserAdmin):
             if perfil.foto_perfil:
                 return format_html(
                     '<img src="{}" alt="Foto de {}" style="width: 40px; height: 40px; border-radius: 50%; object-fit: cover; border: 2px solid #007bff;">',
-                    perfil.foto_perfil.url, obj.username
+                    perfil.obtener_avatar(40), obj.username
                 )
             # Si tiene avatar por defecto
             elif perfil.avatar_por_defecto:
@@ -120,13 +154,15 @@ except Exception:
     pass
 admin.site.register(User, UserAdmin)
 
-class PerfilUsuarioAdmin(admin.ModelAdmin):
+class PerfilUsuarioAdmin(ExportacionAdminMixin, admin.ModelAdmin):
     form = PerfilUsuarioForm
     list_display = ['imagen_perfil', 'usuario', 'puntuacion_badge', 'retos_completados', 'nivel_badge', 'fecha_registro']
     list_filter = ['nivel', 'fecha_registro']
     search_fields = ['usuario__username', 'usuario__email']
     ordering = ['-puntuacion_total']
-    actions = []
+    actions = ['exportar_csv', 'exportar_jsonl']
+    exportacion = 'perfiles'
+    autocomplete_fields = ['usuario']
     # Mostrar como listado informativo: sin enlaces de edición
     list_display_links = None
     # Bloquear creación directa desde este admin.
@@ -143,6 +179,7 @@ class PerfilUsuarioAdmin(admin.ModelAdmin):
         form = super().get_form(request, obj, **kwargs)
         # Si estamos creando un nuevo perfil, filtrar usuarios que ya tienen perfil
         if not obj:
+            # Valida en servidor; el widget de autocompletado no carga la lista completa
             form.base_fields['usuario'].queryset = get_user_model().objects.filter(perfil__isnull=True)
             # Asegurar que el campo nivel sea editable
             if 'nivel' in form.base_fields:
@@ -209,7 +246,7 @@ class PerfilUsuarioAdmin(admin.ModelAdmin):
         if obj.foto_perfil:
             return format_html(
                 '<img src="{}" alt="Foto de {}" style="width: 40px; height: 40px; border-radius: 50%; object-fit: cover; border: 2px solid #28a745;">',
-                obj.foto_perfil.url, obj.usuario.username
+                obj.obtener_avatar(40), obj.usuario.username
             )
         # Si tiene avatar por defecto
         elif obj.avatar_por_defecto:
@@ -225,6 +262,9 @@ class PerfilUsuarioAdmin(admin.ModelAdmin):
     imagen_perfil.short_description = 'Foto'
     imagen_perfil.allow_tags = True
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('usuario')
+    
     def has_add_permission(self, request):
         # Evitar "Add" aquí: use el inline en Usuario o cree el usuario (que crea el perfil)
         return False
@@ -0,0 +1,117 @@
+"""
+USUARIO Y BARRA DE NAVEGACIÓN EN CACHÉ
+======================================
+
+Cada página de un usuario autenticado leía la sesión, el usuario y su
+perfil (la foto o el avatar de la barra de navegación de ``base.html``).
+
+- La sesión usa ``cached_db`` (ver ``SESSION_ENGINE`` en settings).
+- ``BackendUsuarios`` guarda el usuario en la caché. En un fallo lo lee
+  con ``select_related('perfil')`` y, con la misma consulta, guarda también
+  los datos de la barra de navegación (``datos_navbar``).
+- El context processor ``navbar`` los entrega a las plantillas sin tocar
+  ``user.perfil``.
+
+Con la caché caliente una página no hace ninguna consulta por la sesión,
+el usuario ni la barra. La invalidación sólo llega a todos los procesos con
+una caché compartida: con ``CACHE_USUARIO_SEGUNDOS = 0`` (lo que pone
+``settings_produccion`` con ``locmem``) el usuario se lee siempre de la
+base de datos, como en ``ModelBackend``. El usuario se guarda sin el perfil: puntos y
+progreso se leen siempre frescos. Las señales de ``cuentas/models.py``
+invalidan las entradas al guardar o borrar un usuario o perfil, y
+``PerfilUsuario.imagen_procesada`` cuando el worker cambia la foto.
+"""
+
+import copy
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+TAMANO_AVATAR_NAVBAR = 40
+
+
+def tiempo_cache():
+    return getattr(settings, 'CACHE_USUARIO_SEGUNDOS', 300)
+
+
+def clave_usuario(pk):
+    return f'cuentas:usuario:{pk}'
+
+
+def clave_navbar(pk):
+    return f'cuentas:navbar:{pk}'
+
+
+def datos_navbar(usuario):
+    """Lo que la barra de navegación necesita del perfil: URL de la foto o emoji"""
+    perfil = getattr(usuario, 'perfil', None)
+    if perfil is None:
+        return {'foto': '', 'avatar': ''}
+    return {
+        'foto': perfil.obtener_avatar(TAMANO_AVATAR_NAVBAR) if perfil.foto_perfil else '',
+        'avatar': perfil.avatar_por_defecto or '',
+    }
+
+
+def _borrar(claves):
+    cache.delete_many(claves)
+    if transaction.get_connection().in_atomic_block:
+        # Otra petición pudo volver a guardar los datos viejos antes de confirmar
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+def invalidar_usuario(pk):
+    _borrar([clave_usuario(pk), clave_navbar(pk)])
+
+
+def invalidar_navbar(pk):
+    _borrar([clave_navbar(pk)])
+
+
+class BackendUsuarios(ModelBackend):
+    """``ModelBackend`` que lee el usuario de la caché en cada petición"""
+
+    def get_user(self, user_id):
+        if not tiempo_cache():
+            return super().get_user(user_id)
+        usuario = cache.get(clave_usuario(user_id))
+        if usuario is None:
+            try:
+                usuario = get_user_model()._default_manager.select_related('perfil').get(pk=user_id)
+            except get_user_model().DoesNotExist:
+                return None
+            # El perfil no se guarda con el usuario: sus puntos cambian sin pasar por save()
+            sin_perfil = copy.copy(usuario)
+            sin_perfil._state.fields_cache = {}
+            cache.set_many({
+                clave_usuario(user_id): sin_perfil,
+                clave_navbar(user_id): datos_navbar(usuario),
+            }, tiempo_cache())
+        return usuario if self.user_can_authenticate(usuario) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
+
+
+def obtener_navbar(usuario):
+    if not usuario.is_authenticated:
+        return None
+    if not tiempo_cache():
+        return datos_navbar(usuario)
+    datos = cache.get(clave_navbar(usuario.pk))
+    if datos is None:
+        datos = datos_navbar(usuario)
+        cache.set(clave_navbar(usuario.pk), datos, tiempo_cache())
+    return datos
+
+
+def navbar(request):
+    """Context processor: ``{{ navbar.foto }}`` y ``{{ navbar.avatar }}`` del usuario actual"""
+    if not hasattr(request, 'user'):
+        return {}
+    return {'navbar': SimpleLazyObject(lambda: obtener_navbar(request.user))}
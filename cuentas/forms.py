@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
 from .models import PerfilUsuario
 
 # Obtener el modelo de usuario personalizado
@@ -133,7 +134,8 @@ class PerfilForm(forms.ModelForm):
     def clean_foto_perfil(self):
         """Validar la foto de perfil"""
         foto = self.cleaned_data.get('foto_perfil')
-        if foto:
+        # Sólo se validan archivos recién subidos (no la foto ya guardada)
+        if isinstance(foto, UploadedFile):
             # Validar tamaño (máximo 5MB)
             if foto.size > 5 * 1024 * 1024:
                 raise forms.ValidationError('La foto no puede ser mayor a 5MB.')
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from cuentas.models import PerfilUsuario, User
+from juego.models import Ranking
+
+LOTE = 5000
+CON_PUNTOS = 5000  # los primeros usuarios tienen puntos; el resto, empatados a 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide altas de usuario por segundo con N usuarios ya registrados: antes (alta + "
+        "Ranking.actualizar_ranking(), como hacía la vista de registro) y después (alta que "
+        "sólo inserta su fila del ranking). Usa una base de datos de test temporal; no mide "
+        "el hash de la contraseña, que cuesta lo mismo en los dos casos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--altas', type=int, default=200, help="Altas medidas después")
+        parser.add_argument('--altas-antes', type=int, default=1, help="Altas medidas antes (lentas)")
+        parser.add_argument('--sin-antes', action='store_true', help="Mide sólo el camino nuevo")
+
+    def handle(self, *args, **options):
+        configuracion = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            resultados = []
+            for total in sorted(options['usuarios']):
+                self.poblar(total)
+                antes = None if options['sin_antes'] else self.medir(options['altas_antes'], reconstruir=True)
+                despues = self.medir(options['altas'], reconstruir=False)
+                resultados.append((total, antes, despues))
+        finally:
+            teardown_databases(configuracion, verbosity=0)
+
+        self.stdout.write(f"{'Usuarios':>10}{'antes altas/s':>15}{'después altas/s':>17}")
+        for total, antes, despues in resultados:
+            antes = '-' if antes is None else f'{antes:.2f}'
+            self.stdout.write(f"{total:>10}{antes:>15}{despues:>17.0f}")
+
+    def poblar(self, total):
+        """Completa hasta ``total`` usuarios con perfil y fila del ranking (sin señales)"""
+        existentes = User.objects.count()
+        for inicio in range(existentes, total, LOTE):
+            indices = range(inicio, min(inicio + LOTE, total))
+            usuarios = User.objects.bulk_create(
+                User(username=f'existente{i}', password='!') for i in indices
+            )
+            # Posiciones ya en el orden de actualizar_ranking
+            PerfilUsuario.objects.bulk_create(
+                PerfilUsuario(usuario=usuario, puntuacion_total=max(0, CON_PUNTOS - i))
+                for i, usuario in zip(indices, usuarios)
+            )
+            Ranking.objects.bulk_create(
+                Ranking(usuario=usuario, posicion=i + 1, puntuacion_total=max(0, CON_PUNTOS - i))
+                for i, usuario in zip(indices, usuarios)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def medir(self, altas, reconstruir):
+        inicio = time.perf_counter()
+        for i in range(altas):
+            User.objects.create_user(f'nuevo{i}')
+            if reconstruir:
+                Ranking.actualizar_ranking()
+        segundos = time.perf_counter() - inicio
+        # Sin las altas medidas: cada medición parte de los mismos usuarios
+        User.objects.filter(username__startswith='nuevo').delete()
+        return altas / segundos
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cuentas.purga import purgar_usuarios, usuarios_inactivos
+
+
+class Command(BaseCommand):
+    help = (
+        "Purga cuentas inactivas (desactivadas o sin acceso reciente) y sus intentos "
+        "sin recalcular el ranking por cada intento. Pensado para cron o tareas en segundo plano."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias-sin-acceso', type=int,
+                            help="Incluir también cuentas sin iniciar sesión en estos días")
+        parser.add_argument('--limite', type=int, help="Máximo de cuentas a purgar en esta ejecución")
+        parser.add_argument('--simular', action='store_true', help="Sólo mostrar cuántas cuentas se purgarían")
+
+    def handle(self, *args, **options):
+        dias = options['dias_sin_acceso']
+        if dias is not None and dias < 1:
+            raise CommandError("--dias-sin-acceso debe ser mayor que 0")
+
+        candidatos = usuarios_inactivos(dias).order_by('pk')
+        if options['limite']:
+            candidatos = candidatos[:options['limite']]
+
+        if options['simular']:
+            self.stdout.write(f"Se purgarían {candidatos.count()} cuentas.")
+            return
+
+        def al_purgar(usuario):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {usuario.username} purgado")
+
+        usuarios, intentos = purgar_usuarios(candidatos, al_purgar)
+
+        self.stdout.write(self.style.SUCCESS(f"Purgadas {usuarios} cuentas ({intentos} intentos)."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cuentas', '0002_perfilusuario_avatar_por_defecto_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='version_progreso',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Se incrementa en cada cambio del perfil; usado como validador HTTP (ETag)'),
+        ),
+    ]
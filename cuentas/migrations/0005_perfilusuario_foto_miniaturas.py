@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cuentas', '0004_user_prefijo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='foto_miniaturas',
+            field=models.BooleanField(default=False, editable=False, help_text='Las miniaturas de foto_perfil ya están generadas'),
+        ),
+    ]
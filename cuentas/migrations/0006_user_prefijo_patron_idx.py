@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Sólo PostgreSQL: fuera de la intercalación "C", LIKE 'X%' no usa un índice
+# btree normal; el autocompletado del admin compara UPPER(campo) LIKE 'X%'.
+INDICES = [
+    ('user_username_prefijo_patron_idx', 'username'),
+    ('user_email_prefijo_patron_idx', 'email'),
+]
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabla = schema_editor.quote_name(apps.get_model('cuentas', 'User')._meta.db_table)
+    for nombre, campo in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} (UPPER({schema_editor.quote_name(campo)}) text_pattern_ops)'
+        )
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, _campo in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cuentas', '0005_perfilusuario_foto_miniaturas'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
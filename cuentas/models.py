@@ -16,30 +16,49 @@ la base de usuarios del sistema.
 """
 
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from retos.miniaturas import url_imagen
+from retos.models import ImagenSubidaMixin, imagen_objeto_borrado
 
 class User(AbstractUser):
     """Modelo de usuario personalizado basado en AbstractUser.
     Espacio para futuros campos adicionales.
     """
-    pass
+    
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Búsqueda por prefijo del autocompletado del admin (retos.admin.filtrar_prefijo)
+            models.Index(Upper('username'), name='user_username_prefijo_idx'),
+            models.Index(Upper('email'), name='user_email_prefijo_idx'),
+        ]
 
-class PerfilUsuario(models.Model):
+class PerfilUsuario(ImagenSubidaMixin, models.Model):
     """Perfil extendido del usuario para el sistema de retos"""
     usuario = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='perfil')
     fecha_registro = models.DateTimeField(auto_now_add=True)
     puntuacion_total = models.IntegerField(default=0)
     nivel = models.IntegerField(default=1)
     retos_completados = models.IntegerField(default=0)
+    version_progreso = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Se incrementa en cada cambio del perfil; usado como validador HTTP (ETag)"
+    )
     foto_perfil = models.ImageField(
         upload_to='perfiles/', 
         blank=True, 
         null=True,
         help_text="Sube una foto personalizada o deja vacío para usar avatar por defecto"
     )
+    foto_miniaturas = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Las miniaturas de foto_perfil ya están generadas"
+    )
     avatar_por_defecto = models.CharField(
         max_length=50,
         blank=True,
@@ -65,6 +84,23 @@ class PerfilUsuario(models.Model):
     def __str__(self):
         return f"{self.usuario.username} - {self.puntuacion_total} pts"
     
+    CAMPO_IMAGEN = 'foto_perfil'
+    BANDERA_MINIATURAS = 'foto_miniaturas'
+    
+    def save(self, *args, **kwargs):
+        """Cada guardado produce una nueva versión del progreso del usuario"""
+        self.version_progreso = (self.version_progreso or 0) + 1
+        super().save(*args, **kwargs)
+    
+    def cambios_imagen_procesada(self):
+        # Nueva versión para que el ETag de las páginas con la foto cambie
+        return {'version_progreso': models.F('version_progreso') + 1}
+    
+    def imagen_procesada(self):
+        # La barra de navegación en caché apunta a la foto anterior
+        from .autenticacion import invalidar_navbar
+        invalidar_navbar(self.usuario_id)
+    
     def actualizar_puntuacion(self):
         """Actualiza la puntuación total basada en los intentos correctos"""
         from juego.models import Intento
@@ -77,12 +113,41 @@ class PerfilUsuario(models.Model):
             usuario=self.usuario,
             es_correcto=True
         ).values('reto').distinct().count()
-        self.save()
+        # Sólo lo que cambia: un perfil leído antes no pisa la foto que dejó el worker
+        self.save(update_fields=['puntuacion_total', 'retos_completados', 'version_progreso'])
     
-    def obtener_avatar(self):
-        """Retorna la foto de perfil si existe, o el avatar por defecto"""
+    @classmethod
+    def actualizar_puntuaciones(cls, usuarios, batch_size=500):
+        """Versión por lotes de actualizar_puntuacion para varios usuarios
+
+        ``usuarios`` puede ser un queryset (de usuarios o de ids) o una lista de
+        ids. Usa una consulta agrupada y un bulk_update; retorna los perfiles
+        actualizados.
+        """
+        from juego.models import Intento
+        totales = {
+            fila['usuario']: fila
+            for fila in Intento.objects.filter(usuario__in=usuarios, es_correcto=True)
+            .values('usuario')
+            .annotate(total=models.Sum('puntuacion_obtenida'), completados=models.Count('reto', distinct=True))
+            .order_by()
+        }
+        perfiles = list(cls.objects.filter(usuario__in=usuarios))
+        for perfil in perfiles:
+            fila = totales.get(perfil.usuario_id, {})
+            perfil.puntuacion_total = fila.get('total') or 0
+            perfil.retos_completados = fila.get('completados', 0)
+            # bulk_update no pasa por save(): nueva versión a mano
+            perfil.version_progreso += 1
+        cls.objects.bulk_update(
+            perfiles, ['puntuacion_total', 'retos_completados', 'version_progreso'], batch_size=batch_size
+        )
+        return len(perfiles)
+    
+    def obtener_avatar(self, tamano=None):
+        """Retorna la foto de perfil (la miniatura más cercana a ``tamano`` px si existe), o el avatar por defecto"""
         if self.foto_perfil:
-            return self.foto_perfil.url
+            return url_imagen(self.foto_perfil, tamano, self.foto_miniaturas)
         return self.avatar_por_defecto or '👤'
     
     def tiene_foto_personal(self):
@@ -92,14 +157,33 @@ class PerfilUsuario(models.Model):
     def eliminar_foto_personal(self):
         """Elimina la foto personal del usuario"""
         if self.foto_perfil:
-            self.foto_perfil.delete(save=False)
+            # El worker libera el archivo (se borra con sus miniaturas si nadie más lo usa)
             self.foto_perfil = None
-            self.save()
+            self.foto_miniaturas = False
+            self.save(update_fields=['foto_perfil', 'foto_miniaturas', 'version_progreso'])
+
+post_delete.connect(imagen_objeto_borrado, sender=PerfilUsuario)
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_usuario_en_cache(sender, instance, **kwargs):
+    """El usuario en caché de ``BackendUsuarios`` ya no es válido"""
+    from .autenticacion import invalidar_usuario
+    invalidar_usuario(instance.pk)
+
+@receiver([post_save, post_delete], sender=PerfilUsuario)
+def invalidar_navbar_en_cache(sender, instance, **kwargs):
+    """Foto o avatar de la barra de navegación en caché"""
+    from .autenticacion import invalidar_navbar
+    invalidar_navbar(instance.usuario_id)
 
 @receiver(post_save, sender=User)
-def crear_perfil_usuario(sender, instance, created, **kwargs):
-    """Crea automáticamente un perfil cuando se crea un usuario"""
+def crear_perfil_usuario(sender, instance, created, raw=False, **kwargs):
+    """Crea automáticamente un perfil y su fila del ranking cuando se crea un usuario"""
     if created:
         # Verificar si ya existe un perfil para evitar duplicados
         if not hasattr(instance, 'perfil'):
             PerfilUsuario.objects.create(usuario=instance)
+        if not raw:
+            # loaddata no: una fixture puede traer su propia fila del ranking
+            from juego.models import Ranking
+            Ranking.agregar_usuario(instance)
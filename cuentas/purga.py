@@ -0,0 +1,97 @@
+"""
+PURGA RÁPIDA DE CUENTAS
+=======================
+
+Borrar un usuario con ``user.delete()`` borra en cascada sus intentos uno a
+uno, y cada borrado recalcula su perfil y el ranking completo. La purga
+evita ese camino:
+
+1. Borra los intentos del usuario con un DELETE directo (sin señales).
+2. Descuenta sus intentos de los contadores de cada ``Reto`` con UPDATEs
+   agrupados y reconstruye el resumen diario de esos retos.
+3. Quita su fila de ``Ranking`` y sube una posición a todos los que
+   estaban por debajo, en una sola sentencia (``Ranking.quitar_usuario``,
+   que también avisa a las páginas del ranking en vivo).
+4. Borra el usuario (el perfil cae en cascada).
+
+Los puntos de los demás usuarios no dependen de los intentos del usuario
+purgado, así que no hace falta recalcular otros perfiles.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+
+from juego.models import Intento, IntentoDiario, Ranking
+from retos.models import Reto
+
+
+def _descontar_intentos(intentos):
+    """Resta de cada reto los intentos dados, con un UPDATE por grupo de conteos"""
+    grupos = defaultdict(list)
+    for fila in intentos.values('reto').annotate(
+        total=Count('pk'), exitosos=Count('pk', filter=Q(es_correcto=True))
+    ).order_by():
+        grupos[(fila['total'], fila['exitosos'])].append(fila['reto'])
+
+    for (total, exitosos), retos in grupos.items():
+        Reto.objects.filter(pk__in=retos).update(
+            intentos_totales=F('intentos_totales') - total,
+            intentos_exitosos=F('intentos_exitosos') - exitosos,
+            fecha_modificacion=timezone.now(),
+        )
+    return [reto for retos in grupos.values() for reto in retos]
+
+
+def purgar_usuario(usuario):
+    """Borra la cuenta y todos sus datos de juego sin recálculos por intento
+
+    Retorna el número de intentos borrados.
+    """
+    with transaction.atomic():
+        intentos = Intento.objects.filter(usuario=usuario)
+        rango = intentos.aggregate(primero=Min('fecha_intento'), ultimo=Max('fecha_intento'))
+        retos = _descontar_intentos(intentos)
+        borrados = intentos._raw_delete(intentos.db)
+
+        if retos:
+            IntentoDiario.reconstruir(
+                timezone.localdate(rango['primero']),
+                timezone.localdate(rango['ultimo']),
+                retos=retos,
+            )
+
+        Ranking.quitar_usuario(usuario)
+        usuario.delete()
+    return borrados
+
+
+def purgar_usuarios(usuarios, al_purgar=None):
+    """Purga cada usuario del queryset; retorna (usuarios purgados, intentos borrados)
+
+    Cada usuario va en su propia transacción: se puede interrumpir sin perder
+    lo hecho. ``al_purgar(usuario)`` se llama tras purgar cada uno.
+    """
+    purgados = intentos = 0
+    for usuario in usuarios.iterator():
+        intentos += purgar_usuario(usuario)
+        purgados += 1
+        if al_purgar is not None:
+            al_purgar(usuario)
+    return purgados, intentos
+
+
+def usuarios_inactivos(dias_sin_acceso=None):
+    """Cuentas candidatas a purga: desactivadas o sin acceso en ``dias_sin_acceso`` días
+
+    Nunca incluye staff ni superusuarios.
+    """
+    filtro = Q(is_active=False)
+    if dias_sin_acceso is not None:
+        limite = timezone.now() - datetime.timedelta(days=dias_sin_acceso)
+        filtro |= Q(last_login__lt=limite) | Q(last_login__isnull=True, date_joined__lt=limite)
+    return get_user_model().objects.filter(filtro, is_staff=False, is_superuser=False)
@@ -1,3 +1,189 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from juego.models import Intento, IntentoDiario, Ranking
+from retos.difusion import difusor
+from retos.models import Reto
+from .models import PerfilUsuario, User
+from .purga import purgar_usuario, purgar_usuarios
+
+
+class UsuarioEnCacheTests(TestCase):
+    """Con la caché caliente una página no consulta sesión, usuario ni perfil"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('navbar', password='clave-navbar')
+        self.usuario.perfil.avatar_por_defecto = '👩'
+        self.usuario.perfil.save()
+        self.client.login(username='navbar', password='clave-navbar')
+
+    def test_sin_consultas_por_peticion_con_cache_caliente(self):
+        self.client.get('/')
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/')
+        self.assertContains(response, '👩')
+        tablas = ' '.join(consulta['sql'] for consulta in consultas.captured_queries)
+        for tabla in ('django_session', 'cuentas_user', 'cuentas_perfilusuario'):
+            self.assertNotIn(f'FROM "{tabla}"', tablas)
+
+    def test_guardar_invalida_la_cache(self):
+        self.client.get('/')
+        self.usuario.perfil.avatar_por_defecto = '👨'
+        self.usuario.perfil.save()
+        self.assertContains(self.client.get('/'), '👨')
+
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertEqual(self.client.get('/dashboard/').status_code, 302)
+
+    def test_sin_cache_de_usuario(self):
+        self.client.get('/')
+        # La copia en caché queda vieja, como la de otro worker con locmem
+        User.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/dashboard/').status_code, 200)
+        with override_settings(CACHE_USUARIO_SEGUNDOS=0):
+            self.assertEqual(self.client.get('/dashboard/').status_code, 302)
+
+    def test_sesion_de_model_backend(self):
+        # Sesiones anteriores a BackendUsuarios
+        self.client.force_login(self.usuario, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get('/dashboard/').status_code, 200)
+
+
+class RegistroRankingTests(TestCase):
+    """Un alta añade su fila al final del ranking sin tocar las demás"""
+
+    def setUp(self):
+        for i in range(3):
+            User.objects.create_user(f'existente{i}')
+        Ranking.objects.filter(usuario__username='existente0').update(puntuacion_total=50)
+
+    def test_registro_inserta_una_fila_al_final(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(reverse('cuentas:registro'), {
+                'username': 'nuevo', 'email': 'nuevo@example.com',
+                'password1': 'clave-Segura-123', 'password2': 'clave-Segura-123',
+            })
+        self.assertRedirects(response, reverse('retos:dashboard'), fetch_redirect_response=False)
+
+        escrituras = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if '"juego_ranking"' in consulta['sql'] and not consulta['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(len(escrituras), 1)
+        self.assertTrue(escrituras[0].startswith('INSERT'))
+        self.assertEqual(
+            list(Ranking.objects.values_list('usuario__username', 'posicion')),
+            [('existente0', 1), ('existente1', 2), ('existente2', 3), ('nuevo', 4)],
+        )
+        self.assertEqual(User.objects.get(username='nuevo').ranking.posicion, 4)
+
+
+class ActualizarPuntuacionTests(TestCase):
+    """Recalcular la puntuación sólo escribe sus columnas"""
+
+    def test_no_pisa_la_foto_procesada(self):
+        usuario = User.objects.create_user('puntos')
+        reto = Reto.objects.create(titulo='R', descripcion='d', enunciado='e', respuesta_correcta='r', puntos=10)
+        perfil = PerfilUsuario.objects.get(usuario=usuario)
+        # Mientras tanto el worker de imágenes guarda la foto procesada
+        PerfilUsuario.objects.filter(pk=perfil.pk).update(foto_perfil='perfiles/nueva.jpg', foto_miniaturas=True)
+        Intento.objects.create(usuario=usuario, reto=reto, respuesta_usuario='r', es_correcto=True, puntuacion_obtenida=10)
+
+        version = perfil.version_progreso
+        with CaptureQueriesContext(connection) as consultas:
+            perfil.actualizar_puntuacion()
+        update = next(c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE'))
+        self.assertNotIn('foto_perfil', update)
+
+        perfil.refresh_from_db()
+        self.assertEqual((perfil.puntuacion_total, perfil.retos_completados), (10, 1))
+        self.assertEqual(perfil.version_progreso, version + 1)
+        self.assertEqual((perfil.foto_perfil.name, perfil.foto_miniaturas), ('perfiles/nueva.jpg', True))
+
+
+class PurgaTests(TestCase):
+    """Purgar una cuenta deja ranking, contadores y resumen como un recálculo completo"""
+
+    def setUp(self):
+        self.retos = [
+            Reto.objects.create(titulo=f'R{i}', descripcion='d', enunciado='e', respuesta_correcta='r', puntos=10)
+            for i in range(2)
+        ]
+        # 25 jugadores: el ranking ocupa dos páginas
+        self.usuarios = [User.objects.create_user(f'jugador{i}') for i in range(1, 26)]
+        for usuario in self.usuarios[1:4]:
+            for reto in self.retos:
+                Intento.objects.create(usuario=usuario, reto=reto, respuesta_usuario='x')
+                Intento.objects.create(usuario=usuario, reto=reto, respuesta_usuario='r', es_correcto=True)
+        # Intentos de ayer y de hoy: la purga reconstruye un rango de días
+        ayer = datetime.timedelta(days=1)
+        Intento.objects.filter(respuesta_usuario='x').update(fecha_intento=timezone.now() - ayer)
+        IntentoDiario.reconstruir()
+        for i, usuario in enumerate(self.usuarios):
+            PerfilUsuario.objects.filter(usuario=usuario).update(puntuacion_total=300 - 10 * i)
+        Ranking.actualizar_ranking()
+        self.purgado = self.usuarios[2]  # jugador3, en el puesto 3
+
+    def resumen(self):
+        return list(IntentoDiario.objects.order_by('dia', 'reto').values_list(
+            'dia', 'reto', 'intentos', 'correctos', 'puntos', 'usuarios_distintos',
+        ))
+
+    def test_igual_que_un_recalculo_completo(self):
+        self.assertEqual(purgar_usuario(self.purgado), 4)
+
+        self.assertFalse(User.objects.filter(pk=self.purgado.pk).exists())
+        self.assertEqual(
+            list(Ranking.objects.values_list('usuario__username', 'posicion')),
+            [(usuario.username, posicion) for posicion, usuario in enumerate(
+                [u for u in self.usuarios if u != self.purgado], 1)],
+        )
+        for reto in Reto.objects.all():
+            intentos = Intento.objects.filter(reto=reto)
+            self.assertEqual(
+                (reto.intentos_totales, reto.intentos_exitosos),
+                (intentos.count(), intentos.filter(es_correcto=True).count()),
+            )
+        resumen = self.resumen()
+        IntentoDiario.reconstruir()
+        self.assertEqual(resumen, self.resumen())
+
+    def test_publica_la_baja_en_vivo(self):
+        with mock.patch.object(difusor, 'tiene_suscriptores', return_value=True), \
+                mock.patch.object(difusor, 'publicar_al_confirmar') as publicar:
+            purgar_usuario(self.purgado)
+
+        datos = publicar.call_args.args[2]
+        self.assertEqual(datos['bajas'], ['jugador3'])
+        self.assertEqual(datos['desplazados'], [[4, 25, -1]])
+        # El primero de la página 2 sube a la página 1
+        self.assertEqual(
+            [(fila['usuario'], fila['anterior'], fila['posicion']) for fila in datos['cambios']],
+            [('jugador21', 21, 20)],
+        )
+        self.assertEqual([fila['usuario'] for fila in datos['podio']], ['jugador1', 'jugador2', 'jugador4'])
+        self.assertEqual(datos['total_usuarios'], 24)
+
+    def test_comando_usa_el_servicio(self):
+        User.objects.filter(pk__in=[self.purgado.pk, self.usuarios[-1].pk]).update(is_active=False)
+        salida = StringIO()
+        with mock.patch(
+            'cuentas.management.commands.purgar_usuarios.purgar_usuarios', wraps=purgar_usuarios,
+        ) as servicio:
+            call_command('purgar_usuarios', verbosity=2, stdout=salida)
+
+        servicio.assert_called_once()
+        self.assertIn('jugador3 purgado', salida.getvalue())
+        self.assertIn('Purgadas 2 cuentas (4 intentos).', salida.getvalue())
+        self.assertEqual(list(Ranking.objects.values_list('posicion', flat=True)), list(range(1, 24)))
@@ -27,11 +27,8 @@ def registro(request):
             email = form.cleaned_data.get('email')
             messages.success(request, f'¡Cuenta creada para {username}! Se envió un email de confirmación a {email}')
             
-            # Autenticar y loguear al usuario
-            login(request, user)
-            
-            # Crear entrada en el ranking
-            Ranking.actualizar_ranking()
+            # Autenticar y loguear al usuario (su fila del ranking la crea crear_perfil_usuario)
+            login(request, user, backend='cuentas.autenticacion.BackendUsuarios')
             
             return redirect('retos:dashboard')
     else:
@@ -1,14 +1,96 @@
+import time
+
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from .models import Intento, Ranking
+from .models import Intento, IntentoDiario, Ranking
+from .exportacion import obtener_exportacion
+from .recalculo import recalculo_diferido
+
+class ExportacionAdminMixin:
+    """Acciones para exportar en streaming los registros seleccionados"""
+    exportacion = None  # Nombre en juego.exportacion.EXPORTACIONES
+    
+    def exportar_csv(self, request, queryset):
+        return obtener_exportacion(self.exportacion).respuesta(request, 'csv', queryset)
+    exportar_csv.short_description = "Exportar seleccionados a CSV"
+    exportar_csv.allowed_permissions = ('view',)
+    
+    def exportar_jsonl(self, request, queryset):
+        return obtener_exportacion(self.exportacion).respuesta(request, 'jsonl', queryset)
+    exportar_jsonl.short_description = "Exportar seleccionados a JSONL"
+    exportar_jsonl.allowed_permissions = ('view',)
+
+class PaginadorEstimado(Paginator):
+    """Paginador del changelist de intentos que evita COUNT(*) sobre la tabla completa
+
+    Sin filtros usa una estimación: las estadísticas del motor en PostgreSQL
+    o la suma del resumen IntentoDiario en el resto. La estimación nunca
+    queda por debajo de un conteo real acotado hasta la página siguiente a
+    la pedida: con un resumen vacío o atrasado el admin no mostraría toda la
+    tabla en una sola página ni cortaría las últimas. Con filtros o búsqueda
+    cuenta como mucho ``LIMITE_CONTEO`` filas, o hasta la página siguiente a
+    ``pagina`` si está más allá; si hay más, ``truncado`` es True y la
+    plantilla muestra el total como "10000+".
+    """
+    LIMITE_CONTEO = 10000
+    
+    def __init__(self, *args, pagina=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pagina = pagina
+        self.truncado = False
+    
+    @cached_property
+    def count(self):
+        if self.object_list.query.where:
+            # Siempre cabe la página siguiente a la pedida: se puede seguir avanzando
+            limite = max(self.LIMITE_CONTEO, (self.pagina + 1) * self.per_page)
+            total = self.object_list.order_by()[:limite + 1].count()
+            self.truncado = total > limite
+            return min(total, limite)
+        limite = (self.pagina + 1) * self.per_page
+        real = self.object_list.order_by()[:limite + 1].count()
+        if real <= limite:
+            return real  # tabla pequeña: el conteo es exacto
+        return max(self.total_estimado(), real)
+    
+    def total_estimado(self):
+        connection = connections[self.object_list.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [Intento._meta.db_table],
+                )
+                fila = cursor.fetchone()
+            if fila and fila[0] > 0:
+                return fila[0]
+        return IntentoDiario.objects.aggregate(total=Sum('intentos'))['total'] or 0
 
-class IntentoAdmin(admin.ModelAdmin):
+class IntentoAdmin(ExportacionAdminMixin, admin.ModelAdmin):
     list_display = ['usuario', 'reto', 'resultado_badge', 'puntuacion_obtenida', 'fecha_intento']
     list_filter = ['es_correcto', 'fecha_intento', 'reto__dificultad', 'reto__categoria']
     search_fields = ['usuario__username', 'reto__titulo', 'respuesta_usuario']
     ordering = ['-fecha_intento']
     readonly_fields = ['fecha_intento', 'puntuacion_obtenida']
-    actions = ['recalcular_puntuaciones']
+    autocomplete_fields = ['usuario', 'reto']
+    actions = ['recalcular_puntuaciones', 'exportar_csv', 'exportar_jsonl']
+    exportacion = 'intentos'
+    date_hierarchy = 'fecha_intento'
+    # Tabla muy grande: conteos estimados y sin el segundo COUNT(*) sin filtrar
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            pagina = max(1, int(request.GET.get(PAGE_VAR, 1)))
+        except ValueError:
+            pagina = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, pagina=pagina)
     
     fieldsets = (
         ('Información del Intento', {
@@ -27,23 +109,41 @@ class IntentoAdmin(admin.ModelAdmin):
     resultado_badge.short_description = 'Resultado'
     
     def recalcular_puntuaciones(self, request, queryset):
-        for intento in queryset:
-            if intento.es_correcto:
-                intento.puntuacion_obtenida = intento.calcular_puntuacion()
-                intento.save()
-        self.message_user(request, f'Puntuaciones recalculadas para {queryset.count()} intentos.')
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            revisados, modificados = Intento.recalcular_puntuaciones(queryset)
+            calculo = time.perf_counter()
+            # Estadísticas, resumen diario, perfiles y ranking: una vez por acción
+            Intento.refrescar_dependientes(queryset)
+        fin = time.perf_counter()
+        self.message_user(
+            request,
+            f'Puntuaciones recalculadas para {revisados} intentos correctos ({modificados} modificados) '
+            f'en {fin - inicio:.2f} s (cálculo {calculo - inicio:.2f} s, '
+            f'estadísticas/perfiles/ranking {fin - calculo:.2f} s).'
+        )
     recalcular_puntuaciones.short_description = "Recalcular puntuaciones"
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('usuario', 'reto')
+    
+    def delete_model(self, request, obj):
+        with recalculo_diferido():
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        # Un solo recálculo de perfiles y ranking para todos los intentos borrados
+        with recalculo_diferido():
+            super().delete_queryset(request, queryset)
 
-class RankingAdmin(admin.ModelAdmin):
+class RankingAdmin(ExportacionAdminMixin, admin.ModelAdmin):
     list_display = ['posicion_badge', 'usuario', 'puntuacion_total', 'retos_completados', 'fecha_actualizacion']
     list_filter = ['fecha_actualizacion']
     search_fields = ['usuario__username']
     ordering = ['posicion']
     readonly_fields = ['fecha_actualizacion', 'posicion', 'puntuacion_total', 'retos_completados']
-    actions = ['actualizar_ranking_manual']
+    actions = ['actualizar_ranking_manual', 'exportar_csv', 'exportar_jsonl']
+    exportacion = 'ranking'
     
     def posicion_badge(self, obj):
         if obj.posicion <= 3:
@@ -64,6 +164,9 @@ class RankingAdmin(admin.ModelAdmin):
     actualizar_ranking_manual.short_description = "Actualizar ranking manualmente"
     actualizar_ranking_manual.allowed_permissions = ('view',)
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('usuario')
+    
     def has_add_permission(self, request):
         return False  # El ranking se actualiza automáticamente
     
@@ -0,0 +1,177 @@
+"""
+EXPORTACIÓN EN STREAMING (CSV / JSONL)
+======================================
+
+Exporta intentos, ranking y perfiles sin cargar las tablas en memoria:
+las filas se leen con ``values_list(...).iterator(chunk_size=...)`` y se
+escriben en bloques a medida que se generan, opcionalmente comprimidos
+con gzip. La memoria usada es constante sin importar el número de filas.
+
+Se usa desde las acciones del admin (``StreamingHttpResponse``) y desde
+el comando ``python manage.py exportar_datos``.
+"""
+
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+
+from cuentas.models import PerfilUsuario
+from .models import Intento, Ranking
+
+FORMATOS = ('csv', 'jsonl')
+CHUNK_SIZE = 2000
+# Tamaño aproximado de cada bloque enviado al cliente
+TAMANO_BLOQUE = 64 * 1024
+
+
+# Un texto que empieza así es una fórmula para Excel (inyección CSV)
+INICIOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def neutralizar_formula(valor):
+    """Antepone ``'`` a los textos que una hoja de cálculo evaluaría como fórmula"""
+    if isinstance(valor, str) and valor.startswith(INICIOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla"""
+    def write(self, valor):
+        return valor
+
+
+def _agrupar(lineas):
+    """Agrupa líneas de texto en bloques de bytes de ~TAMANO_BLOQUE"""
+    bloque = []
+    tamano = 0
+    for linea in lineas:
+        bloque.append(linea)
+        tamano += len(linea)
+        if tamano >= TAMANO_BLOQUE:
+            yield ''.join(bloque).encode('utf-8')
+            bloque = []
+            tamano = 0
+    if bloque:
+        yield ''.join(bloque).encode('utf-8')
+
+
+def comprimir_gzip(bloques):
+    """Comprime un iterador de bytes en formato gzip sin acumularlo"""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloque in bloques:
+        datos = compresor.compress(bloque)
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+
+class Exportacion:
+    """Define qué columnas de qué modelo se exportan y en qué orden"""
+
+    def __init__(self, nombre, modelo, columnas, orden):
+        self.nombre = nombre
+        self.modelo = modelo
+        self.nombres = [nombre_columna for nombre_columna, _ in columnas]
+        self.campos = [campo for _, campo in columnas]
+        self.orden = orden
+
+    def filas(self, queryset=None, chunk_size=CHUNK_SIZE):
+        """Itera las filas como tuplas, leyendo de a ``chunk_size``"""
+        if queryset is None:
+            queryset = self.modelo.objects.all()
+        return (
+            queryset.order_by(*self.orden)
+            .values_list(*self.campos)
+            .iterator(chunk_size=chunk_size)
+        )
+
+    def lineas_csv(self, filas):
+        escritor = csv.writer(_Eco())
+        # BOM para que Excel detecte UTF-8
+        yield '\ufeff' + escritor.writerow(self.nombres)
+        for fila in filas:
+            # Respuestas y nombres los escriben los usuarios
+            yield escritor.writerow([neutralizar_formula(valor) for valor in fila])
+
+    def lineas_jsonl(self, filas):
+        codificador = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        nombres = self.nombres
+        for fila in filas:
+            yield codificador.encode(dict(zip(nombres, fila))) + '\n'
+
+    def generar(self, formato, queryset=None, chunk_size=CHUNK_SIZE, gzip=False):
+        """Iterador de bytes con la exportación completa"""
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}")
+        filas = self.filas(queryset, chunk_size)
+        lineas = self.lineas_csv(filas) if formato == 'csv' else self.lineas_jsonl(filas)
+        bloques = _agrupar(lineas)
+        return comprimir_gzip(bloques) if gzip else bloques
+
+    def nombre_archivo(self, formato):
+        return f"{self.nombre}_{timezone.now():%Y%m%d_%H%M%S}.{formato}"
+
+    def respuesta(self, request, formato, queryset=None):
+        """StreamingHttpResponse con la exportación (gzip si el cliente lo acepta)"""
+        gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        tipos = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson; charset=utf-8'}
+        response = StreamingHttpResponse(
+            self.generar(formato, queryset, gzip=gzip),
+            content_type=tipos[formato],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.nombre_archivo(formato)}"'
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+EXPORTACIONES = {
+    'intentos': Exportacion('intentos', Intento, [
+        ('id', 'id'),
+        ('usuario_id', 'usuario_id'),
+        ('username', 'usuario__username'),
+        ('email', 'usuario__email'),
+        ('nombre', 'usuario__first_name'),
+        ('apellido', 'usuario__last_name'),
+        ('reto_id', 'reto_id'),
+        ('reto', 'reto__titulo'),
+        ('categoria', 'reto__categoria__nombre'),
+        ('dificultad', 'reto__dificultad'),
+        ('respuesta_usuario', 'respuesta_usuario'),
+        ('es_correcto', 'es_correcto'),
+        ('puntuacion_obtenida', 'puntuacion_obtenida'),
+        ('tiempo_respuesta', 'tiempo_respuesta'),
+        ('fecha_intento', 'fecha_intento'),
+    ], orden=('pk',)),
+    'ranking': Exportacion('ranking', Ranking, [
+        ('posicion', 'posicion'),
+        ('usuario_id', 'usuario_id'),
+        ('username', 'usuario__username'),
+        ('email', 'usuario__email'),
+        ('puntuacion_total', 'puntuacion_total'),
+        ('retos_completados', 'retos_completados'),
+        ('fecha_actualizacion', 'fecha_actualizacion'),
+    ], orden=('posicion', 'pk')),
+    'perfiles': Exportacion('perfiles', PerfilUsuario, [
+        ('usuario_id', 'usuario_id'),
+        ('username', 'usuario__username'),
+        ('email', 'usuario__email'),
+        ('nombre', 'usuario__first_name'),
+        ('apellido', 'usuario__last_name'),
+        ('puntuacion_total', 'puntuacion_total'),
+        ('nivel', 'nivel'),
+        ('retos_completados', 'retos_completados'),
+        ('fecha_registro', 'fecha_registro'),
+    ], orden=('pk',)),
+}
+
+
+def obtener_exportacion(nombre):
+    """Retorna la Exportacion registrada con ``nombre`` (intentos, ranking, perfiles)"""
+    return EXPORTACIONES[nombre]
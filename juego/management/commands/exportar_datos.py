@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from juego.exportacion import EXPORTACIONES, FORMATOS, CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta intentos, ranking o perfiles a CSV/JSONL en streaming "
+        "(memoria constante, apto para millones de filas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=sorted(EXPORTACIONES), help="Qué exportar")
+        parser.add_argument('--formato', choices=FORMATOS, default='csv')
+        parser.add_argument('--salida', '-o', help="Archivo de salida (por defecto, stdout)")
+        parser.add_argument('--gzip', action='store_true', help="Comprimir la salida con gzip")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help="Filas leídas de la base de datos por bloque")
+
+    def handle(self, *args, **options):
+        exportacion = EXPORTACIONES[options['tipo']]
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size debe ser mayor que 0")
+
+        bloques = exportacion.generar(
+            options['formato'],
+            chunk_size=options['chunk_size'],
+            gzip=options['gzip'],
+        )
+
+        salida = options['salida']
+        destino = open(salida, 'wb') if salida else sys.stdout.buffer
+        escritos = 0
+        try:
+            for bloque in bloques:
+                destino.write(bloque)
+                escritos += len(bloque)
+        finally:
+            if salida:
+                destino.close()
+
+        if salida:
+            self.stderr.write(self.style.SUCCESS(
+                f"Exportación '{options['tipo']}' escrita en {salida} ({escritos} bytes)."
+            ))
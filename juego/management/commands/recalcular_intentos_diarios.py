@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from juego.models import IntentoDiario
+
+
+def _fecha(valor):
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida (usa AAAA-MM-DD): {valor}")
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el resumen diario de intentos (IntentoDiario) desde la tabla de intentos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha, help="Primer día a reconstruir (AAAA-MM-DD)")
+        parser.add_argument('--hasta', type=_fecha, help="Último día a reconstruir (AAAA-MM-DD)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        desde, hasta = options['desde'], options['hasta']
+        if desde and hasta and desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta")
+
+        creados = IntentoDiario.reconstruir(desde, hasta, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Resumen diario reconstruido: {creados} filas."))
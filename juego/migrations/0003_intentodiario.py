@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('juego', '0002_alter_intento_unique_together'),
+        ('retos', '0008_contadorgeneracion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntentoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('correctos', models.PositiveIntegerField(default=0)),
+                ('puntos', models.IntegerField(default=0)),
+                ('usuarios_distintos', models.PositiveIntegerField(default=0, help_text='Usuarios distintos ese día en este reto (exacto)')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Intentos',
+                'verbose_name_plural': 'Resúmenes Diarios de Intentos',
+                'ordering': ['-dia'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='intento',
+            index=models.Index(fields=['reto', 'fecha_intento'], name='intento_reto_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='intentodiario',
+            name='reto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='retos.reto'),
+        ),
+        migrations.AddConstraint(
+            model_name='intentodiario',
+            constraint=models.UniqueConstraint(fields=('dia', 'reto'), name='intentodiario_dia_reto_unico'),
+        ),
+    ]
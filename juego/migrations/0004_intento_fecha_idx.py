@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('juego', '0003_intentodiario'),
+        ('retos', '0008_contadorgeneracion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='intento',
+            index=models.Index(fields=['fecha_intento', 'id'], name='intento_fecha_idx'),
+        ),
+    ]
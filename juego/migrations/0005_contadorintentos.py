@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('juego', '0004_intento_fecha_idx'),
+        ('retos', '0012_archivocontenido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorIntentos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('resuelto', models.BooleanField(default=False)),
+                ('reto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_intentos', to='retos.reto')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_intentos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Contador de Intentos',
+                'verbose_name_plural': 'Contadores de Intentos',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'reto'), name='contador_intentos_unico')],
+            },
+        ),
+    ]
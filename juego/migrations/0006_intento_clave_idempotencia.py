@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('juego', '0005_contadorintentos'),
+        ('retos', '0012_archivocontenido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='intento',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, editable=False, help_text='Clave enviada por el cliente; un reintento con la misma clave no crea otro intento', max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='intento',
+            constraint=models.UniqueConstraint(fields=('usuario', 'clave_idempotencia'), name='intento_clave_idempotencia_unica'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('juego', '0006_intento_clave_idempotencia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ranking',
+            index=models.Index(fields=['posicion'], name='ranking_posicion_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def reconstruir_resumen(apps, schema_editor):
+    """Rellena IntentoDiario con los intentos anteriores a su creación (como IntentoDiario.reconstruir)"""
+    Intento = apps.get_model('juego', 'Intento')
+    IntentoDiario = apps.get_model('juego', 'IntentoDiario')
+    filas = (
+        Intento.objects.annotate(dia=TruncDate('fecha_intento', tzinfo=timezone.get_current_timezone()))
+        .values('dia', 'reto_id')
+        .annotate(
+            total_intentos=Count('id'),
+            total_correctos=Count('id', filter=Q(es_correcto=True)),
+            total_puntos=Sum('puntuacion_obtenida'),
+            total_usuarios=Count('usuario', distinct=True),
+        )
+        .order_by()
+    )
+    IntentoDiario.objects.all().delete()
+    lote = []
+    for fila in filas.iterator():
+        lote.append(IntentoDiario(
+            dia=fila['dia'],
+            reto_id=fila['reto_id'],
+            intentos=fila['total_intentos'],
+            correctos=fila['total_correctos'],
+            puntos=fila['total_puntos'] or 0,
+            usuarios_distintos=fila['total_usuarios'],
+        ))
+        if len(lote) >= 1000:
+            IntentoDiario.objects.bulk_create(lote)
+            lote = []
+    IntentoDiario.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('juego', '0007_ranking_posicion_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconstruir_resumen, migrations.RunPython.noop),
+    ]
@@ -13,6 +13,8 @@ Modelos principales:
 - Intento: Cada vez que un usuario intenta resolver un reto
 - Ranking: Clasificación global de usuarios
 - PerfilUsuario: Información extendida del usuario
+- IntentoDiario: Resumen diario de intentos por reto (para reportes)
+- ContadorIntentos: Intentos usados por usuario y reto (límite de intentos)
 
 Trabaja en conjunto con la app "retos" que maneja el contenido educativo.
 
@@ -24,12 +26,72 @@ retos (contenido) ←→ juego (interacción)
    "Puntos: 40"       "Gana: 40 puntos"
 """
 
-from django.db import models
+import datetime
+
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Sum, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber, TruncDate
 from django.conf import settings
 from django.utils import timezone
-from retos.models import Reto
+from retos.difusion import CANAL_RANKING, difusor
+from retos.models import Reto, ContadorGeneracion
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
+from django.contrib import messages
+from .recalculo import lote_activo
+
+
+class ResultadoIntento:
+    """Resultado de procesar un intento; lo comparten la vista HTML y la API"""
+    YA_RESUELTO = 'ya_resuelto'
+    SIN_INTENTOS = 'sin_intentos'
+    RESPUESTA_VACIA = 'respuesta_vacia'
+    CORRECTO = 'correcto'
+    INCORRECTO = 'incorrecto'
+    CLAVE_REUTILIZADA = 'clave_reutilizada'
+
+    def __init__(self, estado, intento=None, intentos_restantes=0, repetido=False):
+        self.estado = estado
+        self.intento = intento
+        self.intentos_restantes = intentos_restantes
+        # Veredicto guardado de un envío anterior con la misma clave de idempotencia
+        self.repetido = repetido
+
+    @property
+    def es_correcto(self):
+        return self.estado == self.CORRECTO
+
+    @property
+    def puntuacion_obtenida(self):
+        return self.intento.puntuacion_obtenida if self.intento else 0
+
+    @property
+    def nivel_mensaje(self):
+        """Nivel de django.contrib.messages para mostrar el resultado"""
+        return {
+            self.YA_RESUELTO: messages.INFO,
+            self.SIN_INTENTOS: messages.WARNING,
+            self.CORRECTO: messages.SUCCESS,
+        }.get(self.estado, messages.ERROR)
+
+    @property
+    def mensaje(self):
+        """Texto para el usuario"""
+        if self.estado == self.YA_RESUELTO:
+            return 'Ya has resuelto correctamente este reto.'
+        if self.estado == self.SIN_INTENTOS:
+            return 'Has agotado todos tus intentos para este reto.'
+        if self.estado == self.RESPUESTA_VACIA:
+            return 'Debes proporcionar una respuesta.'
+        if self.estado == self.CLAVE_REUTILIZADA:
+            return 'Este envío ya se hizo con otra respuesta. Recarga la página e inténtalo de nuevo.'
+        if self.estado == self.CORRECTO:
+            return f'¡Correcto! Has ganado {self.puntuacion_obtenida} puntos.'
+        if self.intentos_restantes > 0:
+            return f'Respuesta incorrecta. Te quedan {self.intentos_restantes} intentos.'
+        return 'Respuesta incorrecta. Has agotado todos tus intentos.'
+
 
 class Intento(models.Model):
     """Modelo para registrar los intentos de los usuarios en los retos"""
@@ -40,11 +102,24 @@ class Intento(models.Model):
     puntuacion_obtenida = models.IntegerField(default=0)
     fecha_intento = models.DateTimeField(auto_now_add=True)
     tiempo_respuesta = models.DurationField(null=True, blank=True, help_text="Tiempo que tardó en responder")
+    clave_idempotencia = models.CharField(
+        max_length=64, null=True, blank=True, editable=False,
+        help_text="Clave enviada por el cliente; un reintento con la misma clave no crea otro intento",
+    )
     
     class Meta:
         verbose_name = "Intento"
         verbose_name_plural = "Intentos"
         ordering = ['-fecha_intento']
+        indexes = [
+            models.Index(fields=['reto', 'fecha_intento'], name='intento_reto_fecha_idx'),
+            # Orden del changelist del admin (-fecha_intento, -id) y date_hierarchy
+            models.Index(fields=['fecha_intento', 'id'], name='intento_fecha_idx'),
+        ]
+        constraints = [
+            # También el índice de la búsqueda de reintentos; NULL no choca con NULL
+            models.UniqueConstraint(fields=['usuario', 'clave_idempotencia'], name='intento_clave_idempotencia_unica'),
+        ]
     
     def __str__(self):
         estado = "✓" if self.es_correcto else "✗"
@@ -68,6 +143,10 @@ class Intento(models.Model):
             if intentos_anteriores_correctos:
                 return 0
         
+        return self._puntuacion_base()
+    
+    def _puntuacion_base(self):
+        """Puntos del reto más la bonificación por tiempo, sin mirar otros intentos"""
         # Puntuación base según dificultad
         puntuacion_base = self.reto.puntos
         
@@ -79,18 +158,339 @@ class Intento(models.Model):
         
         return puntuacion_base
     
+    @classmethod
+    def recalcular_puntuaciones(cls, intentos, batch_size=500):
+        """Recalcula puntuacion_obtenida de los intentos correctos indicados
+
+        Mismo criterio que calcular_puntuacion (0 si el usuario tiene otro
+        intento correcto en el mismo reto) pero con una consulta agrupada y
+        un bulk_update, sin pasar por save(). No refresca estadísticas,
+        perfiles ni ranking: para eso está ``refrescar_dependientes``.
+        Retorna (intentos correctos revisados, intentos modificados).
+        """
+        correctos = intentos.filter(es_correcto=True).order_by()
+        repetidos = set(
+            cls.objects.filter(
+                es_correcto=True,
+                usuario__in=correctos.values('usuario'),
+                reto__in=correctos.values('reto'),
+            )
+            .values('usuario', 'reto')
+            .annotate(n=Count('pk'))
+            .filter(n__gt=1)
+            .values_list('usuario', 'reto')
+        )
+        
+        revisados = 0
+        modificados = []
+        filas = correctos.select_related('reto').only(
+            'usuario_id', 'reto_id', 'tiempo_respuesta', 'puntuacion_obtenida', 'reto__puntos'
+        )
+        for intento in filas.iterator(chunk_size=2000):
+            revisados += 1
+            if (intento.usuario_id, intento.reto_id) in repetidos:
+                puntuacion = 0
+            else:
+                puntuacion = intento._puntuacion_base()
+            if puntuacion != intento.puntuacion_obtenida:
+                intento.puntuacion_obtenida = puntuacion
+                modificados.append(intento)
+        cls.objects.bulk_update(modificados, ['puntuacion_obtenida'], batch_size=batch_size)
+        return revisados, len(modificados)
+    
+    @classmethod
+    def refrescar_dependientes(cls, intentos):
+        """Una sola pasada de estadísticas de reto, resumen diario, perfiles y ranking
+
+        Para después de cambios masivos sobre ``intentos`` (queryset) que no
+        pasaron por save().
+        """
+        from cuentas.models import PerfilUsuario
+        
+        intentos = intentos.order_by()
+        Reto.actualizar_estadisticas_masivo(intentos.values('reto'))
+        
+        rango = intentos.aggregate(primero=models.Min('fecha_intento'), ultimo=models.Max('fecha_intento'))
+        if rango['primero'] is not None:
+            IntentoDiario.reconstruir(
+                timezone.localdate(rango['primero']),
+                timezone.localdate(rango['ultimo']),
+                retos=intentos.values('reto'),
+            )
+        
+        PerfilUsuario.actualizar_puntuaciones(intentos.values('usuario'))
+        Ranking.actualizar_ranking()
+    
     def save(self, *args, **kwargs):
         """Override save para calcular automáticamente la puntuación"""
         if self.es_correcto:
             self.puntuacion_obtenida = self.calcular_puntuacion()
+        # Una edición (admin) puede mover el intento a otro reto o usuario: el par anterior también cambia
+        anterior = None
+        if not self._state.adding and self.pk:
+            anterior = Intento.objects.filter(pk=self.pk).values('usuario_id', 'reto_id').first()
         super().save(*args, **kwargs)
         
+        # Intentos creados o editados fuera de registrar() (admin, scripts)
+        if not getattr(self, '_reservado', False):
+            ContadorIntentos.sincronizar(self.usuario_id, self.reto_id)
+        
         # Actualizar estadísticas del reto
         self.reto.actualizar_estadisticas()
         
+        # Actualizar el resumen diario usado por los reportes
+        dia = timezone.localdate(self.fecha_intento)
+        IntentoDiario.actualizar(self.reto_id, dia)
+        
         # Actualizar perfil del usuario
         if hasattr(self.usuario, 'perfil'):
             self.usuario.perfil.actualizar_puntuacion()
+        
+        if anterior and (anterior['usuario_id'], anterior['reto_id']) != (self.usuario_id, self.reto_id):
+            self._refrescar_anterior(anterior['usuario_id'], anterior['reto_id'], dia)
+    
+    def _refrescar_anterior(self, usuario_id, reto_id, dia):
+        """Contador, estadísticas, resumen y perfil del usuario/reto que tenía el intento antes de editarlo"""
+        from cuentas.models import PerfilUsuario
+        
+        ContadorIntentos.sincronizar(usuario_id, reto_id)
+        if reto_id != self.reto_id:
+            Reto.objects.get(pk=reto_id).actualizar_estadisticas()
+            IntentoDiario.actualizar(reto_id, dia)
+        if usuario_id != self.usuario_id:
+            perfil = PerfilUsuario.objects.filter(usuario_id=usuario_id).first()
+            if perfil is not None:
+                perfil.actualizar_puntuacion()
+    
+    @classmethod
+    def comprobar_disponibilidad(cls, usuario, reto):
+        """Retorna un ResultadoIntento si el usuario ya no puede intentar el reto, o None"""
+        if reto.usuario_resolvio_reto(usuario):
+            return ResultadoIntento(ResultadoIntento.YA_RESUELTO)
+        if reto.usuario_agoto_intentos(usuario):
+            return ResultadoIntento(ResultadoIntento.SIN_INTENTOS)
+        return None
+    
+    @staticmethod
+    def clave_cache_idempotencia(usuario_id, clave):
+        return f'juego:idempotencia:{usuario_id}:{clave}'
+    
+    @classmethod
+    def buscar_repetido(cls, usuario, reto, respuesta_usuario, clave):
+        """Veredicto guardado del intento con esta clave de idempotencia, o None
+
+        Primero la caché (``IDEMPOTENCIA_SEGUNDOS``) y después el intento
+        guardado. No escribe nada.
+        """
+        datos = cache.get(cls.clave_cache_idempotencia(usuario.pk, clave))
+        if datos is None:
+            intento = cls.objects.filter(usuario=usuario, clave_idempotencia=clave).first()
+            if intento is None:
+                return None
+            datos = cls.datos_idempotencia(intento, reto.get_intentos_restantes(usuario))
+        if datos['reto_id'] != reto.pk or datos['respuesta_usuario'] != respuesta_usuario:
+            return ResultadoIntento(ResultadoIntento.CLAVE_REUTILIZADA, repetido=True)
+        intentos_restantes = datos.pop('intentos_restantes')
+        return ResultadoIntento(
+            ResultadoIntento.CORRECTO if datos['es_correcto'] else ResultadoIntento.INCORRECTO,
+            intento=cls(usuario=usuario, reto=reto, clave_idempotencia=clave, **datos),
+            intentos_restantes=intentos_restantes,
+            repetido=True,
+        )
+    
+    @staticmethod
+    def datos_idempotencia(intento, intentos_restantes):
+        """Lo que se guarda en la caché para responder a un reintento"""
+        return {
+            'id': intento.pk,
+            'reto_id': intento.reto_id,
+            'respuesta_usuario': intento.respuesta_usuario,
+            'es_correcto': intento.es_correcto,
+            'puntuacion_obtenida': intento.puntuacion_obtenida,
+            'fecha_intento': intento.fecha_intento,
+            'intentos_restantes': intentos_restantes,
+        }
+    
+    @classmethod
+    def registrar(cls, usuario, reto, respuesta_usuario, clave_idempotencia=None):
+        """Valida y registra un intento del usuario, actualizando el ranking
+
+        Con ``clave_idempotencia``, un reintento del mismo envío (red
+        inestable, cliente móvil) devuelve el veredicto del primero sin
+        crear otro intento ni escribir nada.
+        """
+        respuesta_usuario = (respuesta_usuario or '').strip()
+        if clave_idempotencia:
+            repetido = cls.buscar_repetido(usuario, reto, respuesta_usuario, clave_idempotencia)
+            if repetido is not None:
+                return repetido
+        
+        bloqueo = cls.comprobar_disponibilidad(usuario, reto)
+        if bloqueo is not None:
+            return bloqueo
+        
+        if not respuesta_usuario:
+            return ResultadoIntento(
+                ResultadoIntento.RESPUESTA_VACIA,
+                intentos_restantes=reto.get_intentos_restantes(usuario),
+            )
+        
+        # Verificar si la respuesta es correcta (validación flexible)
+        es_correcto = reto.validar_respuesta(respuesta_usuario)
+        
+        try:
+            with transaction.atomic():
+                # La comprobación de arriba no basta con doble clic o varias pestañas:
+                # el límite lo impone el UPDATE condicional del contador
+                if not ContadorIntentos.reservar(usuario, reto, es_correcto):
+                    # Un reintento simultáneo espera al UPDATE del primero y llega aquí
+                    repetido = clave_idempotencia and cls.buscar_repetido(
+                        usuario, reto, respuesta_usuario, clave_idempotencia
+                    )
+                    return repetido or ResultadoIntento(
+                        ContadorIntentos.bloqueo(usuario, reto),
+                        intentos_restantes=0,
+                    )
+                intento = cls(
+                    usuario=usuario,
+                    reto=reto,
+                    respuesta_usuario=respuesta_usuario,
+                    es_correcto=es_correcto,
+                    clave_idempotencia=clave_idempotencia or None,
+                )
+                intento._reservado = True
+                intento.save()
+        except IntegrityError:
+            # Otro envío con la misma clave se guardó antes: se deshizo la reserva
+            repetido = clave_idempotencia and cls.buscar_repetido(
+                usuario, reto, respuesta_usuario, clave_idempotencia
+            )
+            if not repetido:
+                raise
+            return repetido
+        
+        # Actualizar ranking
+        Ranking.actualizar_ranking()
+        
+        resultado = ResultadoIntento(
+            ResultadoIntento.CORRECTO if es_correcto else ResultadoIntento.INCORRECTO,
+            intento=intento,
+            intentos_restantes=reto.get_intentos_restantes(usuario),
+        )
+        if clave_idempotencia:
+            datos = cls.datos_idempotencia(intento, resultado.intentos_restantes)
+            transaction.on_commit(lambda: cache.set(
+                cls.clave_cache_idempotencia(usuario.pk, clave_idempotencia), datos,
+                getattr(settings, 'IDEMPOTENCIA_SEGUNDOS', 24 * 60 * 60),
+            ))
+        return resultado
+
+class ContadorIntentos(models.Model):
+    """Intentos usados por un usuario en un reto y si ya lo resolvió
+
+    ``Intento.registrar`` consume un intento con un único UPDATE condicional
+    sobre esta fila (``intentos < max_intentos`` y sin resolver), así dos
+    envíos simultáneos del mismo usuario no pueden pasar ambos el límite ni
+    puntuar dos veces. Sólo bloquea la fila de ese usuario y reto.
+    Los intentos creados, editados o borrados por otras vías la recalculan
+    con ``sincronizar``; si falta (datos anteriores al contador) se crea en el
+    siguiente intento.
+    """
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='contadores_intentos')
+    reto = models.ForeignKey(Reto, on_delete=models.CASCADE, related_name='contadores_intentos')
+    intentos = models.PositiveIntegerField(default=0)
+    resuelto = models.BooleanField(default=False)
+    
+    class Meta:
+        verbose_name = "Contador de Intentos"
+        verbose_name_plural = "Contadores de Intentos"
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'reto'], name='contador_intentos_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.usuario_id} · {self.reto_id}: {self.intentos}{' ✓' if self.resuelto else ''}"
+    
+    @classmethod
+    def reservar(cls, usuario, reto, es_correcto):
+        """Consume un intento si queda alguno y el reto no está resuelto; retorna si se pudo
+
+        Debe llamarse dentro de la transacción que crea el intento. La fila
+        se crea en el primer intento a partir de los intentos ya guardados.
+        """
+        for _ in range(2):
+            consumido = cls.objects.filter(
+                usuario=usuario, reto=reto, resuelto=False, intentos__lt=reto.max_intentos,
+            ).update(intentos=F('intentos') + 1, resuelto=es_correcto)
+            if consumido:
+                return True
+            if cls.objects.filter(usuario=usuario, reto=reto).exists():
+                return False
+            cls.objects.get_or_create(usuario=usuario, reto=reto, defaults=cls.conteo(usuario.pk, reto.pk))
+        return False
+    
+    @classmethod
+    def bloqueo(cls, usuario, reto):
+        """Estado de ResultadoIntento cuando ``reservar`` no pudo consumir un intento"""
+        if cls.objects.filter(usuario=usuario, reto=reto, resuelto=True).exists():
+            return ResultadoIntento.YA_RESUELTO
+        return ResultadoIntento.SIN_INTENTOS
+    
+    @staticmethod
+    def conteo(usuario_id, reto_id):
+        """Valores del contador según los intentos guardados"""
+        datos = Intento.objects.filter(usuario_id=usuario_id, reto_id=reto_id).aggregate(
+            intentos=Count('pk'), correctos=Count('pk', filter=Q(es_correcto=True)),
+        )
+        return {'intentos': datos['intentos'], 'resuelto': datos['correctos'] > 0}
+    
+    @classmethod
+    def sincronizar(cls, usuario_id, reto_id):
+        """Recalcula el contador a partir de los intentos guardados"""
+        valores = cls.conteo(usuario_id, reto_id)
+        if not valores['intentos']:
+            # También si el reto o el usuario ya no existen
+            cls.objects.filter(usuario_id=usuario_id, reto_id=reto_id).delete()
+            return
+        cls.objects.update_or_create(usuario_id=usuario_id, reto_id=reto_id, defaults=valores)
+    
+    @classmethod
+    def sincronizar_masivo(cls, pares, batch_size=500):
+        """Versión por lotes de sincronizar para pares (usuario_id, reto_id)"""
+        pares = sorted(set(pares))
+        for i in range(0, len(pares), batch_size):
+            bloque = pares[i:i + batch_size]
+            usuarios = {usuario_id for usuario_id, _ in bloque}
+            retos = {reto_id for _, reto_id in bloque}
+            conteos = {
+                (fila['usuario'], fila['reto']): fila
+                for fila in Intento.objects.filter(usuario__in=usuarios, reto__in=retos)
+                .values('usuario', 'reto')
+                .annotate(intentos=Count('pk'), correctos=Count('pk', filter=Q(es_correcto=True)))
+                .order_by()
+            }
+            contadores = {
+                (contador.usuario_id, contador.reto_id): contador
+                for contador in cls.objects.filter(usuario__in=usuarios, reto__in=retos)
+            }
+            crear, modificar, borrar = [], [], []
+            for par in bloque:
+                fila, contador = conteos.get(par), contadores.get(par)
+                if fila is None:
+                    if contador is not None:
+                        borrar.append(contador.pk)
+                    continue
+                if contador is None:
+                    contador = cls(usuario_id=par[0], reto_id=par[1])
+                    crear.append(contador)
+                else:
+                    modificar.append(contador)
+                contador.intentos = fila['intentos']
+                contador.resuelto = fila['correctos'] > 0
+            cls.objects.filter(pk__in=borrar).delete()
+            cls.objects.bulk_create(crear)
+            cls.objects.bulk_update(modificar, ['intentos', 'resuelto'])
+
 
 class Ranking(models.Model):
     """Modelo para el ranking de usuarios"""
@@ -104,41 +504,329 @@ class Ranking(models.Model):
         verbose_name = "Ranking"
         verbose_name_plural = "Rankings"
         ordering = ['posicion']
+        indexes = [
+            # Última posición en cada alta (agregar_usuario) y páginas del ranking por posición
+            models.Index(fields=['posicion'], name='ranking_posicion_idx'),
+        ]
     
     def __str__(self):
         return f"#{self.posicion} {self.usuario.username} - {self.puntuacion_total} pts"
     
+    # Filas por página del listado (RankingView): cada página en vivo sólo muestra su tramo
+    FILAS_POR_PAGINA = 20
+    
     @classmethod
-    def actualizar_ranking(cls):
-        """Actualiza el ranking de todos los usuarios"""
+    def actualizar_ranking(cls, batch_size=500):
+        """Actualiza el ranking de todos los usuarios
+
+        Una sola consulta lee cada perfil con su puesto nuevo (``RowNumber``
+        sobre la puntuación; los empates conservan el orden anterior) y su
+        fila actual del ranking. Sólo se escriben las filas que cambian, con
+        ``bulk_update`` y ``bulk_create`` por lotes de ``batch_size``.
+
+        Si hay páginas conectadas en vivo publica el diff. ``cambios`` trae
+        las filas con puntos o retos nuevos y las que pasan a otra página del
+        listado (las que una página necesita para rellenarse).
+        ``desplazados`` resume en tramos ``[desde, hasta, delta]`` (posiciones
+        anteriores) las filas que sólo corrieron de puesto: un usuario que
+        sube mil puestos no envía mil filas.
+        """
         from cuentas.models import PerfilUsuario
         
-        # Obtener usuarios ordenados por puntuación
-        perfiles = PerfilUsuario.objects.all().order_by('-puntuacion_total')
-        
-        # Actualizar o crear entradas de ranking
-        for posicion, perfil in enumerate(perfiles, 1):
-            ranking, created = cls.objects.get_or_create(
-                usuario=perfil.usuario,
-                defaults={
-                    'posicion': posicion,
-                    'puntuacion_total': perfil.puntuacion_total,
-                    'retos_completados': perfil.retos_completados,
+        orden = [
+            F('puntuacion_total').desc(),
+            F('usuario__ranking__posicion').asc(nulls_last=True),
+            F('usuario_id').asc(),
+        ]
+        # Con el usuario: su nombre va en el diff
+        perfiles = PerfilUsuario.objects.select_related('usuario').annotate(
+            posicion_nueva=Window(RowNumber(), order_by=orden),
+            ranking_pk=F('usuario__ranking__pk'),
+            posicion_anterior=F('usuario__ranking__posicion'),
+            puntos_anteriores=F('usuario__ranking__puntuacion_total'),
+            retos_anteriores=F('usuario__ranking__retos_completados'),
+        ).order_by('posicion_nueva')
+        en_vivo = difusor.tiene_suscriptores(CANAL_RANKING)
+        campos = ['posicion', 'puntuacion_total', 'retos_completados', 'fecha_actualizacion']
+        ahora = timezone.now()
+        
+        cambios = []
+        desplazados = []
+        podio = []
+        podio_cambia = False
+        total_usuarios = total_puntos = 0
+        nuevos = []
+        modificados = []
+        
+        with transaction.atomic():
+            for perfil in perfiles.iterator(chunk_size=2000):
+                posicion = perfil.posicion_nueva
+                ranking = cls(
+                    pk=perfil.ranking_pk,
+                    usuario=perfil.usuario,
+                    posicion=posicion,
+                    puntuacion_total=perfil.puntuacion_total,
+                    retos_completados=perfil.retos_completados,
+                    fecha_actualizacion=ahora,
+                )
+                actual = (posicion, perfil.puntuacion_total, perfil.retos_completados)
+                if perfil.ranking_pk is None:
+                    anterior = None
+                    nuevos.append(ranking)
+                else:
+                    anterior = (perfil.posicion_anterior, perfil.puntos_anteriores, perfil.retos_anteriores)
+                    if anterior != actual:
+                        modificados.append(ranking)
+                total_usuarios += 1
+                total_puntos += perfil.puntuacion_total
+                if not en_vivo:
+                    continue
+                
+                if anterior != actual:
+                    fila = ranking.datos_vivo()
+                    fila['anterior'] = anterior[0] if anterior else None
+                    if anterior and anterior[1:] == actual[1:]:
+                        # Sólo cambió de puesto: se une al tramo anterior si es contiguo y con el mismo delta
+                        delta = posicion - anterior[0]
+                        if desplazados and desplazados[-1][2] == delta and desplazados[-1][1] == anterior[0] - 1:
+                            desplazados[-1][1] = anterior[0]
+                        else:
+                            desplazados.append([anterior[0], anterior[0], delta])
+                        if (anterior[0] - 1) // cls.FILAS_POR_PAGINA != (posicion - 1) // cls.FILAS_POR_PAGINA:
+                            cambios.append(fila)
+                    else:
+                        cambios.append(fila)
+                    podio_cambia = podio_cambia or min(posicion, fila['anterior'] or posicion) <= 3
+                if posicion <= 3:
+                    podio.append(ranking.datos_vivo())
+            
+            # Después de leer: escribir mientras el cursor sigue abierto cambiaría lo que se lee
+            cls.objects.bulk_update(modificados, campos, batch_size=batch_size)
+            cls.objects.bulk_create(nuevos, batch_size=batch_size)
+            
+            # Nueva generación del ranking (validador HTTP de RankingView)
+            ContadorGeneracion.incrementar(ContadorGeneracion.RANKING)
+            
+            if cambios or desplazados:
+                datos = {
+                    'cambios': cambios, 'desplazados': desplazados,
+                    'total_usuarios': total_usuarios, 'total_puntos': total_puntos,
                 }
-            )
-            if not created:
-                ranking.posicion = posicion
-                ranking.puntuacion_total = perfil.puntuacion_total
-                ranking.retos_completados = perfil.retos_completados
-                ranking.save()
+                if podio_cambia:
+                    datos['podio'] = podio
+                difusor.publicar_al_confirmar(CANAL_RANKING, 'ranking', datos)
+    
+    @classmethod
+    def agregar_usuario(cls, usuario):
+        """Añade al final del ranking a un usuario recién creado, con un único INSERT
+
+        Con 0 puntos (los puntos nunca son negativos) su puesto es el último,
+        empatado con los demás usuarios sin puntos, y ninguna otra fila cambia.
+        La posición (la última + 1) se calcula dentro del mismo INSERT. Dos
+        altas simultáneas en PostgreSQL pueden compartir puesto hasta el
+        siguiente ``actualizar_ranking``.
+        """
+        ultima = cls.objects.order_by('-posicion').values('posicion')[:1]
+        ranking = cls.objects.create(usuario=usuario, posicion=Coalesce(Subquery(ultima), 0) + 1)
+        ranking.refresh_from_db(fields=['posicion'])
+        
+        ContadorGeneracion.incrementar(ContadorGeneracion.RANKING)
+        if difusor.tiene_suscriptores(CANAL_RANKING):
+            fila = ranking.datos_vivo()
+            fila['anterior'] = None
+            difusor.publicar_al_confirmar(CANAL_RANKING, 'ranking', {
+                'cambios': [fila], 'total_usuarios': ranking.posicion,
+            })
+        return ranking
+    
+    @classmethod
+    def quitar_usuario(cls, usuario):
+        """Quita a un usuario del ranking y sube un puesto a los que estaban por debajo
+
+        Son dos sentencias, sin recorrer el ranking. Si hay páginas conectadas
+        en vivo publica la baja, el tramo que corre un puesto y las filas que
+        pasan a la página anterior. Retorna True si el usuario tenía fila.
+        """
+        posicion = cls.objects.filter(usuario=usuario).values_list('posicion', flat=True).first()
+        if posicion is None:
+            return False
+        cls.objects.filter(usuario=usuario).delete()
+        movidos = cls.objects.filter(posicion__gt=posicion).update(posicion=F('posicion') - 1)
+        
+        ContadorGeneracion.incrementar(ContadorGeneracion.RANKING)
+        if difusor.tiene_suscriptores(CANAL_RANKING):
+            # La primera fila de cada página siguiente sube a la última de la anterior
+            primera_frontera = -(-posicion // cls.FILAS_POR_PAGINA) * cls.FILAS_POR_PAGINA
+            fronteras = range(primera_frontera, posicion + movidos, cls.FILAS_POR_PAGINA)
+            cambios = []
+            for ranking in cls.objects.select_related('usuario').filter(posicion__in=fronteras):
+                fila = ranking.datos_vivo()
+                fila['anterior'] = ranking.posicion + 1
+                cambios.append(fila)
+            datos = {
+                'cambios': cambios,
+                'desplazados': [[posicion + 1, posicion + movidos, -1]] if movidos else [],
+                'bajas': [usuario.username],
+                'total_usuarios': cls.objects.count(),
+                'total_puntos': cls.objects.aggregate(total=Sum('puntuacion_total'))['total'] or 0,
+            }
+            if posicion <= 3:
+                datos['podio'] = [ranking.datos_vivo() for ranking in cls.objects.select_related('usuario')[:3]]
+            difusor.publicar_al_confirmar(CANAL_RANKING, 'ranking', datos)
+        return True
+    
+    def datos_vivo(self):
+        """Fila del ranking tal como la reciben las páginas en vivo"""
+        return {
+            'usuario': self.usuario.username,
+            'posicion': self.posicion,
+            'puntuacion_total': self.puntuacion_total,
+            'retos_completados': self.retos_completados,
+        }
+
+
+class IntentoDiario(models.Model):
+    """Resumen de intentos por día (zona horaria TIME_ZONE) y reto.
+
+    Se mantiene al guardar o borrar cada intento y se puede reconstruir con
+    ``python manage.py recalcular_intentos_diarios``. Los reportes del admin
+    leen sólo esta tabla, nunca la tabla completa de intentos.
+    """
+    dia = models.DateField()
+    reto = models.ForeignKey(Reto, on_delete=models.CASCADE, related_name='resumenes_diarios')
+    intentos = models.PositiveIntegerField(default=0)
+    correctos = models.PositiveIntegerField(default=0)
+    puntos = models.IntegerField(default=0)
+    usuarios_distintos = models.PositiveIntegerField(default=0, help_text="Usuarios distintos ese día en este reto (exacto)")
+    
+    class Meta:
+        verbose_name = "Resumen Diario de Intentos"
+        verbose_name_plural = "Resúmenes Diarios de Intentos"
+        ordering = ['-dia']
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'reto'], name='intentodiario_dia_reto_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.dia} - {self.reto_id}: {self.intentos} intentos"
+    
+    @staticmethod
+    def rango_dia(dia):
+        """Inicio y fin (exclusivo) del día en la zona horaria configurada"""
+        tz = timezone.get_current_timezone()
+        inicio = timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min), tz)
+        fin = timezone.make_aware(datetime.datetime.combine(dia + datetime.timedelta(days=1), datetime.time.min), tz)
+        return inicio, fin
+    
+    @staticmethod
+    def _agregados():
+        return {
+            'total_intentos': Count('id'),
+            'total_correctos': Count('id', filter=Q(es_correcto=True)),
+            'total_puntos': Sum('puntuacion_obtenida'),
+            'total_usuarios': Count('usuario', distinct=True),
+        }
+    
+    @classmethod
+    def actualizar(cls, reto_id, dia):
+        """Recalcula la fila (dia, reto) a partir de los intentos de ese día"""
+        inicio, fin = cls.rango_dia(dia)
+        datos = Intento.objects.filter(
+            reto_id=reto_id, fecha_intento__gte=inicio, fecha_intento__lt=fin
+        ).aggregate(**cls._agregados())
+        if not datos['total_intentos']:
+            cls.objects.filter(dia=dia, reto_id=reto_id).delete()
+            return
+        cls.objects.update_or_create(
+            dia=dia,
+            reto_id=reto_id,
+            defaults={
+                'intentos': datos['total_intentos'],
+                'correctos': datos['total_correctos'],
+                'puntos': datos['total_puntos'] or 0,
+                'usuarios_distintos': datos['total_usuarios'],
+            },
+        )
+    
+    @classmethod
+    def reconstruir(cls, desde=None, hasta=None, batch_size=1000, retos=None):
+        """Reconstruye el resumen (todo o un rango de días) con una consulta agrupada
+
+        ``retos`` (queryset o lista de ids) limita la reconstrucción a esos retos.
+        """
+        intentos = Intento.objects.all()
+        resumenes = cls.objects.all()
+        if retos is not None:
+            intentos = intentos.filter(reto__in=retos)
+            resumenes = resumenes.filter(reto__in=retos)
+        if desde:
+            intentos = intentos.filter(fecha_intento__gte=cls.rango_dia(desde)[0])
+            resumenes = resumenes.filter(dia__gte=desde)
+        if hasta:
+            intentos = intentos.filter(fecha_intento__lt=cls.rango_dia(hasta)[1])
+            resumenes = resumenes.filter(dia__lte=hasta)
+        
+        filas = (
+            intentos.annotate(dia=TruncDate('fecha_intento', tzinfo=timezone.get_current_timezone()))
+            .values('dia', 'reto_id')
+            .annotate(**cls._agregados())
+            .order_by()
+        )
+        
+        creados = 0
+        lote = []
+        with transaction.atomic():
+            resumenes.delete()
+            for fila in filas.iterator():
+                lote.append(cls(
+                    dia=fila['dia'],
+                    reto_id=fila['reto_id'],
+                    intentos=fila['total_intentos'],
+                    correctos=fila['total_correctos'],
+                    puntos=fila['total_puntos'] or 0,
+                    usuarios_distintos=fila['total_usuarios'],
+                ))
+                if len(lote) >= batch_size:
+                    cls.objects.bulk_create(lote)
+                    creados += len(lote)
+                    lote = []
+            if lote:
+                cls.objects.bulk_create(lote)
+                creados += len(lote)
+        return creados
 
 
 # Si se borra un intento individual, actualizar el perfil del usuario y el ranking
 @receiver(post_delete, sender=Intento)
 def intento_post_delete_update_profile(sender, instance: Intento, **kwargs):
+    lote = lote_activo()
+    if lote is not None:
+        lote.usuarios.add(instance.usuario_id)
+        return
     try:
         if hasattr(instance.usuario, 'perfil'):
             instance.usuario.perfil.actualizar_puntuacion()
         Ranking.actualizar_ranking()
     except Exception:
         pass
+
+
+@receiver(post_delete, sender=Intento)
+def intento_post_delete_update_contador(sender, instance: Intento, **kwargs):
+    """Devolver el intento borrado al contador del usuario"""
+    lote = lote_activo()
+    if lote is not None:
+        lote.contadores.add((instance.usuario_id, instance.reto_id))
+        return
+    ContadorIntentos.sincronizar(instance.usuario_id, instance.reto_id)
+
+
+@receiver(post_delete, sender=Intento)
+def intento_post_delete_update_resumen(sender, instance: Intento, **kwargs):
+    """Mantener el resumen diario al borrar intentos"""
+    dia = timezone.localdate(instance.fecha_intento)
+    lote = lote_activo()
+    if lote is not None:
+        lote.dias.add((instance.reto_id, dia))
+        return
+    IntentoDiario.actualizar(instance.reto_id, dia)
@@ -0,0 +1,71 @@
+"""
+RECÁLCULO DIFERIDO DE PERFILES, RANKING Y RESUMEN DIARIO
+========================================================
+
+Borrar un reto (o muchos) borra en cascada todos sus intentos, y cada
+borrado dispara señales que recalculan el perfil del usuario, el resumen
+diario y el ranking completo. Dentro de ``recalculo_diferido()`` esas
+señales sólo anotan qué usuarios y qué días quedaron afectados; al confirmarse
+la transacción se recalcula cada cosa una única vez.
+
+Uso (admin ``delete_queryset``, comandos de gestión, scripts)::
+
+    with recalculo_diferido():
+        Reto.objects.filter(...).delete()
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+_estado = threading.local()
+
+TAMANO_BLOQUE = 1000
+
+
+class LoteRecalculo:
+    """Usuarios, días (reto, día) y contadores (usuario, reto) afectados mientras dura el bloque"""
+
+    def __init__(self):
+        self.usuarios = set()
+        self.dias = set()
+        self.contadores = set()
+
+    def ejecutar(self):
+        from cuentas.models import PerfilUsuario
+        from .models import ContadorIntentos, IntentoDiario, Ranking
+
+        for reto_id, dia in self.dias:
+            IntentoDiario.actualizar(reto_id, dia)
+        ContadorIntentos.sincronizar_masivo(self.contadores)
+        usuarios = sorted(self.usuarios)
+        for i in range(0, len(usuarios), TAMANO_BLOQUE):
+            PerfilUsuario.actualizar_puntuaciones(usuarios[i:i + TAMANO_BLOQUE])
+        Ranking.actualizar_ranking()
+
+
+def lote_activo():
+    """Lote en curso en este hilo, o None si no hay recálculo diferido"""
+    return getattr(_estado, 'lote', None)
+
+
+@contextmanager
+def recalculo_diferido(using=None):
+    """Ejecuta el bloque en una transacción y recalcula una sola vez al confirmar
+
+    Los bloques anidados se suman al lote exterior.
+    """
+    lote = lote_activo()
+    if lote is not None:
+        yield lote
+        return
+
+    lote = LoteRecalculo()
+    _estado.lote = lote
+    try:
+        with transaction.atomic(using=using):
+            yield lote
+            transaction.on_commit(lote.ejecutar, using=using)
+    finally:
+        _estado.lote = None
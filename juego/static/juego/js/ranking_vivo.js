@@ -0,0 +1,165 @@
+/**
+ * Ranking en vivo
+ * Recibe server-sent events del canal "ranking" (ver retos/difusion.py) y
+ * aplica los cambios de posición, el nuevo podio y los totales sin recargar.
+ */
+
+const ICONOS_PODIO = {
+    1: '<i class="fas fa-crown text-warning"></i>',
+    2: '<i class="fas fa-medal text-secondary"></i>',
+    3: '<i class="fas fa-award text-warning"></i>',
+};
+
+const ICONOS_PODIO_GRANDES = {
+    1: '<i class="fas fa-crown fa-2x text-warning mb-2"></i>',
+    2: '<i class="fas fa-medal fa-2x text-secondary mb-2"></i>',
+    3: '<i class="fas fa-award fa-2x text-warning mb-2"></i>',
+};
+
+const BORDES_PODIO = {1: 'border-warning', 2: 'border-secondary', 3: 'border-warning'};
+
+function fechaActual() {
+    const ahora = new Date();
+    const dos = n => String(n).padStart(2, '0');
+    return dos(ahora.getDate()) + '/' + dos(ahora.getMonth() + 1) + '/' + ahora.getFullYear() +
+        ' ' + dos(ahora.getHours()) + ':' + dos(ahora.getMinutes());
+}
+
+function crearFila(fila) {
+    const tr = document.createElement('tr');
+    tr.dataset.usuario = fila.usuario;
+    tr.innerHTML =
+        '<td data-campo="posicion"></td>' +
+        '<td><strong></strong></td>' +
+        '<td><span class="badge bg-primary" data-campo="puntuacion_total"></span></td>' +
+        '<td data-campo="retos_completados"></td>' +
+        '<td data-campo="fecha_actualizacion"></td>';
+    tr.querySelector('strong').textContent = fila.usuario;
+    return tr;
+}
+
+function moverFila(tr, posicion) {
+    tr.dataset.posicion = posicion;
+    tr.querySelector('[data-campo="posicion"]').innerHTML =
+        (ICONOS_PODIO[posicion] || '') + ' <strong>#' + posicion + '</strong>';
+}
+
+function actualizarFila(tr, fila) {
+    moverFila(tr, fila.posicion);
+    tr.querySelector('[data-campo="puntuacion_total"]').textContent = fila.puntuacion_total;
+    tr.querySelector('[data-campo="retos_completados"]').textContent = fila.retos_completados;
+    tr.querySelector('[data-campo="fecha_actualizacion"]').textContent = fechaActual();
+}
+
+function aplicarDesplazados(tbody, desplazados) {
+    // Tramos [desde, hasta, delta] de posiciones anteriores que sólo corrieron de puesto
+    tbody.querySelectorAll('tr[data-usuario]').forEach(function(tr) {
+        const posicion = parseInt(tr.dataset.posicion, 10);
+        const tramo = desplazados.find(t => posicion >= t[0] && posicion <= t[1]);
+        if (tramo) {
+            moverFila(tr, posicion + tramo[2]);
+        }
+    });
+}
+
+function aplicarCambios(tbody, cambios, desplazados, bajas) {
+    // Sólo se muestran las posiciones de la página actual
+    const desde = Math.max(parseInt(tbody.dataset.desde, 10), 1);
+    const hasta = desde + parseInt(tbody.dataset.porPagina, 10) - 1;
+
+    // Cuentas purgadas: su fila desaparece antes de correr las demás
+    (bajas || []).forEach(function(usuario) {
+        const tr = tbody.querySelector('tr[data-usuario="' + CSS.escape(usuario) + '"]');
+        if (tr) {
+            tr.remove();
+        }
+    });
+
+    // Un alta nueva no trae desplazados
+    aplicarDesplazados(tbody, desplazados || []);
+
+    cambios.forEach(function(fila) {
+        let tr = tbody.querySelector('tr[data-usuario="' + CSS.escape(fila.usuario) + '"]');
+        if (fila.posicion < desde || fila.posicion > hasta) {
+            if (tr) {
+                tr.remove();
+            }
+            return;
+        }
+        if (!tr) {
+            tr = crearFila(fila);
+            tbody.appendChild(tr);
+        }
+        actualizarFila(tr, fila);
+    });
+
+    // Filas desplazadas fuera de la página; las que entran llegan en cambios
+    tbody.querySelectorAll('tr[data-usuario]').forEach(function(tr) {
+        const posicion = parseInt(tr.dataset.posicion, 10);
+        if (posicion < desde || posicion > hasta) {
+            tr.remove();
+        }
+    });
+
+    const vacio = document.getElementById('ranking-vacio');
+    if (vacio && tbody.querySelector('tr[data-usuario]')) {
+        vacio.remove();
+    }
+
+    Array.from(tbody.querySelectorAll('tr[data-usuario]'))
+        .sort((a, b) => a.dataset.posicion - b.dataset.posicion)
+        .forEach(tr => tbody.appendChild(tr));
+}
+
+function actualizarPodio(podio) {
+    const contenedor = document.getElementById('podio');
+    if (!contenedor) {
+        // La página se renderizó sin podio: más simple recargarla
+        window.location.reload();
+        return;
+    }
+    contenedor.innerHTML = '';
+    podio.forEach(function(fila) {
+        const columna = document.createElement('div');
+        columna.className = 'col-md-4';
+        columna.innerHTML =
+            '<div class="card text-center ' + BORDES_PODIO[fila.posicion] + '">' +
+            '<div class="card-body">' + ICONOS_PODIO_GRANDES[fila.posicion] +
+            '<h5>#' + fila.posicion + '</h5><h6></h6>' +
+            '<p class="text-primary"><strong>' + fila.puntuacion_total + ' pts</strong></p>' +
+            '<small class="text-muted">' + fila.retos_completados + ' retos</small>' +
+            '</div></div>';
+        columna.querySelector('h6').textContent = fila.usuario;
+        contenedor.appendChild(columna);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const tbody = document.getElementById('filas-ranking');
+    if (!tbody || !tbody.dataset.eventos || !window.EventSource) {
+        return;
+    }
+
+    const fuente = new EventSource(tbody.dataset.eventos);
+
+    fuente.addEventListener('ranking', function(evento) {
+        const datos = JSON.parse(evento.data);
+        aplicarCambios(tbody, datos.cambios, datos.desplazados, datos.bajas);
+        if (datos.podio) {
+            actualizarPodio(datos.podio);
+        }
+        ['total_usuarios', 'total_puntos'].forEach(function(campo) {
+            const elemento = document.querySelector('[data-campo="' + campo + '"]');
+            // Un alta nueva sólo trae total_usuarios
+            if (elemento && campo in datos) {
+                elemento.textContent = datos[campo];
+            }
+        });
+    });
+
+    // El servidor ya no tiene los cambios que nos faltan
+    fuente.addEventListener('recargar', function() {
+        fuente.close();
+        window.location.reload();
+    });
+});
@@ -1,3 +1,525 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from cuentas.models import PerfilUsuario
+from proyect.admin_config import admin_site
+from retos.difusion import difusor
+from retos.models import Categoria, Reto
+from .exportacion import EXPORTACIONES
+from .models import ContadorIntentos, Intento, IntentoDiario, Ranking, ResultadoIntento
+from .recalculo import LoteRecalculo, lote_activo, recalculo_diferido
+
+HILOS = 8
+
+
+class EnviosSimultaneosMixin:
+    def setUp(self):
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user('concurrente', password='clave')
+        self.reto = Reto.objects.create(
+            titulo='Concurrente', descripcion='-', enunciado='-',
+            respuesta_correcta='42', puntos=10, max_intentos=3,
+        )
+
+    def enviar_a_la_vez(self, respuestas, clave=None, usuarios=None):
+        """Registra cada respuesta en su propio hilo, todos arrancando juntos
+
+        ``usuarios`` (uno por respuesta) reparte los envíos; por defecto son
+        todos de ``self.usuario``. Retorna los estados en orden de llegada, o
+        pares (usuario, estado) si se pasan usuarios.
+        """
+        barrera = threading.Barrier(len(respuestas))
+        resultados, errores = [], []
+
+        def enviar(usuario, respuesta):
+            try:
+                barrera.wait()
+                estado = Intento.registrar(usuario or self.usuario, self.reto, respuesta, clave).estado
+                resultados.append((usuario, estado) if usuarios else estado)
+            except Exception as error:  # noqa: BLE001 - se reporta en el hilo principal
+                errores.append(error)
+            finally:
+                connections.close_all()
+
+        hilos = [
+            threading.Thread(target=enviar, args=(usuario, respuesta))
+            for usuario, respuesta in zip(usuarios or [None] * len(respuestas), respuestas)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        return resultados
+
+
+class LimiteIntentosConcurrenteTests(EnviosSimultaneosMixin, TransactionTestCase):
+    """Envíos simultáneos no pasan el límite de intentos ni puntúan dos veces"""
+
+    def test_no_supera_max_intentos(self):
+        resultados = self.enviar_a_la_vez(['mal'] * HILOS)
+
+        self.assertEqual(Intento.objects.filter(usuario=self.usuario, reto=self.reto).count(), 3)
+        self.assertEqual(resultados.count(ResultadoIntento.INCORRECTO), 3)
+        self.assertEqual(resultados.count(ResultadoIntento.SIN_INTENTOS), HILOS - 3)
+        self.assertEqual(ContadorIntentos.objects.get(usuario=self.usuario, reto=self.reto).intentos, 3)
+
+    def test_un_solo_acierto_puntua(self):
+        self.reto.max_intentos = HILOS
+        self.reto.save()
+
+        resultados = self.enviar_a_la_vez(['42'] * HILOS)
+
+        self.assertEqual(resultados.count(ResultadoIntento.CORRECTO), 1)
+        self.assertEqual(resultados.count(ResultadoIntento.YA_RESUELTO), HILOS - 1)
+        self.assertEqual(Intento.objects.filter(usuario=self.usuario, es_correcto=True).count(), 1)
+        self.usuario.perfil.refresh_from_db()
+        self.assertEqual(self.usuario.perfil.puntuacion_total, self.reto.puntos)
+
+    def test_contador_se_crea_desde_intentos_previos(self):
+        # Intentos anteriores a ContadorIntentos: la fila no existe todavía
+        Intento.objects.create(usuario=self.usuario, reto=self.reto, respuesta_usuario='mal')
+        Intento.objects.create(usuario=self.usuario, reto=self.reto, respuesta_usuario='mal')
+        ContadorIntentos.objects.all().delete()
+
+        resultados = self.enviar_a_la_vez(['mal'] * HILOS)
+
+        self.assertEqual(resultados.count(ResultadoIntento.INCORRECTO), 1)
+        self.assertEqual(Intento.objects.filter(usuario=self.usuario, reto=self.reto).count(), 3)
+
+    def test_varios_usuarios_mismo_reto(self):
+        # Cada usuario agota sus intentos sin que el contador de uno afecte a otro
+        usuarios = [self.usuario] + [
+            get_user_model().objects.create_user(f'concurrente{i}') for i in range(1, 4)
+        ]
+        envios = usuarios * 4  # un envío más que max_intentos por usuario
+
+        resultados = self.enviar_a_la_vez(['mal'] * len(envios), usuarios=envios)
+
+        for usuario in usuarios:
+            with self.subTest(usuario=usuario.username):
+                estados = [estado for autor, estado in resultados if autor == usuario]
+                self.assertEqual(estados.count(ResultadoIntento.INCORRECTO), 3)
+                self.assertEqual(estados.count(ResultadoIntento.SIN_INTENTOS), 1)
+                self.assertEqual(ContadorIntentos.objects.get(usuario=usuario, reto=self.reto).intentos, 3)
+                self.assertEqual(Intento.objects.filter(usuario=usuario, reto=self.reto).count(), 3)
+
+        # Un usuario que no ha enviado nada no queda bloqueado por los demás
+        nuevo = get_user_model().objects.create_user('ajeno')
+        self.assertEqual(Intento.registrar(nuevo, self.reto, '42').estado, ResultadoIntento.CORRECTO)
+        self.reto.refresh_from_db()
+        self.assertEqual(self.reto.intentos_totales, len(usuarios) * 3 + 1)
+
+
+class IdempotenciaIntentosTests(EnviosSimultaneosMixin, TransactionTestCase):
+    """Un reintento con la misma clave devuelve el primer veredicto sin escribir"""
+
+    def test_reintento_no_crea_otro_intento(self):
+        primero = Intento.registrar(self.usuario, self.reto, 'mal', 'clave-1')
+        with CaptureQueriesContext(connection) as consultas:
+            repetido = Intento.registrar(self.usuario, self.reto, ' mal ', 'clave-1')
+
+        self.assertEqual(len(consultas), 0)
+        self.assertTrue(repetido.repetido)
+        self.assertEqual((repetido.estado, repetido.intentos_restantes), (primero.estado, 2))
+        self.assertEqual(repetido.intento.pk, primero.intento.pk)
+        self.reto.refresh_from_db()
+        self.assertEqual(self.reto.intentos_totales, 1)
+
+        # Sin la caché se reconstruye del intento guardado, también sin escribir
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            repetido = Intento.registrar(self.usuario, self.reto, 'mal', 'clave-1')
+        self.assertTrue(repetido.repetido)
+        self.assertFalse(any(
+            consulta['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) for consulta in consultas.captured_queries
+        ))
+        self.assertEqual(Intento.objects.count(), 1)
+
+    def test_clave_reutilizada_con_otra_respuesta(self):
+        Intento.registrar(self.usuario, self.reto, 'mal', 'clave-1')
+        resultado = Intento.registrar(self.usuario, self.reto, 'otra', 'clave-1')
+        self.assertEqual(resultado.estado, ResultadoIntento.CLAVE_REUTILIZADA)
+        self.assertEqual(Intento.objects.count(), 1)
+
+    def test_reintentos_simultaneos(self):
+        self.reto.max_intentos = HILOS
+        self.reto.save()
+
+        # Con intentos de sobra el duplicado choca con la restricción única y se deshace
+        resultados = self.enviar_a_la_vez(['mal'] * HILOS, clave='clave-1')
+        self.assertEqual(resultados, [ResultadoIntento.INCORRECTO] * HILOS)
+        # Al resolverlo, el duplicado ya no consigue reservar y encuentra el primero
+        resultados = self.enviar_a_la_vez(['42'] * HILOS, clave='clave-2')
+        self.assertEqual(resultados, [ResultadoIntento.CORRECTO] * HILOS)
+
+        self.assertEqual(Intento.objects.count(), 2)
+        self.assertEqual(ContadorIntentos.objects.get().intentos, 2)
+        self.reto.refresh_from_db()
+        self.assertEqual(self.reto.intentos_totales, 2)
+
+    def test_api_con_idempotency_key(self):
+        self.client.force_login(self.usuario)
+        url = reverse('api:intentar_reto', args=[self.reto.pk])
+        respuestas = [
+            self.client.post(url, {'respuesta': '42'}, headers={'Idempotency-Key': 'movil-1'}) for _ in range(2)
+        ]
+        self.assertEqual([response.status_code for response in respuestas], [201, 201])
+        self.assertEqual(respuestas[0].json(), respuestas[1].json())
+        self.assertNotIn('Idempotent-Replayed', respuestas[0])
+        self.assertEqual(respuestas[1]['Idempotent-Replayed'], 'true')
+        self.assertEqual(Intento.objects.count(), 1)
+
+        response = self.client.post(url, {'respuesta': '43'}, headers={'Idempotency-Key': 'movil-1'})
+        self.assertEqual(response.status_code, 422)
+
+
+class ExportacionTests(TestCase):
+    """CSV y JSONL de intentos, sin fórmulas ejecutables en el CSV"""
+
+    def setUp(self):
+        usuario = get_user_model().objects.create_user('@malicioso')
+        reto = Reto.objects.create(titulo='Exportado', descripcion='-', enunciado='-', respuesta_correcta='42')
+        Intento.objects.create(usuario=usuario, reto=reto, respuesta_usuario='=HYPERLINK("http://x","y")')
+        Intento.objects.create(usuario=usuario, reto=reto, respuesta_usuario='-3 + 2')
+        self.exportacion = EXPORTACIONES['intentos']
+
+    def leer(self, formato, gzip_=False):
+        datos = b''.join(self.exportacion.generar(formato, gzip=gzip_))
+        return (gzip.decompress(datos) if gzip_ else datos).decode('utf-8')
+
+    def test_csv_neutraliza_formulas(self):
+        texto = self.leer('csv')
+        self.assertTrue(texto.startswith('\ufeff'))
+        filas = list(csv.DictReader(io.StringIO(texto.lstrip('\ufeff'))))
+        self.assertEqual(len(filas), 2)
+        self.assertEqual(filas[0]['respuesta_usuario'], '\'=HYPERLINK("http://x","y")')
+        self.assertEqual(filas[1]['respuesta_usuario'], "'-3 + 2")
+        self.assertEqual(filas[0]['username'], "'@malicioso")
+        self.assertEqual(filas[0]['es_correcto'], 'False')
+
+    def test_jsonl_sin_modificar_y_gzip(self):
+        filas = [json.loads(linea) for linea in self.leer('jsonl', gzip_=True).splitlines()]
+        self.assertEqual([fila['respuesta_usuario'] for fila in filas], ['=HYPERLINK("http://x","y")', '-3 + 2'])
+
+
+class RankingVivoTests(TestCase):
+    """actualizar_ranking publica un diff acotado y sólo con páginas conectadas"""
+
+    def setUp(self):
+        # 30 usuarios con puntos distintos: posiciones 1..30 ya al día
+        self.usuarios = [get_user_model().objects.create_user(f'jugador{i}') for i in range(1, 31)]
+        for i, usuario in enumerate(self.usuarios):
+            PerfilUsuario.objects.filter(usuario=usuario).update(puntuacion_total=300 - 10 * i)
+        Ranking.actualizar_ranking()
+
+    def actualizar(self, en_vivo):
+        with mock.patch.object(difusor, 'tiene_suscriptores', return_value=en_vivo), \
+                mock.patch.object(difusor, 'publicar_al_confirmar') as publicar, \
+                CaptureQueriesContext(connection) as consultas:
+            Ranking.actualizar_ranking()
+        usuarios = sum('FROM "cuentas_user"' in consulta['sql'] for consulta in consultas.captured_queries)
+        return publicar, usuarios
+
+    def test_diff_acotado(self):
+        # El último pasa al primer puesto: los otros 29 corren un puesto
+        PerfilUsuario.objects.filter(usuario=self.usuarios[-1]).update(puntuacion_total=1000)
+        publicar, consultas_usuarios = self.actualizar(en_vivo=True)
+
+        self.assertEqual(consultas_usuarios, 0)
+        datos = publicar.call_args.args[2]
+        self.assertEqual(datos['desplazados'], [[1, 29, 1]])
+        # El que subió y el que pasa de la página 1 a la 2
+        self.assertEqual(
+            [(fila['usuario'], fila['anterior'], fila['posicion']) for fila in datos['cambios']],
+            [('jugador30', 30, 1), ('jugador20', 20, 21)],
+        )
+        self.assertEqual([fila['usuario'] for fila in datos['podio']], ['jugador30', 'jugador1', 'jugador2'])
+        self.assertEqual(Ranking.objects.get(usuario=self.usuarios[0]).posicion, 2)
+
+    def test_sin_suscriptores_no_arma_el_diff(self):
+        PerfilUsuario.objects.filter(usuario=self.usuarios[-1]).update(puntuacion_total=1000)
+        publicar, consultas_usuarios = self.actualizar(en_vivo=False)
+
+        self.assertEqual(consultas_usuarios, 0)
+        publicar.assert_not_called()
+        self.assertEqual(Ranking.objects.get(usuario=self.usuarios[-1]).posicion, 1)
+
+    def test_reconstruccion_en_bloque(self):
+        def escrituras(consultas):
+            return [
+                consulta['sql'].split()[0] for consulta in consultas.captured_queries
+                if '"juego_ranking"' in consulta['sql'] and not consulta['sql'].startswith('SELECT')
+            ]
+
+        # Sin cambios: una lectura y ninguna escritura en el ranking
+        with CaptureQueriesContext(connection) as consultas:
+            Ranking.actualizar_ranking()
+        self.assertEqual(escrituras(consultas), [])
+        self.assertEqual(sum('"juego_ranking"' in c['sql'] for c in consultas.captured_queries), 1)
+
+        # 30 filas cambian de puesto y falta la fila de un usuario: un UPDATE y un INSERT
+        PerfilUsuario.objects.filter(usuario=self.usuarios[-1]).update(puntuacion_total=1000)
+        Ranking.objects.filter(usuario=self.usuarios[5]).delete()
+        with CaptureQueriesContext(connection) as consultas:
+            Ranking.actualizar_ranking()
+        self.assertEqual(sorted(escrituras(consultas)), ['INSERT', 'UPDATE'])
+        filas = list(Ranking.objects.values_list('usuario__username', 'posicion', 'puntuacion_total'))
+        self.assertEqual(filas[0], ('jugador30', 1, 1000))
+        self.assertEqual([posicion for _, posicion, _ in filas], list(range(1, 31)))
+        self.assertEqual([puntos for _, _, puntos in filas[1:]], [300 - 10 * i for i in range(29)])
+
+    def test_empates_conservan_el_orden(self):
+        # Todos empatados: nadie cambia de puesto
+        PerfilUsuario.objects.update(puntuacion_total=0)
+        antes = list(Ranking.objects.values_list('usuario', flat=True))
+        Ranking.actualizar_ranking()
+        self.assertEqual(list(Ranking.objects.values_list('usuario', flat=True)), antes)
+
+
+class RecalculoDiferidoTests(TestCase):
+    """Borrar retos en bloque recalcula perfiles, resumen y ranking una sola vez"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.retos = [
+            Reto.objects.create(titulo=f'R{puntos}', descripcion='-', enunciado='-', respuesta_correcta='ok', puntos=puntos)
+            for puntos in (10, 20, 30)
+        ]
+        self.usuarios = [User.objects.create_user(f'jugador{i}') for i in range(1, 5)]
+        resueltos = {0: [0, 1], 1: [2], 2: [0, 2], 3: []}
+        for i, usuario in enumerate(self.usuarios):
+            for r in resueltos[i]:
+                Intento.objects.create(usuario=usuario, reto=self.retos[r], respuesta_usuario='ok', es_correcto=True)
+        Intento.objects.create(usuario=self.usuarios[3], reto=self.retos[1], respuesta_usuario='no')
+        Ranking.actualizar_ranking()
+        self.admin = admin_site._registry[Reto]
+        self.request = RequestFactory().post('/')
+        self.request.user = User.objects.create_superuser('admin', 'admin@example.com', 'clave-admin')
+
+    def test_borrado_masivo_recalcula_una_vez(self):
+        borrados = Reto.objects.filter(pk__in=[self.retos[0].pk, self.retos[1].pk])
+        with mock.patch.object(Ranking, 'actualizar_ranking', wraps=Ranking.actualizar_ranking) as ranking, \
+                mock.patch.object(PerfilUsuario, 'actualizar_puntuacion') as por_perfil, \
+                mock.patch.object(PerfilUsuario, 'actualizar_puntuaciones', wraps=PerfilUsuario.actualizar_puntuaciones) as perfiles, \
+                mock.patch.object(IntentoDiario, 'actualizar', wraps=IntentoDiario.actualizar) as resumen, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.admin.delete_queryset(self.request, borrados)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ranking.call_count, 1)
+        self.assertEqual(perfiles.call_count, 1)
+        por_perfil.assert_not_called()
+        # Un único día con intentos en cada reto borrado
+        self.assertEqual(resumen.call_count, 2)
+
+        # Igual que recalcular cada perfil a partir de los intentos que quedan
+        esperado = {'jugador1': (0, 0), 'jugador2': (30, 1), 'jugador3': (30, 1), 'jugador4': (0, 0)}
+        for perfil in PerfilUsuario.objects.filter(usuario__in=self.usuarios).select_related('usuario'):
+            self.assertEqual((perfil.puntuacion_total, perfil.retos_completados), esperado[perfil.usuario.username])
+        filas = list(Ranking.objects.values_list('posicion', 'puntuacion_total'))
+        self.assertEqual([posicion for posicion, _ in filas], list(range(1, len(filas) + 1)))
+        self.assertEqual([puntos for _, puntos in filas], sorted((puntos for _, puntos in filas), reverse=True))
+        self.assertFalse(IntentoDiario.objects.filter(reto__in=self.retos[:2]).exists())
+        self.assertFalse(ContadorIntentos.objects.filter(reto__in=self.retos[:2]).exists())
+
+    def test_rollback_no_recalcula(self):
+        with mock.patch.object(LoteRecalculo, 'ejecutar') as ejecutar, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                with recalculo_diferido():
+                    Reto.objects.filter(pk=self.retos[0].pk).delete()
+                    raise RuntimeError('fallo a mitad del borrado')
+
+        self.assertEqual(callbacks, [])
+        ejecutar.assert_not_called()
+        self.assertIsNone(lote_activo())
+        self.assertTrue(Reto.objects.filter(pk=self.retos[0].pk).exists())
+        self.assertEqual(PerfilUsuario.objects.get(usuario=self.usuarios[0]).puntuacion_total, 30)
+
+
+class RecalculoMasivoTests(TestCase):
+    """La versión por lotes da lo mismo que recalcular intento a intento"""
+
+    class Deshacer(Exception):
+        pass
+
+    def setUp(self):
+        User = get_user_model()
+        self.retos = [
+            Reto.objects.create(titulo=f'R{puntos}', descripcion='-', enunciado='-', respuesta_correcta='ok', puntos=puntos)
+            for puntos in (10, 20, 30)
+        ]
+        uno, dos, tres = (User.objects.create_user(f'jugador{i}') for i in range(1, 4))
+        rapido = datetime.timedelta(seconds=60)
+        r10, r20, r30 = self.retos
+        # bulk_create no pasa por save(): puntuaciones, contadores y perfiles quedan desfasados
+        Intento.objects.bulk_create([
+            # jugador1 acierta dos veces el mismo reto
+            Intento(usuario=uno, reto=r10, respuesta_usuario='ok', es_correcto=True, puntuacion_obtenida=10),
+            Intento(usuario=uno, reto=r10, respuesta_usuario='ok', es_correcto=True, puntuacion_obtenida=10),
+            Intento(usuario=uno, reto=r20, respuesta_usuario='no'),
+            Intento(usuario=dos, reto=r10, respuesta_usuario='ok', es_correcto=True, tiempo_respuesta=rapido),
+            Intento(usuario=dos, reto=r30, respuesta_usuario='ok', es_correcto=True, puntuacion_obtenida=99),
+            Intento(usuario=tres, reto=r20, respuesta_usuario='ok', es_correcto=True, tiempo_respuesta=rapido),
+            Intento(usuario=tres, reto=r30, respuesta_usuario='no'),
+            Intento(usuario=tres, reto=r30, respuesta_usuario='no'),
+        ])
+        Intento.objects.filter(usuario=tres).update(fecha_intento=timezone.now() - datetime.timedelta(days=1))
+        Reto.objects.filter(pk=r20.pk).update(puntos=25)
+
+    def foto(self):
+        return {
+            'intentos': dict(Intento.objects.values_list('pk', 'puntuacion_obtenida')),
+            'retos': {pk: (totales, exitosos) for pk, totales, exitosos in
+                      Reto.objects.values_list('pk', 'intentos_totales', 'intentos_exitosos')},
+            'perfiles': {usuario: (puntos, completados) for usuario, puntos, completados in
+                         PerfilUsuario.objects.values_list('usuario', 'puntuacion_total', 'retos_completados')},
+            'resumen': list(IntentoDiario.objects.order_by('dia', 'reto').values_list(
+                'dia', 'reto', 'intentos', 'correctos', 'puntos', 'usuarios_distintos')),
+            'ranking': sorted(Ranking.objects.values_list('usuario', 'puntuacion_total', 'retos_completados')),
+        }
+
+    def recalcular_uno_a_uno(self):
+        for intento in Intento.objects.filter(es_correcto=True).select_related('usuario', 'reto'):
+            Intento.objects.filter(pk=intento.pk).update(puntuacion_obtenida=intento.calcular_puntuacion())
+        for reto in Reto.objects.all():
+            reto.actualizar_estadisticas()
+        for reto_id, fecha in Intento.objects.values_list('reto', 'fecha_intento'):
+            IntentoDiario.actualizar(reto_id, timezone.localdate(fecha))
+        for perfil in PerfilUsuario.objects.all():
+            perfil.actualizar_puntuacion()
+        Ranking.actualizar_ranking()
+
+    def test_igual_que_uno_a_uno(self):
+        try:
+            with transaction.atomic():
+                self.recalcular_uno_a_uno()
+                esperado = self.foto()
+                raise self.Deshacer
+        except self.Deshacer:
+            pass
+        self.assertNotEqual(self.foto(), esperado)
+
+        intentos = Intento.objects.all()
+        self.assertEqual(Intento.recalcular_puntuaciones(intentos), (5, 5))
+        Intento.refrescar_dependientes(intentos)
+        self.assertEqual(self.foto(), esperado)
+
+        # Ninguno de los dos aciertos repetidos puntúa; la bonificación por tiempo sí
+        self.assertEqual(
+            sorted(Intento.objects.filter(es_correcto=True).values_list('puntuacion_obtenida', flat=True)),
+            [0, 0, 12, 30, 30],
+        )
+
+
+class ReportesAdminTests(TestCase):
+    """Los totales de reportes (resumen diario) coinciden con agregar la tabla de intentos"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'clave-admin'))
+        logica, geometria = Categoria.objects.create(nombre='Lógica'), Categoria.objects.create(nombre='Geometría')
+        self.retos = [
+            Reto.objects.create(titulo=titulo, descripcion='-', enunciado='-', respuesta_correcta='ok',
+                                categoria=categoria, dificultad=dificultad, puntos=puntos, max_intentos=20)
+            for titulo, categoria, dificultad, puntos in [
+                ('L-facil', logica, 'facil', 10), ('L-dificil', logica, 'dificil', 30), ('G-facil', geometria, 'facil', 20),
+            ]
+        ]
+        self.usuarios = [User.objects.create_user(f'jugador{i}') for i in range(3)]
+        self.hoy = timezone.localdate()
+        # Intentos de hoy, de días anteriores y uno fuera de los 30 días por defecto
+        for dias_atras in (0, 1, 3, 45):
+            instante = timezone.now() - datetime.timedelta(days=dias_atras)
+            with mock.patch('django.utils.timezone.now', return_value=instante):
+                for i, usuario in enumerate(self.usuarios):
+                    for reto in self.retos[:i + 1]:
+                        Intento.objects.create(usuario=usuario, reto=reto, respuesta_usuario='no')
+                        Intento.objects.create(usuario=usuario, reto=reto, respuesta_usuario='ok',
+                                               es_correcto=(dias_atras + i) % 2 == 0)
+
+    def esperado(self, desde, hasta, categoria='', dificultad=''):
+        tz = timezone.get_current_timezone()
+        intentos = Intento.objects.filter(
+            fecha_intento__gte=timezone.make_aware(datetime.datetime.combine(desde, datetime.time.min), tz),
+            fecha_intento__lt=timezone.make_aware(
+                datetime.datetime.combine(hasta + datetime.timedelta(days=1), datetime.time.min), tz),
+        )
+        if categoria:
+            intentos = intentos.filter(reto__categoria_id=categoria)
+        if dificultad:
+            intentos = intentos.filter(reto__dificultad=dificultad)
+        totales = intentos.aggregate(
+            intentos=Count('pk'), correctos=Count('pk', filter=Q(es_correcto=True)), puntos=Sum('puntuacion_obtenida'),
+        )
+        por_dia = intentos.annotate(dia=TruncDate('fecha_intento', tzinfo=tz)).values('dia').annotate(
+            n=Count('pk')).order_by('-dia').values_list('dia', 'n')
+        return (totales['intentos'], totales['correctos'], totales['puntos'] or 0), list(por_dia)
+
+    def reporte(self, **filtros):
+        response = self.client.get(reverse(f'{admin_site.name}:reportes'), filtros)
+        self.assertEqual(response.status_code, 200)
+        contexto = response.context
+        totales = (contexto['total_intentos'], contexto['total_correctos'], contexto['total_puntos'])
+        return totales, [(fila['dia'], fila['count']) for fila in contexto['intentos_por_fecha']]
+
+    def comprobar_filtros(self):
+        def hace(dias):
+            return self.hoy - datetime.timedelta(days=dias)
+
+        categoria = str(self.retos[0].categoria_id)
+        casos = [
+            {},
+            {'desde': hace(3).isoformat(), 'hasta': hace(1).isoformat()},
+            {'desde': hace(60).isoformat()},
+            {'categoria': categoria},
+            {'dificultad': 'facil'},
+            {'categoria': categoria, 'dificultad': 'facil', 'desde': hace(1).isoformat()},
+        ]
+        for filtros in casos:
+            with self.subTest(**filtros):
+                hasta = datetime.date.fromisoformat(filtros.get('hasta', self.hoy.isoformat()))
+                desde = datetime.date.fromisoformat(filtros.get('desde', (hasta - datetime.timedelta(days=29)).isoformat()))
+                self.assertEqual(
+                    self.reporte(**filtros),
+                    self.esperado(desde, hasta, filtros.get('categoria', ''), filtros.get('dificultad', '')),
+                )
+
+    def test_totales_con_filtros(self):
+        self.comprobar_filtros()
+
+    def test_tras_editar_y_borrar_intentos(self):
+        # Edición desde el admin: el intento pasa a otro reto (otra categoría y dificultad) y a correcto
+        intento = Intento.objects.filter(reto=self.retos[1], es_correcto=False).order_by('pk').first()
+        response = self.client.post(reverse(f'{admin_site.name}:juego_intento_change', args=[intento.pk]), {
+            'usuario': intento.usuario_id, 'reto': self.retos[2].pk,
+            'respuesta_usuario': 'ok', 'es_correcto': 'on', 'tiempo_respuesta': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.comprobar_filtros()
+
+        # Borrado individual y en bloque
+        Intento.objects.filter(reto=self.retos[0]).order_by('pk').first().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse(f'{admin_site.name}:juego_intento_changelist'), {
+                'action': 'delete_selected', 'post': 'yes',
+                '_selected_action': list(Intento.objects.filter(usuario=self.usuarios[2]).values_list('pk', flat=True)[:5]),
+            })
+        self.assertEqual(response.status_code, 302)
+        self.comprobar_filtros()
@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'juego'
 
+# Bajo ASGI (settings.VISTAS_ASYNC) el ranking y el progreso global usan sus versiones async
+if settings.VISTAS_ASYNC:
+    vista_ranking, vista_progreso_global = views.ranking_async, views.progreso_global_async
+else:
+    vista_ranking, vista_progreso_global = views.RankingView.as_view(), views.progreso_global
+
 urlpatterns = [
-    path('ranking/', views.RankingView.as_view(), name='ranking'),
+    path('ranking/', vista_ranking, name='ranking'),
+    path('ranking/eventos/', views.eventos_ranking, name='eventos_ranking'),
     path('mis-estadisticas/', views.mis_estadisticas, name='mis_estadisticas'),
-    path('progreso-global/', views.progreso_global, name='progreso_global'),
+    path('progreso-global/', vista_progreso_global, name='progreso_global'),
 ]
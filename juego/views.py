@@ -1,22 +1,46 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView
+from django.utils.decorators import method_decorator
 from django.db.models import Count, Sum, Case, When, F, FloatField
 from django.db import models
 from .models import Ranking, Intento
-from retos.models import Reto
+from retos.models import Reto, ContadorGeneracion
+from retos.asincrono import alista, apaginar, renderizar
+from retos.condicional import condicional, etag_usuario
+from retos.difusion import CANAL_RANKING, eventos_desde, respuesta_eventos
 
+LARGO_CLAVE_IDEMPOTENCIA = Intento._meta.get_field('clave_idempotencia').max_length
+
+def clave_idempotencia(request):
+    """Clave de idempotencia del envío: cabecera ``Idempotency-Key`` o campo oculto
+
+    Retorna None si no viene; ``ValueError`` si es más larga de lo que cabe.
+    """
+    clave = (request.headers.get('Idempotency-Key') or request.POST.get('clave_idempotencia') or '').strip()
+    if len(clave) > LARGO_CLAVE_IDEMPOTENCIA:
+        raise ValueError(f'La clave de idempotencia admite hasta {LARGO_CLAVE_IDEMPOTENCIA} caracteres.')
+    return clave or None
+
+def etag_ranking(request, *args, **kwargs):
+    """ETag del ranking: generación del último recálculo y usuario actual"""
+    generacion = ContadorGeneracion.obtener(ContadorGeneracion.RANKING)
+    return f"ranking-{generacion}-{etag_usuario(request)}"
+
+@method_decorator(condicional(etag_ranking), name='dispatch')
 class RankingView(ListView):
     """Vista para mostrar el ranking de usuarios"""
     model = Ranking
     template_name = 'juego/ranking.html'
     context_object_name = 'ranking'
-    paginate_by = 20
+    paginate_by = Ranking.FILAS_POR_PAGINA
     
     def get_queryset(self):
         return Ranking.objects.select_related('usuario').order_by('posicion')
     
     def get_context_data(self, **kwargs):
+        # Antes de leer el ranking: un cambio intermedio se reenvía en vez de perderse
+        desde = eventos_desde(CANAL_RANKING)
         context = super().get_context_data(**kwargs)
         
         # Estadísticas generales del ranking
@@ -40,10 +64,46 @@ class RankingView(ListView):
             'total_usuarios': total_usuarios,
             'total_puntos': total_puntos,
             'top_3': top_3,
+            'eventos_desde': desde,
         })
         
         return context
 
+async def _ranking_de(usuario):
+    if not usuario.is_authenticated:
+        return None
+    return await Ranking.objects.filter(usuario=usuario).afirst()
+
+@condicional(etag_ranking)
+async def ranking_async(request):
+    """Versión async (ASGI) de ``RankingView`` con el mismo contexto"""
+    usuario = await request.auser()
+    desde = eventos_desde(CANAL_RANKING)
+    paginator, page_obj = await apaginar(
+        request, Ranking.objects.select_related('usuario').order_by('posicion'), RankingView.paginate_by
+    )
+    total_usuarios = await Ranking.objects.acount()
+    totales = await Ranking.objects.aaggregate(total=Sum('puntuacion_total'))
+    top_3 = await alista(Ranking.objects.select_related('usuario')[:3])
+    ranking_usuario = await _ranking_de(usuario)
+    context = {
+        'paginator': paginator,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+        'object_list': page_obj.object_list,
+        'ranking': page_obj.object_list,
+        'ranking_usuario': ranking_usuario,
+        'total_usuarios': total_usuarios,
+        'total_puntos': totales['total'] or 0,
+        'top_3': top_3,
+        'eventos_desde': desde,
+    }
+    return await renderizar(request, 'juego/ranking.html', context)
+
+async def eventos_ranking(request):
+    """Server-sent events con los cambios del ranking (ver retos/difusion.py)"""
+    return respuesta_eventos(request, CANAL_RANKING)
+
 @login_required
 def mis_estadisticas(request):
     """Vista para mostrar las estadísticas detalladas del usuario"""
@@ -144,3 +204,42 @@ def progreso_global(request):
     }
     
     return render(request, 'juego/progreso_global.html', context)
+
+async def _distribucion_dificultad():
+    distribucion = {}
+    for dificultad, nombre in Reto.DIFICULTAD_CHOICES:
+        distribucion[dificultad] = {
+            'nombre': nombre,
+            'cantidad': await Reto.objects.filter(dificultad=dificultad, activo=True).acount(),
+            'intentos': await Intento.objects.filter(reto__dificultad=dificultad).acount(),
+        }
+    return distribucion
+
+@login_required
+async def progreso_global_async(request):
+    """Versión async (ASGI) de ``progreso_global``"""
+    retos_activos = Reto.objects.filter(activo=True)
+    total_retos = await retos_activos.acount()
+    total_usuarios = await Ranking.objects.acount()
+    total_intentos = await Intento.objects.acount()
+    intentos_correctos = await Intento.objects.filter(es_correcto=True).acount()
+    retos_dificiles = await alista(retos_activos.annotate(
+        tasa_exito=models.Case(
+            models.When(intentos_totales=0, then=0),
+            default=models.F('intentos_exitosos') * 100.0 / models.F('intentos_totales'),
+            output_field=models.FloatField()
+        )
+    ).order_by('tasa_exito')[:10])
+    retos_populares = await alista(retos_activos.order_by('-intentos_totales')[:10])
+    distribucion_dificultad = await _distribucion_dificultad()
+    context = {
+        'total_retos': total_retos,
+        'total_usuarios': total_usuarios,
+        'total_intentos': total_intentos,
+        'intentos_correctos': intentos_correctos,
+        'tasa_exito_global': round((intentos_correctos / total_intentos * 100) if total_intentos > 0 else 0, 2),
+        'retos_dificiles': retos_dificiles,
+        'retos_populares': retos_populares,
+        'distribucion_dificultad': distribucion_dificultad,
+    }
+    return await renderizar(request, 'juego/progreso_global.html', context)
@@ -5,9 +5,11 @@ from django.utils.html import format_html
 from django.urls import path
 from django.shortcuts import render
 from django.db.models import Count, Sum
-from retos.models import Reto, Categoria
-from retos.admin import RetoAdmin, CategoriaAdmin
-from juego.models import Intento, Ranking
+from django.utils import timezone
+import datetime
+from retos.models import Reto, Categoria, ConfiguracionOrdenamiento, RespuestaAlternativa
+from retos.admin import RetoAdmin, CategoriaAdmin, ConfiguracionOrdenamientoAdmin, RespuestaAlternativaAdmin
+from juego.models import Intento, Ranking, IntentoDiario
 from juego.admin import IntentoAdmin, RankingAdmin
 from cuentas.models import PerfilUsuario
 from cuentas.admin import PerfilUsuarioAdmin, UserAdmin
@@ -41,18 +43,67 @@ class CustomAdminSite(admin.AdminSite):
             'retos_por_dificultad': Reto.objects.filter(activo=True).values('dificultad').annotate(
                 count=Count('id')
             ),
-            'top_usuarios': PerfilUsuario.objects.order_by('-puntuacion_total')[:5],
+            'top_usuarios': PerfilUsuario.objects.select_related('usuario').order_by('-puntuacion_total')[:5],
             'retos_populares': Reto.objects.filter(activo=True).order_by('-intentos_totales')[:5],
         }
         return render(request, 'admin/estadisticas.html', context)
     
     def reportes_view(self, request):
-        """Vista personalizada para reportes"""
+        """Vista personalizada para reportes (lee sólo el resumen IntentoDiario)"""
+        hoy = timezone.localdate()
+        
+        def leer_fecha(nombre, por_defecto):
+            try:
+                return datetime.date.fromisoformat(request.GET.get(nombre, ''))
+            except ValueError:
+                return por_defecto
+        
+        hasta = leer_fecha('hasta', hoy)
+        desde = leer_fecha('desde', hasta - datetime.timedelta(days=29))
+        categoria = request.GET.get('categoria', '')
+        dificultad = request.GET.get('dificultad', '')
+        
+        resumenes = IntentoDiario.objects.filter(dia__gte=desde, dia__lte=hasta)
+        if categoria.isdigit():
+            resumenes = resumenes.filter(reto__categoria_id=categoria)
+        if dificultad:
+            resumenes = resumenes.filter(reto__dificultad=dificultad)
+        
+        intentos_por_fecha = list(
+            resumenes.values('dia').annotate(
+                count=Sum('intentos'),
+                correctos=Sum('correctos'),
+                puntos=Sum('puntos'),
+                usuarios=Sum('usuarios_distintos'),
+            ).order_by('-dia')
+        )
+        totales = resumenes.aggregate(
+            intentos=Sum('intentos'),
+            correctos=Sum('correctos'),
+            puntos=Sum('puntos'),
+        )
+        dias_periodo = (hasta - desde).days + 1
+        total_intentos = totales['intentos'] or 0
+        
         context = {
             'title': 'Reportes del Sistema',
-            'intentos_por_fecha': Intento.objects.extra(
-                select={'day': 'date(fecha_intento)'}
-            ).values('day').annotate(count=Count('id')).order_by('-day')[:30],
+            'intentos_por_fecha': intentos_por_fecha,
+            'retos_mas_activos': resumenes.values('reto', 'reto__titulo').annotate(
+                intentos=Sum('intentos'),
+                correctos=Sum('correctos'),
+            ).order_by('-intentos')[:10],
+            'total_intentos': total_intentos,
+            'total_correctos': totales['correctos'] or 0,
+            'total_puntos': totales['puntos'] or 0,
+            'dias_periodo': dias_periodo,
+            'promedio_diario': round(total_intentos / dias_periodo, 1) if dias_periodo > 0 else 0,
+            'desde': desde,
+            'hasta': hasta,
+            'categoria': categoria,
+            'dificultad': dificultad,
+            'categorias': Categoria.objects.values_list('id', 'nombre'),
+            'dificultades': Reto.DIFICULTAD_CHOICES,
+            'zona_horaria': timezone.get_current_timezone_name(),
         }
         return render(request, 'admin/reportes.html', context)
 
@@ -65,5 +116,7 @@ admin_site.register(User, UserAdmin)
 admin_site.register(PerfilUsuario, PerfilUsuarioAdmin)
 admin_site.register(Reto, RetoAdmin)
 admin_site.register(Categoria, CategoriaAdmin)
+admin_site.register(RespuestaAlternativa, RespuestaAlternativaAdmin)
+admin_site.register(ConfiguracionOrdenamiento, ConfiguracionOrdenamientoAdmin)
 admin_site.register(Intento, IntentoAdmin)
 admin_site.register(Ranking, RankingAdmin)
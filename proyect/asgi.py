@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proyect.settings')
+# Los eventos en vivo sólo funcionan bajo ASGI (ver retos/difusion.py). Las vistas async
+# de lectura son aparte y opcionales: DJANGO_VISTAS_ASYNC=1 (ver retos/asincrono.py)
+os.environ.setdefault('DJANGO_EVENTOS_VIVO', '1')
 
 application = get_asgi_application()
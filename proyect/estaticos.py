@@ -0,0 +1,54 @@
+"""
+ARCHIVOS ESTÁTICOS CON HASH Y PRECOMPRIMIDOS
+============================================
+
+Storage de ``collectstatic`` en producción:
+
+- ``ManifestStaticFilesStorage`` copia cada archivo con el hash de su
+  contenido en el nombre (``lista_retos.3f2a9c1b.js``) y ``{% static %}``
+  devuelve ese nombre, así que el navegador puede cachearlo un año.
+- Después escribe junto a cada archivo hasheado de texto sus variantes
+  ``.gz`` y, si está instalado el paquete ``brotli``, ``.br``, para que el
+  servidor web las envíe sin comprimir en cada petición
+  (``gzip_static`` / ``brotli_static`` en nginx).
+"""
+
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli sólo se generan las variantes .gz
+    brotli = None
+
+
+class EstaticosComprimidos(ManifestStaticFilesStorage):
+    """Manifiesto con hash de contenido más variantes .gz/.br de los archivos de texto"""
+
+    EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml')
+    TAMANO_MINIMO = 256  # Por debajo, la cabecera de compresión no compensa
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for nombre in set(self.hashed_files.values()):
+            if nombre.endswith(self.EXTENSIONES_COMPRIMIBLES):
+                self.comprimir(nombre)
+
+    def comprimir(self, nombre):
+        with self.open(nombre) as archivo:
+            contenido = archivo.read()
+        if len(contenido) < self.TAMANO_MINIMO:
+            return
+
+        variantes = {'.gz': gzip.compress(contenido, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variantes['.br'] = brotli.compress(contenido, quality=11)
+        for extension, comprimido in variantes.items():
+            # Sólo si de verdad ahorra bytes
+            if len(comprimido) < len(contenido):
+                self.delete(nombre + extension)
+                self._save(nombre + extension, ContentFile(comprimido))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,10 +41,12 @@ INSTALLED_APPS = [
     'retos',
     'juego',
     'cuentas',
+    'api',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'retos.replicas.ReplicasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,12 +67,21 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'cuentas.autenticacion.navbar',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'proyect.wsgi.application'
+ASGI_APPLICATION = 'proyect.asgi.application'
+
+# Versiones async de las vistas de lectura (inicio, ranking, progreso global), sólo para
+# servir con ASGI: se activan aparte con DJANGO_VISTAS_ASYNC=1; por defecto, las síncronas.
+VISTAS_ASYNC = os.environ.get('DJANGO_VISTAS_ASYNC') == '1'
+# Ranking y estadísticas en vivo (server-sent events, ver retos/difusion.py). Necesitan ASGI:
+# proyect/asgi.py los activa (DJANGO_EVENTOS_VIVO=1); sin ellos los flujos responden 204.
+EVENTOS_VIVO = os.environ.get('DJANGO_EVENTOS_VIVO') == '1'
 
 
 # Database
@@ -79,9 +91,45 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Las transacciones toman el bloqueo de escritura al empezar (y esperan
+            # busy_timeout) en vez de fallar al pasar de lectura a escritura
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # En disco y no en memoria compartida: así los tests con hilos ven los
+        # mismos bloqueos que producción (WAL y busy_timeout) y no fallan con
+        # "database table is locked"
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Réplica de lectura local para probar el router con dos archivos SQLite
+# (la "replicación" es copiar el archivo de la primaria):
+#   cp db.sqlite3 db_replica.sqlite3
+#   DB_REPLICA_SQLITE=db_replica.sqlite3 python manage.py runserver
+if os.environ.get('DB_REPLICA_SQLITE'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['DB_REPLICA_SQLITE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Lecturas de peticiones GET a las réplicas, escrituras a 'default' (ver retos/replicas.py)
+DATABASE_ROUTERS = ['retos.replicas.RouterReplicas']
+REPLICAS_LECTURA = [alias for alias in DATABASES if alias != 'default']
+# Segundos que un cliente lee de la primaria después de escribir
+REPLICA_FIJACION_SEGUNDOS = 10
+
+# Pragmas aplicados a cada conexión SQLite (ver retos/basedatos.py; None omite uno)
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,            # ms esperando el bloqueo antes de "database is locked"
+    'journal_mode': 'WAL',           # lectores concurrentes con un escritor
+    'synchronous': 'NORMAL',         # seguro en WAL; fsync sólo en los checkpoints
+    'mmap_size': 128 * 1024 * 1024,  # bytes leídos vía mmap
+    'cache_size': -20000,            # KiB de caché de páginas por conexión
+    'temp_store': 'MEMORY',          # tablas temporales y ordenaciones en memoria
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -118,6 +166,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -132,6 +181,58 @@ LOGOUT_REDIRECT_URL = '/'
 # Custom user model
 AUTH_USER_MODEL = 'cuentas.User'
 
+# Usuario y barra de navegación leídos de la caché en cada petición (ver cuentas/autenticacion.py).
+# ModelBackend sigue en la lista para que las sesiones iniciadas con él sigan siendo válidas.
+AUTHENTICATION_BACKENDS = [
+    'cuentas.autenticacion.BackendUsuarios',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# 0 lee el usuario siempre de la base de datos (como ModelBackend)
+CACHE_USUARIO_SEGUNDOS = 300
+
+# Caché local del proceso. Guarda usuarios, sesiones y cubos del límite de envíos:
+# con el máximo por defecto (300 entradas) descartaría cubos y contadores en uso
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Sesiones en la caché, con la base de datos como respaldo
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Token bucket por usuario y por IP delante de intentar_reto (ver retos/limitacion.py):
+# ráfaga de 'capacidad' envíos y después 'por_minuto'; None desactiva un ámbito
+LIMITE_ENVIOS = {
+    'usuario': {'capacidad': 10, 'por_minuto': 20},
+    'ip': {'capacidad': 30, 'por_minuto': 60},
+}
+# Detrás de un proxy: clave de request.META con la IP real (p. ej. 'HTTP_X_REAL_IP').
+# Sin ella todos los clientes comparten la IP del proxy.
+CABECERA_IP_CLIENTE = None
+# Segundos que se guarda en caché el veredicto de un envío con clave de idempotencia
+# (después se reconstruye del intento guardado, ver Intento.registrar)
+IDEMPOTENCIA_SEGUNDOS = 24 * 60 * 60
+# Quién puede leer /metricas/ sin ser staff (p. ej. el servidor de Prometheus)
+METRICAS_IPS = ['127.0.0.1', '::1']
+
 # Media files (user uploads)
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Subidas con nombre por hash de contenido: deduplicadas, con conteo de referencias
+# y cacheables como immutable (ver retos/almacenamiento.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'retos.almacenamiento.AlmacenamientoContenido',
+    },
+    # Producción: nombres con hash de contenido y variantes .gz/.br (ver proyect/estaticos.py).
+    # Requiere ejecutar collectstatic en cada despliegue.
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'proyect.estaticos.EstaticosComprimidos'
+        ),
+    },
+}
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Settings de producción: parten de ``settings.py`` y se configuran con
+variables de entorno.
+
+Uso::
+
+    export DJANGO_SETTINGS_MODULE=proyect.settings_produccion
+    export DJANGO_SECRET_KEY=...
+    export DJANGO_ALLOWED_HOSTS=retos.ejemplo.com
+    python manage.py check --deploy
+    python manage.py collectstatic --noinput
+
+Variables (entre paréntesis, el valor por defecto):
+
+- ``DJANGO_DEBUG`` (``0``).
+- ``DB_ENGINE``: ``sqlite`` o ``postgresql`` (``sqlite``); ``DB_NAME``,
+  ``DB_USER``, ``DB_PASSWORD``, ``DB_HOST``, ``DB_PORT``.
+- ``DB_REPLICAS``: hosts de réplicas de lectura separados por comas
+  (ver ``retos/replicas.py``).
+- ``DB_CONN_MAX_AGE``: segundos que se reutiliza una conexión (``600``);
+  ``DB_CONN_HEALTH_CHECKS`` (``1``) la comprueba antes de reutilizarla.
+- ``DJANGO_CACHE``: ``locmem``, ``archivo``, ``memcached`` o ``redis``
+  (``locmem``, sustituto local de una caché por socket);
+  ``DJANGO_CACHE_UBICACION``: ruta o direcciones del servidor;
+  ``DJANGO_CACHE_MAX_ENTRADAS``: entradas de ``locmem`` y ``archivo``
+  antes de descartar (``10000``). ``locmem`` no se comparte entre
+  procesos: con varios workers ``check --deploy`` avisa.
+- ``DJANGO_CACHE_USUARIO_SEGUNDOS``: segundos que se confía en el usuario
+  guardado en la caché (``300``; ``0`` con ``locmem``, porque un worker no
+  vería a tiempo un usuario desactivado en otro).
+- ``DJANGO_SESION``: ``cached_db`` o ``firmada`` (``cached_db``). Con
+  ``firmada`` la sesión viaja en una cookie firmada y no se lee de ningún
+  servidor, pero no se puede revocar desde el servidor (sólo cambiando
+  ``SECRET_KEY``).
+- ``DJANGO_CABECERA_IP``: cabecera con la IP del cliente que pone el proxy,
+  p. ej. ``X-Real-IP`` (sin valor se usa la dirección de la conexión).
+- ``DJANGO_METRICAS_IPS``: IPs que pueden leer ``/metricas/`` sin ser
+  staff, separadas por comas (``127.0.0.1,::1``).
+"""
+
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, STORAGES, TEMPLATES
+
+
+def _env(nombre, defecto=None):
+    return os.environ.get(nombre, defecto)
+
+
+def _env_bool(nombre, defecto=False):
+    valor = os.environ.get(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ('1', 'true', 'si', 'sí', 'yes', 'on')
+
+
+def _env_lista(nombre, defecto=''):
+    return [valor.strip() for valor in _env(nombre, defecto).split(',') if valor.strip()]
+
+
+DEBUG = _env_bool('DJANGO_DEBUG')
+
+SECRET_KEY = _env('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured("Define DJANGO_SECRET_KEY para usar proyect.settings_produccion.")
+
+ALLOWED_HOSTS = _env_lista('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1')
+CSRF_TRUSTED_ORIGINS = _env_lista('DJANGO_CSRF_TRUSTED_ORIGINS')
+
+
+# Base de datos: conexiones persistentes (una por hilo de worker) comprobadas antes de reutilizarse
+CONN_MAX_AGE = int(_env('DB_CONN_MAX_AGE', 600))
+CONN_HEALTH_CHECKS = _env_bool('DB_CONN_HEALTH_CHECKS', True)
+
+if _env('DB_ENGINE', 'sqlite') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': _env('DB_NAME', 'retos'),
+            'USER': _env('DB_USER', ''),
+            'PASSWORD': _env('DB_PASSWORD', ''),
+            'HOST': _env('DB_HOST', ''),
+            'PORT': _env('DB_PORT', ''),
+        }
+    }
+else:
+    DATABASES = copy.deepcopy(DATABASES)
+    if _env('DB_NAME'):
+        DATABASES['default']['NAME'] = _env('DB_NAME')
+
+# Réplicas de lectura: mismos datos de conexión que la primaria salvo el host
+for _numero, _host in enumerate(_env_lista('DB_REPLICAS'), start=1):
+    DATABASES[f'replica{_numero}'] = {**DATABASES['default'], 'HOST': _host, 'TEST': {'MIRROR': 'default'}}
+REPLICAS_LECTURA = [alias for alias in DATABASES if alias != 'default']
+
+for _base in DATABASES.values():
+    _base['CONN_MAX_AGE'] = CONN_MAX_AGE
+    _base['CONN_HEALTH_CHECKS'] = CONN_HEALTH_CHECKS
+
+
+# Caché
+_CACHES_DISPONIBLES = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'retos'),
+    'archivo': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache = _env('DJANGO_CACHE', 'locmem')
+if _cache not in _CACHES_DISPONIBLES:
+    raise ImproperlyConfigured(
+        f"DJANGO_CACHE={_cache!r} no válido; opciones: {', '.join(_CACHES_DISPONIBLES)}."
+    )
+_backend, _ubicacion = _CACHES_DISPONIBLES[_cache]
+CACHES = {
+    'default': {
+        'BACKEND': _backend,
+        'LOCATION': _env('DJANGO_CACHE_UBICACION', _ubicacion),
+        'TIMEOUT': int(_env('DJANGO_CACHE_TIMEOUT', 300)),
+    }
+}
+if _cache in ('locmem', 'archivo'):
+    # El máximo por defecto (300) descartaría sesiones y cubos del límite de envíos en uso
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(_env('DJANGO_CACHE_MAX_ENTRADAS', 10000))}
+
+# Usuario en caché (cuentas/autenticacion.py): sólo con una caché compartida se invalida en todos los workers
+CACHE_USUARIO_SEGUNDOS = int(_env('DJANGO_CACHE_USUARIO_SEGUNDOS', 0 if _cache == 'locmem' else 300))
+
+
+# Sesiones
+_SESIONES_DISPONIBLES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'firmada': 'django.contrib.sessions.backends.signed_cookies',
+}
+_sesion = _env('DJANGO_SESION', 'cached_db')
+if _sesion not in _SESIONES_DISPONIBLES:
+    raise ImproperlyConfigured(
+        f"DJANGO_SESION={_sesion!r} no válido; opciones: {', '.join(_SESIONES_DISPONIBLES)}."
+    )
+SESSION_ENGINE = _SESIONES_DISPONIBLES[_sesion]
+
+
+# Límite de envíos y métricas (ver retos/limitacion.py)
+if _env('DJANGO_CABECERA_IP'):
+    CABECERA_IP_CLIENTE = 'HTTP_' + _env('DJANGO_CABECERA_IP').upper().replace('-', '_')
+METRICAS_IPS = _env_lista('DJANGO_METRICAS_IPS', '127.0.0.1,::1')
+
+
+# Plantillas compiladas una sola vez por proceso
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+# Estáticos con hash y precomprimidos (settings.py elige el storage según su propio DEBUG)
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {'BACKEND': 'proyect.estaticos.EstaticosComprimidos'},
+}
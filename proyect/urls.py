@@ -15,11 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.views.generic import RedirectView
 from django.conf import settings
 from django.conf.urls.static import static
 from .admin_config import admin_site
+from retos.views import servir_media
 
 urlpatterns = [
     # Compat: rutas antiguas del admin cuando se usaba auth.User (deben ir ANTES del include del admin)
@@ -29,9 +30,10 @@ urlpatterns = [
     path('', include('retos.urls')),
     path('juego/', include('juego.urls')),
     path('cuentas/', include('cuentas.urls')),
+    path('api/v1/', include('api.urls')),
 ]
 
 # Configuración para archivos estáticos y media en desarrollo
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), servir_media)]
@@ -1,9 +1,48 @@
+import time
+
 from django.contrib import admin
 from django import forms
 from django.utils.html import format_html
-from django.db.models import Count
+from django.db import connections
+from django.db.models import Count, Q, Value
+from django.db.models.functions import Concat, Upper
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+from juego.recalculo import recalculo_diferido
 from .models import Categoria, Reto, ConfiguracionOrdenamiento, RespuestaAlternativa
 
+# Mayor carácter Unicode: cota superior de los textos que empiezan por un prefijo
+ULTIMO_CARACTER = '\U0010ffff'
+
+def es_autocompletado(request):
+    """True si la petición es el endpoint de autocompletado del admin"""
+    resolver_match = getattr(request, 'resolver_match', None)
+    return resolver_match is not None and resolver_match.url_name == 'autocomplete'
+
+def filtrar_prefijo(queryset, campos, termino):
+    """Filas en las que algún campo empieza por ``termino``, sin distinguir mayúsculas
+
+    ``istartswith`` compara ``LIKE`` sobre la columna y no usa los índices
+    ``Upper(campo)``. Aquí se compara la misma expresión del índice: en
+    PostgreSQL con ``LIKE 'TÉRMINO%'`` (índice ``text_pattern_ops``); en el
+    resto como rango entre el término en mayúsculas (pasado por ``UPPER`` del
+    motor, que en SQLite sólo convierte ASCII, igual que su ``LIKE``) y ese
+    término seguido del último carácter Unicode.
+    """
+    postgresql = connections[queryset.db].vendor == 'postgresql'
+    condicion = Q()
+    for campo in campos:
+        if postgresql:
+            queryset = queryset.alias(**{f'{campo}_mayusculas': Upper(campo)})
+            condicion |= Q(**{f'{campo}_mayusculas__startswith': termino.upper()})
+        else:
+            inicio = Upper(Value(termino))
+            condicion |= Q(
+                GreaterThanOrEqual(Upper(campo), inicio),
+                LessThanOrEqual(Upper(campo), Concat(inicio, Value(ULTIMO_CARACTER))),
+            )
+    return queryset.filter(condicion)
+
+
 class CategoriaAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'descripcion', 'color_preview', 'retos_count']
     list_filter = ['nombre']
@@ -18,10 +57,16 @@ class CategoriaAdmin(admin.ModelAdmin):
         )
     color_preview.short_description = 'Color'
     
+    def get_queryset(self, request):
+        # Conteo de retos activos en la misma consulta del listado (evita N+1)
+        return super().get_queryset(request).annotate(
+            retos_activos=Count('reto', filter=Q(reto__activo=True))
+        )
+    
     def retos_count(self, obj):
-        count = obj.reto_set.filter(activo=True).count()
-        return format_html('<span style="color: #007bff; font-weight: bold;">{}</span>', count)
+        return format_html('<span style="color: #007bff; font-weight: bold;">{}</span>', obj.retos_activos)
     retos_count.short_description = 'Retos Activos'
+    retos_count.admin_order_field = 'retos_activos'
 
 
 class RespuestaAlternativaInline(admin.TabularInline):
@@ -48,6 +93,7 @@ class RetoAdmin(admin.ModelAdmin):
     search_fields = ['titulo', 'descripcion', 'enunciado']
     ordering = ['-fecha_creacion']
     readonly_fields = ['fecha_creacion', 'fecha_modificacion', 'intentos_totales', 'intentos_exitosos', 'tasa_exito_calculada']
+    autocomplete_fields = ['creado_por']
     actions = ['activar_retos', 'desactivar_retos', 'actualizar_estadisticas', 'cambiar_max_intentos', 'eliminar_imagenes']
     inlines = [RespuestaAlternativaInline]
     
@@ -142,7 +188,7 @@ class RetoAdmin(admin.ModelAdmin):
         if obj.imagen_reto:
             return format_html(
                 '<img src="{}" style="width: 30px; height: 30px; object-fit: cover; border-radius: 3px;" />',
-                obj.imagen_reto.url
+                obj.obtener_imagen(40)
             )
         elif obj.icono_por_defecto:
             return format_html(
@@ -170,6 +216,24 @@ class RetoAdmin(admin.ModelAdmin):
         return f"{obj.calcular_tasa_exito()}%"
     tasa_exito_calculada.short_description = 'Tasa de Éxito'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('categoria')
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Autocompletado: prefijo del título completo (índice reto_titulo_prefijo_idx)
+        if es_autocompletado(request) and search_term.strip():
+            return filtrar_prefijo(queryset, ['titulo'], search_term.strip()), False
+        return super().get_search_results(request, queryset, search_term)
+    
+    def delete_model(self, request, obj):
+        # Perfiles, resumen diario y ranking se recalculan una sola vez al confirmar
+        with recalculo_diferido():
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        with recalculo_diferido():
+            super().delete_queryset(request, queryset)
+    
     def activar_retos(self, request, queryset):
         updated = queryset.update(activo=True)
         self.message_user(request, f'{updated} retos activados correctamente.')
@@ -181,9 +245,10 @@ class RetoAdmin(admin.ModelAdmin):
     desactivar_retos.short_description = "Desactivar retos seleccionados"
     
     def actualizar_estadisticas(self, request, queryset):
-        for reto in queryset:
-            reto.actualizar_estadisticas()
-        self.message_user(request, f'Estadísticas actualizadas para {queryset.count()} retos.')
+        inicio = time.perf_counter()
+        actualizados = Reto.actualizar_estadisticas_masivo(queryset)
+        duracion = time.perf_counter() - inicio
+        self.message_user(request, f'Estadísticas actualizadas para {actualizados} retos en {duracion:.2f} s.')
     actualizar_estadisticas.short_description = "Actualizar estadísticas"
     
     def cambiar_max_intentos(self, request, queryset):
@@ -245,9 +310,10 @@ class RetoAdmin(admin.ModelAdmin):
 class RespuestaAlternativaAdmin(admin.ModelAdmin):
     """Admin para RespuestaAlternativa"""
     list_display = ['reto', 'texto_preview', 'descripcion', 'activa', 'fecha_creacion']
-    list_filter = ['activa', 'reto', 'fecha_creacion']
+    list_filter = ['activa', 'reto__categoria', 'reto__dificultad', 'fecha_creacion']
     search_fields = ['texto', 'descripcion', 'reto__titulo']
     ordering = ['-fecha_creacion']
+    autocomplete_fields = ['reto']
     
     fieldsets = (
         ('Información de la Variación', {
@@ -267,6 +333,9 @@ class RespuestaAlternativaAdmin(admin.ModelAdmin):
     def texto_preview(self, obj):
         return obj.texto[:50] + "..." if len(obj.texto) > 50 else obj.texto
     texto_preview.short_description = "Texto"
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('reto')
 
 class ConfiguracionOrdenamientoAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'orden_por_defecto', 'max_retos_por_pagina', 'incluir_aleatorios', 'activo']
@@ -0,0 +1,105 @@
+"""
+ALMACENAMIENTO DIRECCIONADO POR CONTENIDO
+========================================
+
+Storage por defecto del proyecto (``STORAGES['default']``) para las imágenes
+subidas a ``retos/`` y ``perfiles/``:
+
+- Cada archivo se guarda como ``<carpeta>/<sha256><extensión>``: subir dos
+  veces el mismo avatar o reutilizar una ilustración ocupa un solo archivo.
+- ``ArchivoContenido`` cuenta cuántas veces se guardó cada archivo;
+  ``delete()`` libera una referencia y sólo borra el archivo (y sus
+  miniaturas) al liberar la última.
+- Como el nombre depende del contenido, un archivo nunca cambia: se puede
+  servir con caché ``immutable`` (ver ``es_inmutable``).
+
+Las miniaturas (``<carpeta>/miniaturas/``) se derivan del nombre del
+original, así que se guardan tal cual, sin contar referencias.
+"""
+
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db import transaction
+from django.db.models import F
+
+from .miniaturas import CARPETA_MINIATURAS
+
+# 64 dígitos hexadecimales al inicio del nombre: originales y sus miniaturas
+PATRON_INMUTABLE = re.compile(r'(^|/)[0-9a-f]{64}\.[^/]+$')
+
+
+def es_inmutable(nombre):
+    """¿El archivo se nombró por su contenido (y por tanto no cambia nunca)?"""
+    return bool(PATRON_INMUTABLE.search(nombre))
+
+
+class AlmacenamientoContenido(FileSystemStorage):
+    """FileSystemStorage que deduplica por hash y cuenta referencias"""
+
+    # ``eliminar_imagen`` no necesita borrar las miniaturas: lo hace ``delete()``
+    borra_derivados = True
+
+    def es_derivado(self, nombre):
+        return CARPETA_MINIATURAS in nombre.split('/')[:-1]
+
+    def nombre_por_contenido(self, nombre, contenido):
+        resumen = hashlib.sha256()
+        for trozo in contenido.chunks():
+            resumen.update(trozo)
+        contenido.seek(0)
+        carpeta, archivo = posixpath.split(nombre)
+        extension = posixpath.splitext(archivo)[1].lower()
+        return posixpath.join(carpeta, resumen.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if self.es_derivado(name):
+            return super().save(name, content, max_length=max_length)
+
+        from .models import ArchivoContenido
+        validate_file_name(name, allow_relative_path=True)
+        name = self.nombre_por_contenido(name, content)
+        # El bloqueo de la fila serializa el guardado con un delete() concurrente del mismo archivo
+        with transaction.atomic():
+            archivo, _ = ArchivoContenido.objects.select_for_update().get_or_create(nombre=name)
+            if not self.exists(name):
+                self._save(name, content)
+            ArchivoContenido.objects.filter(pk=archivo.pk).update(
+                referencias=F('referencias') + 1,
+                tamano=content.size,
+            )
+        return name
+
+    def delete(self, name):
+        if not name or self.es_derivado(name):
+            return super().delete(name)
+
+        from .models import ArchivoContenido
+        with transaction.atomic():
+            archivo = ArchivoContenido.objects.select_for_update().filter(nombre=name).first()
+            if archivo is not None and archivo.referencias > 1:
+                ArchivoContenido.objects.filter(pk=archivo.pk).update(referencias=F('referencias') - 1)
+                return
+            # Última referencia (o archivo anterior a este storage, sin contador)
+            if archivo is not None:
+                archivo.delete()
+            super().delete(name)
+            self.borrar_derivados(name)
+
+    def borrar_derivados(self, name):
+        """Borra las miniaturas ``<carpeta>/miniaturas/<archivo>.*`` de un original"""
+        carpeta, archivo = posixpath.split(name)
+        miniaturas = posixpath.join(carpeta, CARPETA_MINIATURAS)
+        if not self.exists(miniaturas):
+            return
+        for nombre in self.listdir(miniaturas)[1]:
+            if nombre.startswith(archivo + '.'):
+                super().delete(posixpath.join(miniaturas, nombre))
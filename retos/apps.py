@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RetosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'retos'
+
+    def ready(self):
+        from . import basedatos, checks  # noqa: F401  (pragmas de SQLite y avisos de rendimiento)
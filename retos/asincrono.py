@@ -0,0 +1,47 @@
+"""
+UTILIDADES PARA LAS VISTAS ASYNC (ASGI)
+=======================================
+
+Las vistas de lectura más visitadas tienen una versión ``async`` que espera
+sus consultas con el ORM async de Django sin ocupar un hilo del servidor.
+Las consultas van una tras otra: el ORM async las ejecuta todas en el hilo
+de la petición (``thread_sensitive``), así que lanzarlas con
+``asyncio.gather`` no las solaparía. Se activan con
+``settings.VISTAS_ASYNC`` (``DJANGO_VISTAS_ASYNC=1``), pensado para servir
+con ASGI; por defecto se usan las vistas síncronas, también bajo ASGI.
+
+Las plantillas acceden de forma perezosa a ``request.user`` y su perfil,
+así que se renderizan con ``sync_to_async``; por eso todas las consultas de
+la vista se materializan antes (``alista``).
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+from django.shortcuts import render
+
+
+async def alista(queryset):
+    """Evalúa un queryset con el ORM async y retorna la lista de objetos"""
+    return [objeto async for objeto in queryset]
+
+
+async def renderizar(request, plantilla, contexto):
+    return await sync_to_async(render)(request, plantilla, contexto)
+
+
+def _paginar(queryset, numero, por_pagina):
+    paginator = Paginator(queryset, por_pagina)
+    if numero == 'last':
+        numero = paginator.num_pages
+    try:
+        pagina = paginator.page(numero)
+    except InvalidPage as error:
+        raise Http404(f"Página inválida ({numero}): {error}")
+    pagina.object_list = list(pagina.object_list)
+    return paginator, pagina
+
+
+async def apaginar(request, queryset, por_pagina):
+    """Como la paginación de ``ListView``: retorna (paginator, página) con los objetos ya leídos"""
+    return await sync_to_async(_paginar)(queryset, request.GET.get('page') or 1, por_pagina)
@@ -0,0 +1,43 @@
+"""
+AJUSTES DE CONEXIÓN SQLITE
+==========================
+
+Con los pragmas por defecto SQLite usa el journal de rollback: mientras
+``intentar_reto`` escribe, ningún lector puede leer, y dos envíos a la vez
+terminan en "database is locked". Al abrir cada conexión se aplican los
+pragmas de ``settings.SQLITE_PRAGMAS`` (en orden; ``None`` omite uno):
+
+- ``journal_mode=WAL``: los lectores no se bloquean con un escritor.
+- ``busy_timeout``: milisegundos que una escritura espera el bloqueo.
+- ``synchronous=NORMAL``: en WAL sigue siendo seguro ante caídas del proceso.
+- ``mmap_size``, ``cache_size``, ``temp_store``: menos lecturas de disco.
+
+El mantenimiento periódico (ANALYZE, VACUUM incremental, checkpoint del
+WAL) está en ``python manage.py mantenimiento_sqlite``.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def pragmas_configurados():
+    """Pragmas de ``settings.SQLITE_PRAGMAS``, sin los desactivados con ``None``"""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    return {nombre: valor for nombre, valor in pragmas.items() if valor is not None}
+
+
+def aplicar_pragmas(cursor, pragmas):
+    for nombre, valor in pragmas.items():
+        if not nombre.isidentifier():
+            raise ValueError(f"Pragma SQLite no válido: {nombre!r}")
+        cursor.execute(f"PRAGMA {nombre} = {valor}")
+
+
+@receiver(connection_created)
+def configurar_conexion_sqlite(sender, connection, **kwargs):
+    """Aplica los pragmas configurados a cada conexión SQLite nueva"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        aplicar_pragmas(cursor, pragmas_configurados())
@@ -0,0 +1,91 @@
+"""
+Comprobaciones de despliegue (``manage.py check --deploy``) que avisan de
+settings que penalizan el rendimiento en producción.
+
+Son sólo de despliegue porque el runner de tests desactiva DEBUG y los
+procesos WSGI no ejecutan los checks: ejecútalas con los settings de
+producción antes de cada despliegue.
+"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .basedatos import pragmas_configurados
+
+
+@register(Tags.compatibility, deploy=True)
+def verificar_debug(app_configs, **kwargs):
+    if settings.DEBUG:
+        return [Warning(
+            "DEBUG está activo: Django guarda en memoria cada consulta SQL de cada petición.",
+            hint="Usa proyect.settings_produccion (DJANGO_DEBUG=0).",
+            id='rendimiento.W001',
+        )]
+    return []
+
+
+@register(Tags.database, deploy=True)
+def verificar_rendimiento(app_configs, **kwargs):
+    avisos = []
+
+    for alias, base in settings.DATABASES.items():
+        if not base.get('CONN_MAX_AGE'):
+            avisos.append(Warning(
+                f"La base '{alias}' abre una conexión nueva en cada petición (CONN_MAX_AGE = 0).",
+                hint="Define DB_CONN_MAX_AGE (p. ej. 600) con DB_CONN_HEALTH_CHECKS=1.",
+                id='rendimiento.W002',
+            ))
+        if base['ENGINE'] == 'django.db.backends.sqlite3':
+            if str(pragmas_configurados().get('journal_mode', '')).upper() != 'WAL':
+                avisos.append(Warning(
+                    f"La base SQLite '{alias}' no usa journal_mode=WAL: cada escritura bloquea a los lectores.",
+                    hint="Añade 'journal_mode': 'WAL' a SQLITE_PRAGMAS.",
+                    id='rendimiento.W003',
+                ))
+
+    if settings.CACHES['default']['BACKEND'] == 'django.core.cache.backends.dummy.DummyCache':
+        avisos.append(Warning(
+            "La caché por defecto es DummyCache: no se guarda nada.",
+            hint="Elige DJANGO_CACHE=locmem, archivo, memcached o redis.",
+            id='rendimiento.W004',
+        ))
+    elif settings.CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+        avisos.append(Warning(
+            "La caché por defecto es LocMemCache: cada proceso del servidor tiene la suya "
+            "(usuarios, sesiones y contadores no se comparten).",
+            hint="Con más de un worker usa DJANGO_CACHE=redis o memcached.",
+            id='rendimiento.W008',
+        ))
+        if any(getattr(settings, 'LIMITE_ENVIOS', {}).values()):
+            avisos.append(Warning(
+                "LIMITE_ENVIOS guarda sus cubos en una LocMemCache: cada worker aplica el límite "
+                "por su cuenta y el límite real se multiplica por el número de workers.",
+                hint="Usa DJANGO_CACHE=redis o memcached, o un solo worker.",
+                id='rendimiento.W009',
+            ))
+
+    for plantillas in settings.TEMPLATES:
+        opciones = plantillas.get('OPTIONS', {})
+        if opciones.get('debug'):
+            avisos.append(Warning(
+                "Las plantillas tienen 'debug' activo.",
+                id='rendimiento.W005',
+            ))
+        cargadores = opciones.get('loaders')
+        if cargadores and not any(
+            isinstance(cargador, (tuple, list)) and cargador[0] == 'django.template.loaders.cached.Loader'
+            for cargador in cargadores
+        ):
+            avisos.append(Warning(
+                "Las plantillas se leen y compilan en cada petición (sin django.template.loaders.cached.Loader).",
+                id='rendimiento.W006',
+            ))
+
+    estaticos = settings.STORAGES.get('staticfiles', {}).get('BACKEND', '')
+    if estaticos == 'django.contrib.staticfiles.storage.StaticFilesStorage':
+        avisos.append(Warning(
+            "Los archivos estáticos se sirven sin hash en el nombre: el navegador no puede cachearlos a largo plazo.",
+            hint="Usa proyect.estaticos.EstaticosComprimidos y ejecuta collectstatic.",
+            id='rendimiento.W007',
+        ))
+    return avisos
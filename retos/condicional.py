@@ -0,0 +1,81 @@
+"""
+GET CONDICIONAL (ETag) PARA LAS PÁGINAS DE RETOS Y RANKING
+==========================================================
+
+Las vistas de lectura sólo cambian cuando cambia un reto, cuando el usuario
+hace un intento o cuando se recalcula el ranking. Con validadores baratos
+(una o dos consultas pequeñas) el navegador o el proxy reciben un
+``304 Not Modified`` sin que la vista ejecute sus consultas completas.
+
+Componentes de los validadores:
+- ``Reto.fecha_modificacion``: cambia al editar el reto o sus estadísticas
+- ``PerfilUsuario.version_progreso``: cambia con cada intento del usuario
+- ``ContadorGeneracion``: generación del ranking y del catálogo
+"""
+
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def etag_usuario(request):
+    """Parte del ETag que identifica al usuario y la versión de su progreso"""
+    usuario = request.user
+    if not usuario.is_authenticated:
+        return 'anon'
+    from cuentas.models import PerfilUsuario
+    version = PerfilUsuario.objects.filter(usuario_id=usuario.pk).values_list(
+        'version_progreso', flat=True
+    ).first()
+    return f"u{usuario.pk}.{version or 0}.{int(usuario.is_staff)}"
+
+
+def hay_mensajes_pendientes(request):
+    """True si hay mensajes flash por mostrar (un 304 los ocultaría)"""
+    # len() no marca los mensajes como leídos
+    return len(get_messages(request)) > 0
+
+
+def condicional(etag_func):
+    """Aplica GET condicional con ``etag_func`` y cabeceras de revalidación.
+
+    ``etag_func(request, *args, **kwargs)`` puede devolver ``None`` para
+    desactivar la validación en una petición concreta. Admite vistas
+    síncronas y ``async``.
+    """
+    def etag_seguro(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or hay_mensajes_pendientes(request):
+            return None
+        return etag_func(request, *args, **kwargs)
+
+    def revalidar(request, response):
+        if response.has_header('ETag'):
+            # Revalidar siempre; el contenido depende de la cookie de sesión
+            if request.user.is_authenticated:
+                patch_cache_control(response, no_cache=True, private=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+        return response
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapper_async(request, *args, **kwargs):
+                # El ETag consulta la base y request.user: se calcula fuera del event loop
+                etag = await sync_to_async(etag_seguro)(request, *args, **kwargs)
+                vista_condicional = condition(etag_func=lambda *a, **k: etag)(view_func)
+                response = await vista_condicional(request, *args, **kwargs)
+                return await sync_to_async(revalidar)(request, response)
+            return _wrapper_async
+
+        vista_condicional = condition(etag_func=etag_seguro)(view_func)
+
+        @wraps(view_func)
+        def _wrapper(request, *args, **kwargs):
+            return revalidar(request, vista_condicional(request, *args, **kwargs))
+        return _wrapper
+    return decorator
@@ -0,0 +1,86 @@
+"""
+CACHÉ EN PROCESO DE LA CONFIGURACIÓN DEL LISTADO
+================================================
+
+Guarda en memoria del proceso la ``ConfiguracionOrdenamiento`` activa y la
+lista de categorías, que cambian muy rara vez pero se leían en cada carga
+de ``ListaRetosView``.
+
+La invalidación entre procesos (varios workers) usa la generación
+``ContadorGeneracion.CATALOGO`` guardada en la base de datos: se incrementa
+al guardar/borrar categorías o configuraciones, y cada proceso compara su
+copia con ella como mucho una vez cada ``RETOS_CONFIG_CACHE_SEGUNDOS``.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Categoria, ConfiguracionOrdenamiento, ContadorGeneracion
+
+ORDEN_POR_DEFECTO = 'fecha'
+RETOS_POR_PAGINA = 12
+
+
+class CacheConfiguracion:
+    """Configuración activa y categorías, compartidas por todas las peticiones del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generacion = None
+        self._verificado = 0.0
+        self._configuracion = None
+        self._categorias = ()
+
+    @property
+    def intervalo(self):
+        return getattr(settings, 'RETOS_CONFIG_CACHE_SEGUNDOS', 5)
+
+    def invalidar(self):
+        """Olvida la copia local (la próxima lectura vuelve a la base de datos)"""
+        with self._lock:
+            self._generacion = None
+
+    def _vigente(self):
+        ahora = time.monotonic()
+        if self._generacion is not None and ahora - self._verificado < self.intervalo:
+            return
+        with self._lock:
+            generacion = ContadorGeneracion.obtener(ContadorGeneracion.CATALOGO)
+            if generacion != self._generacion:
+                self._configuracion = ConfiguracionOrdenamiento.get_configuracion_activa()
+                self._categorias = tuple(Categoria.objects.all())
+                self._generacion = generacion
+            self._verificado = ahora
+
+    @property
+    def configuracion(self):
+        self._vigente()
+        return self._configuracion
+
+    @property
+    def categorias(self):
+        self._vigente()
+        return self._categorias
+
+    @property
+    def generacion(self):
+        """Generación del catálogo con la que se cargó la copia local"""
+        self._vigente()
+        return self._generacion
+
+    @property
+    def orden_por_defecto(self):
+        configuracion = self.configuracion
+        return configuracion.orden_por_defecto if configuracion else ORDEN_POR_DEFECTO
+
+    @property
+    def retos_por_pagina(self):
+        configuracion = self.configuracion
+        if configuracion and configuracion.max_retos_por_pagina > 0:
+            return configuracion.max_retos_por_pagina
+        return RETOS_POR_PAGINA
+
+
+cache_configuracion = CacheConfiguracion()
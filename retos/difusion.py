@@ -0,0 +1,191 @@
+"""
+DIFUSIÓN EN VIVO (SERVER-SENT EVENTS)
+=====================================
+
+El ranking y el detalle de cada reto se recargaban una y otra vez para ver
+cambiar posiciones y tasas de éxito. Ahora la página abre un ``EventSource``
+y recibe sólo las diferencias:
+
+- canal ``ranking``: posiciones que cambiaron, nuevo podio y totales
+  (lo publican ``Ranking.actualizar_ranking`` y, en cada alta,
+  ``Ranking.agregar_usuario``);
+- canal ``reto-<pk>``: intentos totales, exitosos y ``tasa_exito``
+  (lo publica ``Reto.actualizar_estadisticas``).
+
+``Difusor`` es un pub/sub en memoria del proceso: publicar no toca la base de
+datos y cada mensaje se serializa una sola vez para todos los suscriptores.
+Sólo llega a los clientes conectados al mismo proceso, así que se despliega
+con un único proceso ASGI (o detrás de un pub/sub externo si hiciera falta
+escalar). Bajo WSGI Django consumiría el flujo entero antes de responder:
+sin ``settings.EVENTOS_VIVO`` (``proyect/asgi.py`` lo activa) las vistas de
+eventos responden ``204`` y el navegador deja de reconectar.
+
+Cada mensaje lleva un id ``<arranque>-<n>`` (``n`` correlativo por canal) y
+cada canal guarda los últimos ``HISTORIAL`` mensajes. Al reconectar (``Last-Event-ID``) o al abrir la página
+(``?desde=`` con el último id en el momento de renderizarla) se reenvía lo
+que el cliente no vio; si ya no está en el historial se le pide recargar.
+"""
+
+import asyncio
+import json
+import threading
+import uuid
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+
+CANAL_RANKING = 'ranking'
+
+HISTORIAL = 100          # mensajes guardados por canal para reenviar al reconectar
+TAMANO_COLA = 100        # mensajes pendientes por cliente; si se llena se le pide recargar
+LATIDO_SEGUNDOS = 15     # comentario periódico para que los proxies no cierren la conexión
+RECONEXION_MS = 3000
+
+# Distingue los ids de este proceso de los de un arranque anterior
+ARRANQUE = uuid.uuid4().hex[:8]
+
+
+def canal_reto(pk):
+    return f'reto-{pk}'
+
+
+def mensaje_sse(evento, datos, id_evento=None):
+    lineas = []
+    if id_evento is not None:
+        lineas.append(f'id: {id_evento}')
+    lineas.append(f'event: {evento}')
+    lineas.append(f'data: {json.dumps(datos, separators=(",", ":"))}')
+    return '\n'.join(lineas) + '\n\n'
+
+
+MENSAJE_RECARGAR = mensaje_sse('recargar', {})
+
+
+class Suscripcion:
+    """Cola de un cliente, ligada al bucle de eventos que la consume"""
+
+    def __init__(self, canal, bucle):
+        self.canal = canal
+        self.bucle = bucle
+        self.cola = asyncio.Queue(maxsize=TAMANO_COLA)
+        self.desbordada = False
+
+    def entregar(self, mensaje):
+        # Se llama desde cualquier hilo (la escritura ocurre en el hilo de la vista)
+        try:
+            self.bucle.call_soon_threadsafe(self._poner, mensaje)
+        except RuntimeError:
+            pass  # bucle cerrado: el cliente ya se fue
+
+    def _poner(self, mensaje):
+        if self.desbordada:
+            return
+        if self.cola.full():
+            # Cliente demasiado lento: descartar lo pendiente y que recargue la página
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(MENSAJE_RECARGAR)
+            self.desbordada = True
+            return
+        self.cola.put_nowait(mensaje)
+
+
+class Difusor:
+    """Pub/sub en memoria con historial corto por canal"""
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._suscripciones = defaultdict(set)
+        self._historial = defaultdict(lambda: deque(maxlen=HISTORIAL))
+        self._contadores = defaultdict(int)
+
+    def tiene_suscriptores(self, canal):
+        return bool(self._suscripciones.get(canal))
+
+    def ultimo_id(self, canal):
+        """Id del último mensaje del canal (para ``?desde=`` al renderizar la página)"""
+        return f'{ARRANQUE}-{self._contadores.get(canal, 0)}'
+
+    def publicar(self, canal, evento, datos):
+        with self._candado:
+            self._contadores[canal] += 1
+            numero = self._contadores[canal]
+            mensaje = mensaje_sse(evento, datos, f'{ARRANQUE}-{numero}')
+            self._historial[canal].append((numero, mensaje))
+            for suscripcion in self._suscripciones.get(canal, ()):
+                suscripcion.entregar(mensaje)
+
+    def publicar_al_confirmar(self, canal, evento, datos):
+        """Publica cuando se confirme la transacción en curso (de inmediato si no hay)"""
+        transaction.on_commit(lambda: self.publicar(canal, evento, datos))
+
+    def suscribir(self, canal, desde=None):
+        """Registra un cliente y retorna (suscripción, mensajes que no vio)
+
+        Se hace bajo el mismo candado que ``publicar``: ningún mensaje se
+        pierde ni se repite entre el historial y la cola.
+        """
+        suscripcion = Suscripcion(canal, asyncio.get_running_loop())
+        with self._candado:
+            pendientes = self._pendientes(canal, desde)
+            self._suscripciones[canal].add(suscripcion)
+        return suscripcion, pendientes
+
+    def cancelar(self, suscripcion):
+        with self._candado:
+            suscripciones = self._suscripciones.get(suscripcion.canal)
+            if suscripciones is not None:
+                suscripciones.discard(suscripcion)
+                if not suscripciones:
+                    del self._suscripciones[suscripcion.canal]
+
+    def _pendientes(self, canal, desde):
+        arranque, _, numero = (desde or '').partition('-')
+        if arranque != ARRANQUE or not numero.isdigit() or int(numero) > self._contadores.get(canal, 0):
+            # Sin id o de un arranque anterior: el historial no sirve, se empieza de cero
+            return []
+        numero = int(numero)
+        historial = self._historial.get(canal, ())
+        if historial and historial[0][0] > numero + 1:
+            # El cliente se perdió mensajes que ya salieron del historial
+            return [MENSAJE_RECARGAR]
+        return [mensaje for n, mensaje in historial if n > numero]
+
+
+difusor = Difusor()
+
+
+async def _flujo(canal, desde):
+    suscripcion, pendientes = difusor.suscribir(canal, desde)
+    try:
+        yield f'retry: {RECONEXION_MS}\n\n'
+        for mensaje in pendientes:
+            yield mensaje
+        while True:
+            try:
+                yield await asyncio.wait_for(suscripcion.cola.get(), LATIDO_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield ': latido\n\n'
+    finally:
+        # También al desconectarse el cliente (Django cancela la respuesta)
+        difusor.cancelar(suscripcion)
+
+
+def eventos_desde(canal):
+    """Valor de ``?desde=`` para la página, o None si no hay eventos en vivo (WSGI)"""
+    if settings.EVENTOS_VIVO:
+        return difusor.ultimo_id(canal)
+    return None
+
+
+def respuesta_eventos(request, canal):
+    """Respuesta ``text/event-stream`` con los mensajes del canal"""
+    if not settings.EVENTOS_VIVO:
+        return HttpResponse(status=204)
+    desde = request.headers.get('Last-Event-ID') or request.GET.get('desde')
+    response = StreamingHttpResponse(_flujo(canal, desde), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: no acumular el flujo
+    return response
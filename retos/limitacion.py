@@ -0,0 +1,192 @@
+"""
+LÍMITE DE ENVÍOS POR USUARIO E IP (TOKEN BUCKET)
+================================================
+
+``intentar_reto`` aceptaba cualquier cantidad de POST y cada uno, aunque
+fuera a rechazarse, costaba varias consultas. Un script podía saturar la
+única conexión de escritura de SQLite.
+
+``limitar_envios`` pone delante de la vista un token bucket por usuario y
+otro por IP (``settings.LIMITE_ENVIOS``): una ráfaga de ``capacidad``
+envíos y después ``por_minuto`` sostenidos. Sin tokens responde ``429``
+con ``Retry-After`` antes de cualquier consulta: el usuario sale del id
+guardado en la sesión, sin cargarlo.
+
+Los cubos viven en la caché (``default``): sólo con Redis o Memcached se
+comparten entre procesos. Con ``LocMemCache`` cada worker lleva los suyos,
+así que el límite efectivo se multiplica por el número de workers
+(``check --deploy`` lo avisa con ``rendimiento.W009``). Cada cubo es un
+único entero, el instante en que volvería a estar lleno (GCRA, equivalente
+a un token bucket). Se consume con ``incr``, que es atómico en esos
+backends, y un envío rechazado devuelve su token con ``decr``.
+
+Los envíos permitidos y rechazados se cuentan en la misma caché y
+``texto_metricas`` los exporta en formato Prometheus (vista ``metricas``).
+"""
+
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PREFIJO = 'limitacion'
+
+# Contadores exportados (en la caché, sin caducidad)
+PERMITIDOS = 'permitidos'
+RECHAZADOS = 'rechazados'
+AMBITOS = ('usuario', 'ip')
+
+
+def limites():
+    return getattr(settings, 'LIMITE_ENVIOS', {})
+
+
+def clave_cubo(ambito, identificador):
+    return f'{PREFIJO}:cubo:{ambito}:{identificador}'
+
+
+def clave_contador(resultado, ambito=None):
+    return f'{PREFIJO}:{resultado}' + (f':{ambito}' if ambito else '')
+
+
+def _ahora_ms():
+    return int(time.time() * 1000)
+
+
+def _sumar(clave, cantidad=1):
+    try:
+        cache.incr(clave, cantidad)
+    except ValueError:
+        # No existía: la crea sin caducidad (si otro proceso se adelantó, suma sobre la suya)
+        if not cache.add(clave, cantidad, None):
+            cache.incr(clave, cantidad)
+
+
+class Cubo:
+    """Token bucket de ``capacidad`` tokens que se rellena a ``por_minuto``"""
+
+    def __init__(self, clave, capacidad, por_minuto):
+        self.clave = clave
+        self.intervalo = max(1, round(60000 / por_minuto))  # ms por token
+        self.rafaga = capacidad * self.intervalo
+        self.caducidad = math.ceil(self.rafaga / 1000) + 1
+
+    def consumir(self):
+        """Toma un token; retorna None si pudo o los segundos a esperar si no"""
+        ahora = _ahora_ms()
+        try:
+            lleno_en = cache.incr(self.clave, self.intervalo)
+        except ValueError:
+            lleno_en = None
+        if lleno_en is None or lleno_en - self.intervalo < ahora:
+            # Cubo nuevo, caducado o que ya se había rellenado: lleno, se empieza desde ahora
+            cache.set(self.clave, ahora + self.intervalo, self.caducidad)
+            return None
+        if lleno_en - ahora > self.rafaga:
+            cache.decr(self.clave, self.intervalo)
+            return max(1, math.ceil((lleno_en - self.rafaga - ahora) / 1000))
+        # incr no renueva la caducidad: sin esto el cubo se vaciaría antes de rellenarse
+        cache.touch(self.clave, math.ceil((lleno_en - ahora) / 1000) + 1)
+        return None
+
+    def devolver(self):
+        try:
+            cache.decr(self.clave, self.intervalo)
+        except ValueError:
+            pass
+
+
+def ip_cliente(request):
+    """IP del cliente; detrás de un proxy, la de ``settings.CABECERA_IP_CLIENTE``"""
+    cabecera = getattr(settings, 'CABECERA_IP_CLIENTE', None)
+    if cabecera and request.META.get(cabecera):
+        return request.META[cabecera].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def cubos(request):
+    """Cubos (ámbito, Cubo) que aplican a la petición, según ``LIMITE_ENVIOS``"""
+    identificadores = {
+        # Sin cargar el usuario: basta el id que guarda la sesión
+        'usuario': request.session.get(SESSION_KEY) if hasattr(request, 'session') else None,
+        'ip': ip_cliente(request),
+    }
+    resultado = []
+    for ambito in AMBITOS:
+        limite = limites().get(ambito)
+        if limite and identificadores[ambito]:
+            clave = clave_cubo(ambito, identificadores[ambito])
+            resultado.append((ambito, Cubo(clave, limite['capacidad'], limite['por_minuto'])))
+    return resultado
+
+
+def comprobar(request):
+    """Consume un token de cada cubo; retorna (ámbito, segundos) si alguno está vacío"""
+    consumidos = []
+    for ambito, cubo in cubos(request):
+        espera = cubo.consumir()
+        if espera is not None:
+            # Un envío rechazado no gasta los tokens que ya tomó de otros cubos
+            for anterior in consumidos:
+                anterior.devolver()
+            _sumar(clave_contador(RECHAZADOS, ambito))
+            return ambito, espera
+        consumidos.append(cubo)
+    _sumar(clave_contador(PERMITIDOS))
+    return None
+
+
+def respuesta_limitada(request, espera):
+    return HttpResponse(
+        f'Demasiados envíos seguidos. Vuelve a intentarlo en {espera} s.',
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+
+
+def limitar_envios(respuesta=respuesta_limitada):
+    """Decorador: responde 429 a los POST que superan ``LIMITE_ENVIOS``
+
+    Debe ir por fuera de ``login_required`` para rechazar antes de cargar
+    el usuario. ``respuesta(request, segundos)`` construye el 429.
+    """
+    def decorador(view_func):
+        @wraps(view_func)
+        def _wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                limitado = comprobar(request)
+                if limitado is not None:
+                    response = respuesta(request, limitado[1])
+                    response['Retry-After'] = str(limitado[1])
+                    return response
+            return view_func(request, *args, **kwargs)
+        return _wrapper
+    return decorador
+
+
+def contadores():
+    """Envíos permitidos y rechazados (por ámbito) desde que se vació la caché"""
+    claves = [clave_contador(PERMITIDOS)] + [clave_contador(RECHAZADOS, ambito) for ambito in AMBITOS]
+    valores = cache.get_many(claves)
+    return {
+        PERMITIDOS: valores.get(claves[0], 0),
+        RECHAZADOS: {ambito: valores.get(clave, 0) for ambito, clave in zip(AMBITOS, claves[1:])},
+    }
+
+
+def texto_metricas():
+    """Contadores en el formato de texto de Prometheus"""
+    datos = contadores()
+    lineas = [
+        '# HELP retos_envios_permitidos_total Envíos de intentos que pasaron el límite.',
+        '# TYPE retos_envios_permitidos_total counter',
+        f'retos_envios_permitidos_total {datos[PERMITIDOS]}',
+        '# HELP retos_envios_rechazados_total Envíos de intentos rechazados con 429.',
+        '# TYPE retos_envios_rechazados_total counter',
+    ]
+    for ambito, total in datos[RECHAZADOS].items():
+        lineas.append(f'retos_envios_rechazados_total{{ambito="{ambito}"}} {total}')
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from retos.basedatos import aplicar_pragmas, pragmas_configurados
+
+# Tablas mínimas con el mismo patrón de acceso que el listado de retos y intentar_reto
+ESQUEMA = """
+CREATE TABLE reto (
+    id INTEGER PRIMARY KEY, titulo TEXT, activo INTEGER,
+    intentos_totales INTEGER DEFAULT 0, intentos_exitosos INTEGER DEFAULT 0
+);
+CREATE TABLE intento (
+    id INTEGER PRIMARY KEY, usuario_id INTEGER, reto_id INTEGER,
+    respuesta TEXT, es_correcto INTEGER, fecha REAL
+);
+CREATE INDEX intento_usuario_reto ON intento (usuario_id, reto_id);
+"""
+
+LECTURA = """
+SELECT r.id, r.titulo, r.intentos_totales, r.intentos_exitosos,
+       (SELECT COUNT(*) FROM intento i WHERE i.reto_id = r.id AND i.usuario_id = ?)
+FROM reto r WHERE r.activo = 1 ORDER BY r.id LIMIT 20
+"""
+
+ESCENARIOS = (
+    # (nombre, pragmas, BEGIN de las escrituras)
+    ('Antes (por defecto)', {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, 'BEGIN'),
+    ('Después (settings)', None, 'BEGIN IMMEDIATE'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide lecturas y escrituras concurrentes en SQLite con los pragmas por defecto y "
+        "con los de settings.SQLITE_PRAGMAS (sobre una base temporal, no la del proyecto)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lectores', type=int, default=8)
+        parser.add_argument('--escritores', type=int, default=4)
+        parser.add_argument('--segundos', type=float, default=5.0)
+        parser.add_argument('--retos', type=int, default=200)
+
+    def handle(self, *args, **options):
+        resultados = []
+        for nombre, pragmas, inicio in ESCENARIOS:
+            if pragmas is None:
+                pragmas = pragmas_configurados()
+            with tempfile.TemporaryDirectory() as carpeta:
+                ruta = os.path.join(carpeta, 'benchmark.sqlite3')
+                self.preparar(ruta, pragmas, options['retos'])
+                resultados.append((nombre, self.medir(ruta, pragmas, inicio, options)))
+
+        segundos = options['segundos']
+        self.stdout.write(
+            f"{options['lectores']} lectores, {options['escritores']} escritores, {segundos:g} s por escenario\n"
+        )
+        self.stdout.write(f"{'Escenario':<22}{'lecturas/s':>12}{'escrituras/s':>14}{'bloqueos':>10}")
+        for nombre, (lecturas, escrituras, bloqueos) in resultados:
+            self.stdout.write(
+                f"{nombre:<22}{lecturas / segundos:>12.0f}{escrituras / segundos:>14.0f}{bloqueos:>10}"
+            )
+
+    def conectar(self, ruta, pragmas):
+        # isolation_level=None: las transacciones se abren explícitamente con BEGIN
+        conexion = sqlite3.connect(ruta, timeout=5, isolation_level=None, check_same_thread=False)
+        aplicar_pragmas(conexion.cursor(), pragmas)
+        return conexion
+
+    def preparar(self, ruta, pragmas, retos):
+        conexion = self.conectar(ruta, pragmas)
+        conexion.executescript(ESQUEMA)
+        conexion.executemany(
+            "INSERT INTO reto (id, titulo, activo) VALUES (?, ?, 1)",
+            ((i, f'Reto {i}') for i in range(1, retos + 1)),
+        )
+        conexion.close()
+
+    def medir(self, ruta, pragmas, inicio, options):
+        fin = time.monotonic() + options['segundos']
+        contadores = {'lecturas': 0, 'escrituras': 0, 'bloqueos': 0}
+        candado = threading.Lock()
+        retos = options['retos']
+
+        def sumar(clave):
+            with candado:
+                contadores[clave] += 1
+
+        def lector(numero):
+            conexion = self.conectar(ruta, pragmas)
+            while time.monotonic() < fin:
+                try:
+                    conexion.execute(LECTURA, (numero,)).fetchall()
+                    sumar('lecturas')
+                except sqlite3.OperationalError:
+                    sumar('bloqueos')
+            conexion.close()
+
+        def escritor(numero):
+            conexion = self.conectar(ruta, pragmas)
+            i = 0
+            while time.monotonic() < fin:
+                i += 1
+                reto = i % retos + 1
+                try:
+                    # Como Intento.registrar: insertar el intento y actualizar las estadísticas del reto
+                    conexion.execute(inicio)
+                    conexion.execute(
+                        "SELECT COUNT(*) FROM intento WHERE usuario_id = ? AND reto_id = ?", (numero, reto)
+                    ).fetchone()
+                    conexion.execute(
+                        "INSERT INTO intento (usuario_id, reto_id, respuesta, es_correcto, fecha) VALUES (?, ?, ?, ?, ?)",
+                        (numero, reto, '42', i % 2, time.time()),
+                    )
+                    conexion.execute(
+                        "UPDATE reto SET intentos_totales = intentos_totales + 1, "
+                        "intentos_exitosos = intentos_exitosos + ? WHERE id = ?",
+                        (i % 2, reto),
+                    )
+                    conexion.execute("COMMIT")
+                    sumar('escrituras')
+                except sqlite3.OperationalError:
+                    if conexion.in_transaction:
+                        conexion.execute("ROLLBACK")
+                    sumar('bloqueos')
+            conexion.close()
+
+        hilos = [threading.Thread(target=lector, args=(n,)) for n in range(options['lectores'])]
+        hilos += [threading.Thread(target=escritor, args=(n,)) for n in range(options['escritores'])]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return contadores['lecturas'], contadores['escrituras'], contadores['bloqueos']
@@ -0,0 +1,146 @@
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+RUTAS = ('/', '/juego/ranking/')
+MODOS = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga concurrente sobre las vistas de lectura servidas por WSGIHandler (vistas síncronas "
+        "en un pool de hilos) y por ASGIHandler (vistas async en un bucle de eventos), en el "
+        "mismo proceso y sin servidor. Usa la base de datos configurada: carga antes datos "
+        "(p. ej. loaddata fixtures/datos_ejemplo.json)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500, help="Peticiones por ruta")
+        parser.add_argument('--concurrencia', type=int, default=50)
+        parser.add_argument('--ruta', action='append', dest='rutas', help="Por defecto: / y /juego/ranking/")
+        parser.add_argument('--modo', choices=MODOS, action='append', dest='modos')
+        # Uso interno: cada modo se mide en un proceso nuevo con DJANGO_VISTAS_ASYNC fijado
+        parser.add_argument('--hijo', choices=MODOS, help="(interno)")
+
+    def handle(self, *args, **options):
+        rutas = options['rutas'] or list(RUTAS)
+        if options['hijo']:
+            self.medir_hijo(options['hijo'], rutas, options)
+            return
+
+        resultados = {}
+        for modo in options['modos'] or MODOS:
+            resultados[modo] = self.lanzar(modo, rutas, options)
+
+        self.stdout.write(
+            f"{options['peticiones']} peticiones por ruta, concurrencia {options['concurrencia']}\n"
+        )
+        self.stdout.write(f"{'Ruta':<20}{'Modo':<6}{'pet/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'errores':>9}")
+        for ruta in rutas:
+            for modo, medidas in resultados.items():
+                m = medidas[ruta]
+                self.stdout.write(
+                    f"{ruta:<20}{modo:<6}{m['por_segundo']:>8.0f}{m['p50']:>9.1f}{m['p95']:>9.1f}{m['errores']:>9}"
+                )
+
+    def lanzar(self, modo, rutas, options):
+        # urls.py elige las vistas al importarse: hace falta un proceso por modo
+        entorno = {**os.environ, 'DJANGO_VISTAS_ASYNC': '1' if modo == 'asgi' else '0'}
+        orden = [
+            sys.executable, '-m', 'django', 'benchmark_vistas', '--hijo', modo,
+            '--peticiones', str(options['peticiones']), '--concurrencia', str(options['concurrencia']),
+        ]
+        for ruta in rutas:
+            orden += ['--ruta', ruta]
+        proceso = subprocess.run(orden, env=entorno, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if proceso.returncode:
+            raise CommandError(f"Falló la medición {modo}:\n{proceso.stderr}")
+        return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    def medir_hijo(self, modo, rutas, options):
+        if settings.VISTAS_ASYNC != (modo == 'asgi'):
+            raise CommandError("DJANGO_VISTAS_ASYNC no corresponde al modo medido.")
+        medir = self.medir_wsgi if modo == 'wsgi' else self.medir_asgi
+        resultados = {}
+        for ruta in rutas:
+            medir(ruta, options['concurrencia'], options['concurrencia'])  # calentamiento
+            inicio = time.perf_counter()
+            tiempos, errores = medir(ruta, options['peticiones'], options['concurrencia'])
+            total = time.perf_counter() - inicio
+            cuantiles = statistics.quantiles(tiempos, n=20)
+            resultados[ruta] = {
+                'por_segundo': len(tiempos) / total,
+                'p50': statistics.median(tiempos) * 1000,
+                'p95': cuantiles[-1] * 1000,
+                'errores': errores,
+            }
+        self.stdout.write(json.dumps(resultados))
+
+    def medir_wsgi(self, ruta, peticiones, concurrencia):
+        aplicacion = WSGIHandler()
+
+        def peticion(_):
+            estados = []
+            entorno = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http',
+                'wsgi.errors': sys.stderr,
+            }
+            inicio = time.perf_counter()
+            respuesta = aplicacion(entorno, lambda estado, cabeceras: estados.append(estado))
+            b''.join(respuesta)
+            respuesta.close()
+            return time.perf_counter() - inicio, estados[0].startswith('200')
+
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            medidas = list(pool.map(peticion, range(peticiones)))
+        return [tiempo for tiempo, _ in medidas], sum(1 for _, ok in medidas if not ok)
+
+    def medir_asgi(self, ruta, peticiones, concurrencia):
+        aplicacion = ASGIHandler()
+
+        async def peticion(limite):
+            async with limite:
+                mensajes = []
+                desconexion = asyncio.Event()
+
+                async def recibir():
+                    if not mensajes:
+                        mensajes.append(None)
+                        return {'type': 'http.request', 'body': b'', 'more_body': False}
+                    await desconexion.wait()
+                    return {'type': 'http.disconnect'}
+
+                async def enviar(mensaje):
+                    mensajes.append(mensaje)
+
+                alcance = {
+                    'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                    'method': 'GET', 'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(),
+                    'query_string': b'', 'root_path': '', 'headers': [(b'host', b'localhost')],
+                    'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+                }
+                inicio = time.perf_counter()
+                await aplicacion(alcance, recibir, enviar)
+                desconexion.set()
+                estado = next(m['status'] for m in mensajes if m and m['type'] == 'http.response.start')
+                return time.perf_counter() - inicio, estado == 200
+
+        async def todas():
+            limite = asyncio.Semaphore(concurrencia)
+            return await asyncio.gather(*(peticion(limite) for _ in range(peticiones)))
+
+        medidas = asyncio.run(todas())
+        return [tiempo for tiempo, _ in medidas], sum(1 for _, ok in medidas if not ok)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from juego.recalculo import recalculo_diferido
+from retos.models import Reto
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra retos (y sus intentos en cascada) recalculando perfiles, "
+        "resumen diario y ranking una sola vez al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="Ids de los retos a borrar")
+        parser.add_argument('--inactivos', action='store_true', help="Borrar todos los retos inactivos")
+
+    def handle(self, *args, **options):
+        if not options['ids'] and not options['inactivos']:
+            raise CommandError("Indica ids de retos o --inactivos")
+
+        retos = Reto.objects.all()
+        if options['ids']:
+            retos = retos.filter(pk__in=options['ids'])
+        if options['inactivos']:
+            retos = retos.filter(activo=False)
+
+        with recalculo_diferido() as lote:
+            borrados, por_modelo = retos.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Retos borrados: {por_modelo.get('retos.Reto', 0)} "
+            f"({borrados} filas en total, {len(lote.usuarios)} usuarios recalculados)."
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from cuentas.models import PerfilUsuario
+from retos.models import Reto
+
+
+class Command(BaseCommand):
+    help = "Genera las miniaturas de las imágenes de retos y fotos de perfil ya subidas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todas', action='store_true',
+                            help="Regenerar también las que ya tienen miniaturas")
+
+    def handle(self, *args, **options):
+        fuentes = (
+            ('retos', Reto.objects.exclude(imagen_reto='').exclude(imagen_reto__isnull=True), 'imagen_miniaturas'),
+            ('perfiles', PerfilUsuario.objects.exclude(foto_perfil='').exclude(foto_perfil__isnull=True), 'foto_miniaturas'),
+        )
+        for nombre, queryset, bandera in fuentes:
+            if not options['todas']:
+                queryset = queryset.filter(**{bandera: False})
+            generadas = fallidas = 0
+            for objeto in queryset.iterator():
+                if objeto.crear_miniaturas():
+                    generadas += 1
+                else:
+                    fallidas += 1
+                    self.stderr.write(f"  No se pudo procesar {nombre} #{objeto.pk}")
+            self.stdout.write(self.style.SUCCESS(
+                f"Miniaturas de {nombre}: {generadas} generadas, {fallidas} con error."
+            ))
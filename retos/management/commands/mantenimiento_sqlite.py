@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento de la base de datos SQLite: ANALYZE, VACUUM incremental y "
+        "checkpoint del WAL. Sin opciones ejecuta las tres tareas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--analizar', action='store_true',
+                            help="Actualizar las estadísticas del planificador (ANALYZE)")
+        parser.add_argument('--vacuum', action='store_true',
+                            help="Devolver al sistema las páginas libres (PRAGMA incremental_vacuum)")
+        parser.add_argument('--paginas', type=int, default=0,
+                            help="Máximo de páginas a liberar con --vacuum (0 = todas)")
+        parser.add_argument('--convertir', action='store_true',
+                            help="Activar auto_vacuum=INCREMENTAL con un VACUUM completo (bloquea la base)")
+        parser.add_argument('--checkpoint', action='store_true',
+                            help="Volcar el WAL a la base y truncarlo (PRAGMA wal_checkpoint(TRUNCATE))")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"La base '{options['database']}' no es SQLite.")
+
+        todas = not (options['analizar'] or options['vacuum'] or options['checkpoint'])
+        with connection.cursor() as cursor:
+            if todas or options['analizar']:
+                self.analizar(cursor)
+            if todas or options['vacuum']:
+                self.vacuum(cursor, options['paginas'], options['convertir'])
+            if todas or options['checkpoint']:
+                self.checkpoint(cursor)
+
+    def pragma(self, cursor, nombre):
+        return cursor.execute(f"PRAGMA {nombre}").fetchone()[0]
+
+    def analizar(self, cursor):
+        cursor.execute("ANALYZE")
+        self.stdout.write(self.style.SUCCESS("ANALYZE: estadísticas del planificador actualizadas."))
+
+    def vacuum(self, cursor, paginas, convertir):
+        if self.pragma(cursor, 'auto_vacuum') != 2:
+            if not convertir:
+                self.stdout.write(self.style.WARNING(
+                    "VACUUM incremental: la base no tiene auto_vacuum=INCREMENTAL. "
+                    "Ejecuta una vez con --vacuum --convertir (VACUUM completo) en una ventana de mantenimiento."
+                ))
+                return
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+            self.stdout.write(self.style.SUCCESS("VACUUM completo: auto_vacuum=INCREMENTAL activado."))
+            return
+
+        libres = self.pragma(cursor, 'freelist_count')
+        # Cada paso libera una página: hay que consumir todas las filas del PRAGMA
+        cursor.execute(f"PRAGMA incremental_vacuum({int(paginas)})").fetchall()
+        liberadas = libres - self.pragma(cursor, 'freelist_count')
+        tamano = self.pragma(cursor, 'page_size')
+        self.stdout.write(self.style.SUCCESS(
+            f"VACUUM incremental: {liberadas} páginas liberadas ({liberadas * tamano / 1024:.0f} KiB)."
+        ))
+
+    def checkpoint(self, cursor):
+        if self.pragma(cursor, 'journal_mode') != 'wal':
+            self.stdout.write("Checkpoint: la base no está en modo WAL, nada que hacer.")
+            return
+        ocupada, paginas_wal, volcadas = cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if ocupada:
+            self.stdout.write(self.style.WARNING(
+                f"Checkpoint parcial: {volcadas} de {paginas_wal} páginas (hay lectores activos)."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Checkpoint: {volcadas} páginas volcadas, WAL truncado."))
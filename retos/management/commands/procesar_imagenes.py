@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from retos.models import TrabajoImagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker local que procesa las imágenes subidas (normaliza, genera miniaturas "
+        "y borra archivos reemplazados) desde la tabla TrabajoImagen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help="Procesar lo pendiente y terminar (para cron)")
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help="Segundos de espera cuando la cola está vacía")
+        parser.add_argument('--lote', type=int, default=10, help="Trabajos reclamados por vuelta")
+
+    def handle(self, *args, **options):
+        procesados = fallidos = 0
+        try:
+            while True:
+                TrabajoImagen.liberar_atascados()
+                trabajos = TrabajoImagen.reclamar(options['lote'])
+                if not trabajos:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+                for trabajo in trabajos:
+                    if trabajo.ejecutar():
+                        procesados += 1
+                    else:
+                        fallidos += 1
+                        self.stderr.write(f"  {trabajo}: {trabajo.error}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Imágenes procesadas: {procesados}, con error: {fallidos}."))
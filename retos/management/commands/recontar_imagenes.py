@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from retos.models import ArchivoContenido
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los contadores de referencias de las imágenes subidas a partir de los modelos."
+
+    def handle(self, *args, **options):
+        archivos, referencias = ArchivoContenido.recontar()
+        self.stdout.write(self.style.SUCCESS(
+            f"Contadores reconstruidos: {archivos} archivos con {referencias} referencias."
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('retos', '0007_reto_icono_por_defecto_reto_imagen_reto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorGeneracion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('valor', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de Generación',
+                'verbose_name_plural': 'Contadores de Generación',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:55
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('retos', '0008_contadorgeneracion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reto',
+            index=models.Index(django.db.models.functions.text.Upper('titulo'), name='reto_titulo_prefijo_idx'),
+        ),
+    ]
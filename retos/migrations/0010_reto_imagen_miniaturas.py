@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('retos', '0009_reto_titulo_prefijo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reto',
+            name='imagen_miniaturas',
+            field=models.BooleanField(default=False, editable=False, help_text='Las miniaturas de imagen_reto ya están generadas'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('retos', '0010_reto_imagen_miniaturas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(help_text='app_label.model_name del objeto', max_length=100)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('archivo', models.CharField(blank=True, help_text='Archivo subido a procesar (vacío si sólo hay que limpiar)', max_length=255)),
+                ('archivo_anterior', models.CharField(blank=True, help_text='Archivo reemplazado, a borrar', max_length=255)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Imagen',
+                'verbose_name_plural': 'Trabajos de Imagen',
+                'ordering': ['fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='trabajoimagen_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('retos', '0011_trabajoimagen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoContenido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=255, unique=True)),
+                ('referencias', models.PositiveIntegerField(default=0)),
+                ('tamano', models.PositiveBigIntegerField(default=0, help_text='Tamaño en bytes')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo de Contenido',
+                'verbose_name_plural': 'Archivos de Contenido',
+            },
+        ),
+    ]
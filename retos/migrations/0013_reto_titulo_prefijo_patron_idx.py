@@ -0,0 +1,31 @@
+from django.db import migrations
+
+# Sólo PostgreSQL: fuera de la intercalación "C", LIKE 'X%' no usa un índice
+# btree normal; el autocompletado del admin compara UPPER(titulo) LIKE 'X%'.
+NOMBRE = 'reto_titulo_prefijo_patron_idx'
+
+
+def crear_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabla = schema_editor.quote_name(apps.get_model('retos', 'Reto')._meta.db_table)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {NOMBRE} ON {tabla} (UPPER({schema_editor.quote_name("titulo")}) text_pattern_ops)'
+    )
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {NOMBRE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('retos', '0012_archivocontenido'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,128 @@
+"""
+MINIATURAS DE IMÁGENES SUBIDAS
+==============================
+
+Procesa con Pillow ``Reto.imagen_reto`` y ``PerfilUsuario.foto_perfil``
+para no servir la imagen original (hasta 5 MB) en avatares de 40 px o
+tarjetas de 150 px:
+
+- ``normalizar_imagen``: reduce el original a ``MAX_DIMENSION`` px,
+  aplica la orientación EXIF y lo recodifica sin metadatos.
+- ``generar_miniaturas``: variantes en ``<carpeta>/miniaturas/`` con el lado
+  corto igual al tamaño pedido (nunca se amplía), listas para
+  ``object-fit: cover``.
+
+El formato es WebP, o JPEG si Pillow no tiene WebP. Se ejecuta fuera de la
+petición, en el worker ``procesar_imagenes`` (ver ``TrabajoImagen``).
+"""
+
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+TAMANOS = (40, 96, 320)
+CARPETA_MINIATURAS = 'miniaturas'
+MAX_DIMENSION = 1600
+FORMATO = 'WEBP' if features.check('webp') else 'JPEG'
+EXTENSION = {'WEBP': 'webp', 'JPEG': 'jpg'}[FORMATO]
+CALIDAD = 82
+
+
+def ruta_miniatura(nombre, tamano):
+    """Ruta (en el storage) de la variante ``tamano`` de la imagen ``nombre``"""
+    carpeta, archivo = posixpath.split(nombre)
+    # Nombre completo (con extensión): foto.jpg y foto.webp no comparten variantes
+    return posixpath.join(carpeta, CARPETA_MINIATURAS, f'{archivo}.{tamano}.{EXTENSION}')
+
+
+def tamano_cercano(tamano):
+    """Menor variante que cubre ``tamano`` (o la mayor disponible)"""
+    for disponible in TAMANOS:
+        if disponible >= tamano:
+            return disponible
+    return TAMANOS[-1]
+
+
+def _reducir(imagen, tamano):
+    ancho, alto = imagen.size
+    escala = tamano / min(ancho, alto)
+    if escala >= 1:
+        return imagen.copy()
+    return imagen.resize((max(1, round(ancho * escala)), max(1, round(alto * escala))), Image.LANCZOS)
+
+
+def _abrir(campo):
+    """Imagen del ImageField ya orientada y en un modo que admite FORMATO"""
+    campo.open('rb')
+    try:
+        imagen = Image.open(campo)
+        imagen = ImageOps.exif_transpose(imagen)
+        modo = 'RGBA' if FORMATO == 'WEBP' and imagen.mode in ('RGBA', 'LA', 'P') else 'RGB'
+        return imagen.convert(modo)
+    finally:
+        campo.close()
+
+
+def normalizar_imagen(campo):
+    """Guarda una copia reducida a MAX_DIMENSION y sin metadatos del archivo del campo
+
+    No modifica el campo ni borra el original; retorna el nombre del nuevo archivo.
+    """
+    imagen = _abrir(campo)
+    imagen.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+    buffer = io.BytesIO()
+    # Pillow no copia EXIF/XMP al recodificar si no se le pasan explícitamente
+    imagen.save(buffer, FORMATO, quality=CALIDAD)
+    carpeta, archivo = posixpath.split(campo.name)
+    nombre = posixpath.join(carpeta, f'{posixpath.splitext(archivo)[0]}.{EXTENSION}')
+    return campo.storage.save(nombre, ContentFile(buffer.getvalue()))
+
+
+def generar_miniaturas(campo):
+    """Crea (o reemplaza) todas las variantes del archivo de un ImageField
+
+    Retorna la lista de rutas generadas.
+    """
+    storage = campo.storage
+    imagen = _abrir(campo)
+
+    rutas = []
+    for tamano in TAMANOS:
+        buffer = io.BytesIO()
+        _reducir(imagen, tamano).save(buffer, FORMATO, quality=CALIDAD)
+        ruta = ruta_miniatura(campo.name, tamano)
+        if storage.exists(ruta):
+            storage.delete(ruta)
+        rutas.append(storage.save(ruta, ContentFile(buffer.getvalue())))
+    return rutas
+
+
+def eliminar_miniaturas(campo):
+    """Borra las variantes del archivo de un ImageField (si existen)"""
+    for tamano in TAMANOS:
+        ruta = ruta_miniatura(campo.name, tamano)
+        if campo.storage.exists(ruta):
+            campo.storage.delete(ruta)
+
+
+def eliminar_imagen(storage, nombre):
+    """Borra un archivo de imagen y sus variantes (si existen)
+
+    Con un storage que cuenta referencias (``AlmacenamientoContenido``) sólo
+    libera una: el storage borra archivo y variantes al liberar la última.
+    """
+    if getattr(storage, 'borra_derivados', False):
+        storage.delete(nombre)
+        return
+    for ruta in [ruta_miniatura(nombre, tamano) for tamano in TAMANOS] + [nombre]:
+        if storage.exists(ruta):
+            storage.delete(ruta)
+
+
+def url_imagen(campo, tamano=None, disponibles=False):
+    """URL de la variante más cercana a ``tamano`` si ya se generó, o del original"""
+    if tamano and disponibles:
+        return campo.storage.url(ruta_miniatura(campo.name, tamano_cercano(int(tamano))))
+    return campo.url
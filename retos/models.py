@@ -15,17 +15,26 @@ Modelos principales:
 - Categoria: Clasificación de los retos
 - RespuestaAlternativa: Variaciones de respuestas correctas
 - ConfiguracionOrdenamiento: Cómo mostrar los retos
+- ContadorGeneracion: Contadores globales que cambian cuando cambia un dato compartido
 
 Trabaja en conjunto con la app "juego" que maneja la interacción del usuario.
 """
 
-from django.db import models
-from django.db.models.signals import pre_delete, post_delete
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Upper
+from django.db.models.signals import pre_delete, post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+import datetime
 import re
 
+from .difusion import canal_reto, difusor
+from .miniaturas import eliminar_imagen, generar_miniaturas, normalizar_imagen, url_imagen
+
 class Categoria(models.Model):
     """Categorías para clasificar los retos"""
     DIFICULTAD_CHOICES = [
@@ -47,7 +56,66 @@ class Categoria(models.Model):
     def __str__(self):
         return self.nombre
 
-class Reto(models.Model):
+class ImagenSubidaMixin:
+    """Encola el procesamiento de la imagen del modelo cuando se sube o se reemplaza
+
+    El modelo indica ``CAMPO_IMAGEN`` y ``BANDERA_MINIATURAS`` y puede
+    redefinir ``cambios_imagen_procesada`` para invalidar sus validadores
+    HTTP cuando el worker cambia el archivo, e ``imagen_procesada`` para
+    invalidar lo que tenga en caché.
+    """
+    CAMPO_IMAGEN = None
+    BANDERA_MINIATURAS = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        if cls.CAMPO_IMAGEN in field_names:
+            instancia._imagen_guardada = values[field_names.index(cls.CAMPO_IMAGEN)] or ''
+        return instancia
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or self.CAMPO_IMAGEN in fields:
+            self._imagen_guardada = getattr(self, self.CAMPO_IMAGEN).name or ''
+    
+    def save(self, *args, **kwargs):
+        if self.CAMPO_IMAGEN in self.get_deferred_fields():
+            return super().save(*args, **kwargs)
+        
+        archivo = getattr(self, self.CAMPO_IMAGEN)
+        anterior = getattr(self, '_imagen_guardada', '')
+        subida = bool(archivo) and not archivo._committed
+        if subida:
+            setattr(self, self.BANDERA_MINIATURAS, False)
+        super().save(*args, **kwargs)
+        
+        actual = archivo.name or ''
+        if actual != anterior:
+            # Fuera de la petición: normalizar y generar miniaturas, liberar el archivo anterior
+            TrabajoImagen.encolar(self, actual if subida else '', anterior)
+        self._imagen_guardada = actual
+    
+    def cambios_imagen_procesada(self):
+        """Campos extra a actualizar cuando el worker termina de procesar la imagen"""
+        return {}
+    
+    def imagen_procesada(self):
+        """Se llama después de que el worker o ``crear_miniaturas`` actualizan la imagen"""
+    
+    def crear_miniaturas(self):
+        """Genera las variantes de la imagen actual; si no se puede leer se sirve el original"""
+        try:
+            generar_miniaturas(getattr(self, self.CAMPO_IMAGEN))
+        except OSError:
+            return False
+        type(self).objects.filter(pk=self.pk).update(**{self.BANDERA_MINIATURAS: True})
+        setattr(self, self.BANDERA_MINIATURAS, True)
+        self.imagen_procesada()
+        return True
+
+
+class Reto(ImagenSubidaMixin, models.Model):
     """Modelo para los retos lógicos matemáticos"""
     DIFICULTAD_CHOICES = [
         ('facil', 'Fácil'),
@@ -96,6 +164,11 @@ class Reto(models.Model):
         null=True,
         help_text="Sube una imagen relacionada con el reto (opcional)"
     )
+    imagen_miniaturas = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Las miniaturas de imagen_reto ya están generadas"
+    )
     icono_por_defecto = models.CharField(
         max_length=50,
         blank=True,
@@ -121,6 +194,10 @@ class Reto(models.Model):
         verbose_name = "Reto"
         verbose_name_plural = "Retos"
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Búsqueda por prefijo del autocompletado del admin (retos.admin.filtrar_prefijo)
+            models.Index(Upper('titulo'), name='reto_titulo_prefijo_idx'),
+        ]
     
     def __str__(self):
         return f"{self.titulo} ({self.get_dificultad_display()})"
@@ -137,6 +214,30 @@ class Reto(models.Model):
         self.intentos_totales = Intento.objects.filter(reto=self).count()
         self.intentos_exitosos = Intento.objects.filter(reto=self, es_correcto=True).count()
         self.save()
+        difusor.publicar_al_confirmar(canal_reto(self.pk), 'estadisticas', {
+            'intentos_totales': self.intentos_totales,
+            'intentos_exitosos': self.intentos_exitosos,
+            'tasa_exito': self.calcular_tasa_exito(),
+        })
+    
+    @classmethod
+    def actualizar_estadisticas_masivo(cls, retos):
+        """Versión por lotes de actualizar_estadisticas: un único UPDATE con conteos agrupados
+
+        ``retos`` puede ser un queryset (de retos o de ids) o una lista de ids.
+        Retorna el número de retos actualizados.
+        """
+        from juego.models import Intento
+        intentos = Intento.objects.filter(reto=OuterRef('pk')).order_by().values('reto')
+        
+        def conteo(qs):
+            return Coalesce(Subquery(qs.annotate(n=Count('pk')).values('n')), 0)
+        
+        return cls.objects.filter(pk__in=retos).update(
+            intentos_totales=conteo(intentos),
+            intentos_exitosos=conteo(intentos.filter(es_correcto=True)),
+            fecha_modificacion=timezone.now(),
+        )
     
     def get_intentos_usuario(self, usuario):
         """Obtiene los intentos de un usuario específico para este reto"""
@@ -219,10 +320,17 @@ class Reto(models.Model):
         
         return False
     
-    def obtener_imagen(self):
-        """Retorna la imagen del reto si existe, o el icono por defecto"""
+    CAMPO_IMAGEN = 'imagen_reto'
+    BANDERA_MINIATURAS = 'imagen_miniaturas'
+    
+    def cambios_imagen_procesada(self):
+        # Nueva fecha para que el ETag del listado y del detalle cambie
+        return {'fecha_modificacion': timezone.now()}
+    
+    def obtener_imagen(self, tamano=None):
+        """Retorna la imagen del reto (la miniatura más cercana a ``tamano`` px si existe), o el icono por defecto"""
         if self.imagen_reto:
-            return self.imagen_reto.url
+            return url_imagen(self.imagen_reto, tamano, self.imagen_miniaturas)
         return self.icono_por_defecto or '🧩'
     
     def tiene_imagen_personal(self):
@@ -232,8 +340,9 @@ class Reto(models.Model):
     def eliminar_imagen_personal(self):
         """Elimina la imagen personal del reto"""
         if self.imagen_reto:
-            self.imagen_reto.delete(save=False)
+            # El worker libera el archivo (se borra con sus miniaturas si nadie más lo usa)
             self.imagen_reto = None
+            self.imagen_miniaturas = False
             self.save()
 
 
@@ -297,10 +406,210 @@ class ConfiguracionOrdenamiento(models.Model):
             return None
 
 
+class ContadorGeneracion(models.Model):
+    """Contador global que se incrementa cada vez que cambia un conjunto de datos.
+
+    Sirve como validador barato (ETag) y como marca de invalidación de cachés:
+    basta leer un entero para saber si el ranking o el catálogo cambiaron.
+    """
+    RANKING = 'ranking'
+    CATALOGO = 'catalogo'
+
+    nombre = models.CharField(max_length=50, unique=True)
+    valor = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Contador de Generación"
+        verbose_name_plural = "Contadores de Generación"
+
+    def __str__(self):
+        return f"{self.nombre} #{self.valor}"
+
+    @classmethod
+    def obtener(cls, nombre):
+        """Valor actual del contador (0 si aún no existe)"""
+        valor = cls.objects.filter(nombre=nombre).values_list('valor', flat=True).first()
+        return valor or 0
+
+    @classmethod
+    def incrementar(cls, nombre):
+        """Incrementa el contador de forma atómica, creándolo si no existe"""
+        actualizados = cls.objects.filter(nombre=nombre).update(valor=F('valor') + 1)
+        if not actualizados:
+            cls.objects.get_or_create(nombre=nombre, defaults={'valor': 1})
+
+
+class TrabajoImagen(models.Model):
+    """Cola en la base de datos de imágenes subidas pendientes de procesar
+
+    La procesa ``python manage.py procesar_imagenes`` (sin broker externo):
+    normaliza el archivo subido, genera las miniaturas, lo sustituye en el
+    objeto y borra el archivo anterior. Mientras tanto se sirve el original.
+    """
+    PENDIENTE = 'pendiente'
+    PROCESANDO = 'procesando'
+    ERROR = 'error'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (PROCESANDO, 'Procesando'),
+        (ERROR, 'Error'),
+    ]
+    MAX_INTENTOS = 3
+    
+    modelo = models.CharField(max_length=100, help_text="app_label.model_name del objeto")
+    objeto_id = models.PositiveBigIntegerField()
+    archivo = models.CharField(max_length=255, blank=True, help_text="Archivo subido a procesar (vacío si sólo hay que limpiar)")
+    archivo_anterior = models.CharField(max_length=255, blank=True, help_text="Archivo reemplazado, a borrar")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Trabajo de Imagen"
+        verbose_name_plural = "Trabajos de Imagen"
+        ordering = ['fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion'], name='trabajoimagen_estado_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} ({self.estado})"
+    
+    @classmethod
+    def encolar(cls, instancia, archivo='', anterior=''):
+        return cls.objects.create(
+            modelo=instancia._meta.label_lower,
+            objeto_id=instancia.pk,
+            archivo=archivo,
+            archivo_anterior=anterior,
+        )
+    
+    @classmethod
+    def liberar_atascados(cls, minutos=10):
+        """Devuelve a la cola los trabajos de un worker que murió a medias"""
+        limite = timezone.now() - datetime.timedelta(minutes=minutos)
+        return cls.objects.filter(estado=cls.PROCESANDO, fecha_actualizacion__lt=limite).update(estado=cls.PENDIENTE)
+    
+    @classmethod
+    def reclamar(cls, limite=10):
+        """Marca como en proceso hasta ``limite`` trabajos pendientes y los retorna
+
+        El UPDATE condicionado al estado hace que dos workers nunca tomen el mismo trabajo.
+        """
+        reclamados = []
+        for pk in cls.objects.filter(estado=cls.PENDIENTE).values_list('pk', flat=True)[:limite]:
+            if cls.objects.filter(pk=pk, estado=cls.PENDIENTE).update(estado=cls.PROCESANDO, fecha_actualizacion=timezone.now()):
+                reclamados.append(pk)
+        return list(cls.objects.filter(pk__in=reclamados))
+    
+    def ejecutar(self):
+        """Procesa el trabajo; si falla lo reintenta hasta MAX_INTENTOS veces"""
+        try:
+            self.procesar()
+        except Exception as error:
+            self.intentos += 1
+            self.error = f"{type(error).__name__}: {error}"
+            self.estado = self.ERROR if self.intentos >= self.MAX_INTENTOS else self.PENDIENTE
+            self.save(update_fields=['intentos', 'error', 'estado', 'fecha_actualizacion'])
+            return False
+        self.delete()
+        return True
+    
+    def procesar(self):
+        modelo = apps.get_model(self.modelo)
+        campo = modelo.CAMPO_IMAGEN
+        storage = modelo._meta.get_field(campo).storage
+        
+        if self.archivo:
+            objeto = modelo.objects.filter(pk=self.objeto_id).first()
+            archivo = getattr(objeto, campo) if objeto is not None else None
+            # Objeto borrado o imagen reemplazada otra vez: el trabajo más nuevo libera el archivo
+            if archivo is not None and archivo.name == self.archivo:
+                nuevo = normalizar_imagen(archivo)
+                archivo.name = nuevo
+                generar_miniaturas(archivo)
+                actualizados = modelo.objects.filter(pk=self.objeto_id, **{campo: self.archivo}).update(
+                    **{campo: nuevo, modelo.BANDERA_MINIATURAS: True},
+                    **objeto.cambios_imagen_procesada(),
+                )
+                eliminar_imagen(storage, self.archivo if actualizados else nuevo)
+                if actualizados:
+                    objeto.imagen_procesada()
+        
+        if self.archivo_anterior:
+            eliminar_imagen(storage, self.archivo_anterior)
+
+
+class ArchivoContenido(models.Model):
+    """Referencias a cada archivo de ``AlmacenamientoContenido``
+
+    ``referencias`` es cuántas veces se guardó el archivo menos cuántas se
+    liberó; el storage lo borra al llegar a cero. ``recontar()`` lo
+    reconstruye a partir de los campos de imagen si alguna vez se desvía.
+    """
+    nombre = models.CharField(max_length=255, unique=True)
+    referencias = models.PositiveIntegerField(default=0)
+    tamano = models.PositiveBigIntegerField(default=0, help_text="Tamaño en bytes")
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Archivo de Contenido"
+        verbose_name_plural = "Archivos de Contenido"
+    
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias} ref.)"
+    
+    @classmethod
+    def recontar(cls):
+        """Reconstruye los contadores desde los campos de imagen de los modelos
+
+        Retorna (archivos, referencias). Conviene ejecutarlo con el worker de
+        imágenes detenido.
+        """
+        from collections import Counter
+        from django.core.files.storage import default_storage
+        
+        conteos = Counter()
+        for modelo in apps.get_models():
+            if issubclass(modelo, ImagenSubidaMixin):
+                campo = modelo.CAMPO_IMAGEN
+                conteos.update(
+                    modelo.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                    .values_list(campo, flat=True).iterator()
+                )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                cls(
+                    nombre=nombre,
+                    referencias=referencias,
+                    tamano=default_storage.size(nombre) if default_storage.exists(nombre) else 0,
+                )
+                for nombre, referencias in conteos.items()
+            )
+        return len(conteos), sum(conteos.values())
+
+
+def imagen_objeto_borrado(sender, instance, **kwargs):
+    """Objeto con imagen borrado: el worker libera su archivo"""
+    nombre = getattr(instance, instance.CAMPO_IMAGEN).name
+    if nombre:
+        TrabajoImagen.encolar(instance, anterior=nombre)
+
+
+post_delete.connect(imagen_objeto_borrado, sender=Reto)
+
+
 # ======== Señales para mantener perfiles y ranking coherentes al borrar Retos ========
 @receiver(pre_delete, sender=Reto)
 def reto_pre_delete_collect_users(sender, instance: Reto, **kwargs):
     """Antes de borrar un reto, recolectar los usuarios con intentos para actualizar luego."""
+    from juego.recalculo import lote_activo
+    if lote_activo() is not None:
+        # Recálculo diferido: los intentos borrados en cascada anotan sus usuarios
+        return
     try:
         from juego.models import Intento
         user_ids = list(
@@ -316,6 +625,9 @@ def reto_pre_delete_collect_users(sender, instance: Reto, **kwargs):
 @receiver(post_delete, sender=Reto)
 def reto_post_delete_update_profiles(sender, instance: Reto, **kwargs):
     """Después de borrar un reto, actualizar perfiles de usuarios afectados y ranking."""
+    from juego.recalculo import lote_activo
+    if lote_activo() is not None:
+        return
     try:
         from cuentas.models import PerfilUsuario
         from juego.models import Ranking
@@ -330,3 +642,15 @@ def reto_post_delete_update_profiles(sender, instance: Reto, **kwargs):
     except Exception:
         # En caso de error, no bloquear el borrado
         pass
+
+
+# ======== Señales para invalidar validadores y cachés del catálogo ========
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=ConfiguracionOrdenamiento)
+@receiver(post_delete, sender=ConfiguracionOrdenamiento)
+def catalogo_cambiado(sender, instance, **kwargs):
+    """Categorías o configuración de ordenamiento cambiadas: nueva generación del catálogo."""
+    from .configuracion import cache_configuracion
+    ContadorGeneracion.incrementar(ContadorGeneracion.CATALOGO)
+    cache_configuracion.invalidar()
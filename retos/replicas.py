@@ -0,0 +1,119 @@
+"""
+RÉPLICAS DE LECTURA
+===================
+
+Las páginas de lectura (inicio, listado de retos, ranking, progreso,
+estadísticas del admin) son casi todo el tráfico; las escrituras se limitan
+a ``intentar_reto``, el registro, la edición del perfil y el admin.
+
+- ``RouterReplicas`` envía las lecturas a uno de los alias de
+  ``settings.REPLICAS_LECTURA`` y las escrituras siempre a ``default``.
+- Sólo se lee de una réplica dentro de una petición GET/HEAD (lo marca
+  ``ReplicasMiddleware``). Comandos de gestión, workers, peticiones POST y
+  las lecturas dentro de una transacción usan la primaria.
+- Tras escribir, el cliente queda fijado a la primaria durante
+  ``REPLICA_FIJACION_SEGUNDOS`` (una cookie) para que vea su propio intento
+  aunque la réplica vaya con retraso. Dentro de la misma petición, la
+  primera escritura también fija el resto de lecturas.
+
+Sin ``REPLICAS_LECTURA`` el router no interviene.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+COOKIE_FIJACION = 'fijar_primaria'
+
+# Estado de la petición en curso (ContextVar: vale también para vistas async)
+_peticion = ContextVar('peticion_replicas', default=None)
+
+
+class EstadoPeticion:
+    def __init__(self, usar_replica):
+        self.usar_replica = usar_replica
+        self.escribio = False
+
+
+def replicas_lectura():
+    return getattr(settings, 'REPLICAS_LECTURA', [])
+
+
+class RouterReplicas:
+    """Lecturas a una réplica (si la petición lo permite), escrituras a la primaria"""
+
+    def db_for_read(self, model, **hints):
+        estado = _peticion.get()
+        replicas = replicas_lectura()
+        if not replicas or estado is None or not estado.usar_replica:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Leer-modificar-escribir dentro de una transacción: siempre la primaria
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        estado = _peticion.get()
+        if estado is not None:
+            estado.escribio = True
+            estado.usar_replica = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplicas tienen los mismos datos
+        return True
+
+
+class ReplicasMiddleware:
+    """Decide si la petición puede leer de réplicas y fija a la primaria tras escribir
+
+    Síncrono y async: bajo ASGI no obliga a Django a adaptar las vistas async.
+    """
+
+    METODOS_LECTURA = ('GET', 'HEAD')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        estado = self.estado_inicial(request)
+        token = _peticion.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self.fijar(estado, response)
+
+    async def __acall__(self, request):
+        estado = self.estado_inicial(request)
+        # Las consultas del ORM async corren en otro hilo con una copia de este contexto
+        token = _peticion.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self.fijar(estado, response)
+
+    def estado_inicial(self, request):
+        fijado = COOKIE_FIJACION in request.COOKIES
+        return EstadoPeticion(
+            usar_replica=bool(replicas_lectura()) and request.method in self.METODOS_LECTURA and not fijado
+        )
+
+    def fijar(self, estado, response):
+        if estado.escribio and replicas_lectura():
+            response.set_cookie(
+                COOKIE_FIJACION, '1',
+                max_age=getattr(settings, 'REPLICA_FIJACION_SEGUNDOS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,29 @@
+/**
+ * Estadísticas del reto en vivo
+ * Recibe server-sent events del canal del reto (ver retos/difusion.py)
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const contenedor = document.querySelector('[data-eventos]');
+    if (!contenedor || !window.EventSource) {
+        return;
+    }
+
+    const fuente = new EventSource(contenedor.dataset.eventos);
+
+    fuente.addEventListener('estadisticas', function(evento) {
+        const datos = JSON.parse(evento.data);
+        Object.keys(datos).forEach(function(campo) {
+            const elemento = contenedor.querySelector('[data-campo="' + campo + '"]');
+            if (elemento) {
+                elemento.textContent = datos[campo];
+            }
+        });
+    });
+
+    // El servidor ya no tiene los cambios que nos faltan
+    fuente.addEventListener('recargar', function() {
+        fuente.close();
+        window.location.reload();
+    });
+});
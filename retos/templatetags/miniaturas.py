@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def imagen(reto, tamano):
+    """URL de la imagen del reto para mostrarla a ``tamano`` px: {{ reto|imagen:320 }}"""
+    return reto.obtener_imagen(tamano)
+
+
+@register.filter
+def avatar(perfil, tamano):
+    """URL de la foto de perfil para mostrarla a ``tamano`` px: {{ perfil|avatar:40 }}"""
+    return perfil.obtener_avatar(tamano)
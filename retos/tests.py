@@ -1,3 +1,670 @@
-from django.test import TestCase
+import asyncio
+import io
+import os
+import tempfile
+import time
+from importlib import import_module
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.paginator import Page, Paginator
+from django.db import connection, router
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image, features
+
+from cuentas.models import PerfilUsuario
+from juego import urls as urls_juego, views as vistas_juego
+from juego.admin import PaginadorEstimado
+from juego.models import Intento, IntentoDiario, Ranking
+from proyect.admin_config import admin_site
+from . import miniaturas, urls as urls_retos, views as vistas_retos
+from .admin import filtrar_prefijo
+from .checks import verificar_rendimiento
+from .configuracion import cache_configuracion
+from .difusion import ARRANQUE, HISTORIAL, MENSAJE_RECARGAR, Difusor, eventos_desde, respuesta_eventos
+from .limitacion import contadores
+from .miniaturas import TAMANOS, ruta_miniatura
+from .models import (
+    ArchivoContenido, Categoria, ConfiguracionOrdenamiento, ContadorGeneracion, RespuestaAlternativa, Reto, TrabajoImagen,
+)
+from .replicas import COOKIE_FIJACION, ReplicasMiddleware
+
+
+class PresupuestoConsultasAdminTests(TestCase):
+    """Cada changelist del admin debe costar las mismas consultas con 100 o 1.000 filas"""
+
+    TAMANOS = (100, 1000)
+
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave-admin')
+        self.client.force_login(self.admin)
+        # Sesión y usuario ya en caché: la primera medición no paga el fallo de caché
+        self.client.get(reverse(f'{admin_site.name}:index'))
+        self.creados = 0
+
+    def poblar(self, total):
+        """Completa hasta ``total`` filas de cada modelo registrado (sin señales)"""
+        User = get_user_model()
+        indices = range(self.creados, total)
+
+        categorias = Categoria.objects.bulk_create(
+            Categoria(nombre=f'Categoría {i}') for i in indices
+        )
+        retos = Reto.objects.bulk_create(
+            Reto(
+                titulo=f'Reto {i}', descripcion='d', enunciado='e', respuesta_correcta='r',
+                categoria=categoria, activo=i % 2 == 0,
+                intentos_totales=4, intentos_exitosos=i % 5,
+            )
+            for i, categoria in zip(indices, categorias)
+        )
+        RespuestaAlternativa.objects.bulk_create(
+            RespuestaAlternativa(reto=reto, texto=f'alternativa {reto.titulo}') for reto in retos
+        )
+        ConfiguracionOrdenamiento.objects.bulk_create(
+            ConfiguracionOrdenamiento(nombre=f'Config {i}', activo=False) for i in indices
+        )
+        usuarios = User.objects.bulk_create(
+            User(username=f'usuario{i}', password='!') for i in indices
+        )
+        PerfilUsuario.objects.bulk_create(
+            PerfilUsuario(usuario=usuario, puntuacion_total=i, avatar_por_defecto='🦊' if i % 2 else '')
+            for i, usuario in zip(indices, usuarios)
+        )
+        Ranking.objects.bulk_create(
+            Ranking(usuario=usuario, posicion=i + 1) for i, usuario in zip(indices, usuarios)
+        )
+        Intento.objects.bulk_create(
+            Intento(usuario=usuario, reto=reto, respuesta_usuario='r', es_correcto=True)
+            for usuario, reto in zip(usuarios, retos)
+        )
+        # El paginador de intentos estima el total a partir del resumen diario
+        IntentoDiario.reconstruir()
+        self.creados = total
+
+    def consultas_changelist(self, modelo, model_admin, total):
+        url = reverse(f'{admin_site.name}:{modelo._meta.app_label}_{modelo._meta.model_name}_changelist')
+        # Todas las filas en una sola página, para que un N+1 se note en el conteo
+        with mock.patch.object(model_admin, 'list_per_page', total + 1):
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['cl'].result_count, modelo._default_manager.count())
+        return len(consultas)
+
+    def test_changelists_con_consultas_constantes(self):
+        conteos = {}
+        for total in self.TAMANOS:
+            self.poblar(total)
+            for modelo, model_admin in admin_site._registry.items():
+                conteos.setdefault(modelo, []).append(
+                    self.consultas_changelist(modelo, model_admin, total)
+                )
+
+        for modelo, por_tamano in conteos.items():
+            with self.subTest(modelo=modelo._meta.label):
+                self.assertEqual(
+                    len(set(por_tamano)), 1,
+                    f'{modelo._meta.label}: consultas por tamaño {dict(zip(self.TAMANOS, por_tamano))}',
+                )
+
+
+
+class PaginadorIntentosAdminTests(TestCase):
+    """Con filtros el total se corta en el límite, pero se puede pasar de él"""
+
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'clave-admin')
+        self.client.force_login(admin)
+        reto = Reto.objects.create(titulo='Reto', descripcion='d', enunciado='e', respuesta_correcta='r')
+        Intento.objects.bulk_create(
+            Intento(usuario=admin, reto=reto, respuesta_usuario='r', es_correcto=True) for _ in range(30)
+        )
+        self.url = reverse(f'{admin_site.name}:juego_intento_changelist')
+        model_admin = admin_site._registry[Intento]
+        for objetivo, atributo, valor in (
+            (model_admin, 'list_per_page', 5), (PaginadorEstimado, 'LIMITE_CONTEO', 10),
+        ):
+            parche = mock.patch.object(objetivo, atributo, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def pagina(self, numero):
+        respuesta = self.client.get(self.url, {'es_correcto__exact': '1', 'p': numero})
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_total_truncado(self):
+        respuesta = self.pagina(1)
+        self.assertEqual(respuesta.context['cl'].result_count, 10)
+        self.assertTrue(respuesta.context['cl'].paginator.truncado)
+        self.assertContains(respuesta, '10+ Intentos')
+
+    def test_paginas_pasado_el_limite(self):
+        respuesta = self.pagina(4)
+        self.assertEqual(len(respuesta.context['cl'].result_list), 5)
+        # Cuenta hasta la página siguiente, que aparece enlazada
+        self.assertEqual(respuesta.context['cl'].result_count, 25)
+        self.assertContains(respuesta, 'p=5')
+
+        respuesta = self.pagina(6)
+        self.assertEqual(len(respuesta.context['cl'].result_list), 5)
+        self.assertEqual(respuesta.context['cl'].result_count, 30)
+        self.assertFalse(respuesta.context['cl'].paginator.truncado)
+
+    def test_sin_filtros_con_resumen_vacio(self):
+        # Intentos creados sin pasar por el resumen diario (bulk_create, datos anteriores)
+        IntentoDiario.objects.all().delete()
+        respuesta = self.client.get(self.url)
+        self.assertEqual(len(respuesta.context['cl'].result_list), 5)
+        self.assertGreater(respuesta.context['cl'].result_count, 10)
+
+        respuesta = self.client.get(self.url, {'p': 6})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.context['cl'].result_list), 5)
+        self.assertEqual(respuesta.context['cl'].result_count, 30)
+
+        # La migración de datos rellena el resumen con los intentos existentes
+        migracion = import_module('juego.migrations.0008_reconstruir_intentodiario')
+        migracion.reconstruir_resumen(apps, None)
+        self.assertEqual(IntentoDiario.objects.aggregate(total=Sum('intentos'))['total'], 30)
+
+
+class AutocompletadoPrefijoTests(TestCase):
+    """El autocompletado del admin busca por prefijo con los índices Upper()"""
+
+    def setUp(self):
+        User = get_user_model()
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave-admin')
+        self.client.force_login(admin)
+        for username, email in (('Ana', 'ana@example.com'), ('anabel', 'bel@example.com'),
+                                ('mariana', 'ANA.m@example.com'), ('50%', 'porcentaje@example.com')):
+            User.objects.create_user(username, email)
+        for titulo in ('Suma de dígitos', 'suma mágica', 'La suma'):
+            Reto.objects.create(titulo=titulo, descripcion='d', enunciado='e', respuesta_correcta='r')
+
+    def autocompletar(self, modelo, campo, termino):
+        respuesta = self.client.get(reverse(f'{admin_site.name}:autocomplete'), {
+            'term': termino, 'app_label': modelo._meta.app_label,
+            'model_name': modelo._meta.model_name, 'field_name': campo,
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        return sorted(resultado['text'] for resultado in respuesta.json()['results'])
+
+    def test_prefijo_sin_distinguir_mayusculas(self):
+        self.assertEqual(self.autocompletar(Intento, 'usuario', 'an'), ['Ana', 'anabel', 'mariana'])
+        self.assertEqual(self.autocompletar(Intento, 'usuario', '5'), ['50%'])
+        self.assertEqual(self.autocompletar(Intento, 'usuario', '%'), [])
+        self.assertEqual(
+            self.autocompletar(Intento, 'reto', 'SUMA'), ['Suma de dígitos (Medio)', 'suma mágica (Medio)'],
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plan de consulta de SQLite')
+    def test_plan_usa_indices_prefijo(self):
+        plan = filtrar_prefijo(get_user_model().objects.all(), ['username', 'email'], 'an').explain()
+        self.assertIn('user_username_prefijo_idx', plan)
+        self.assertIn('user_email_prefijo_idx', plan)
+        self.assertNotIn('SCAN', plan)
+
+        plan = filtrar_prefijo(Reto.objects.all(), ['titulo'], 'suma').explain()
+        self.assertIn('reto_titulo_prefijo_idx', plan)
+        self.assertNotIn('SCAN', plan)
+
+
+class ChecksRendimientoTests(SimpleTestCase):
+    """Avisos de ``check --deploy`` sobre la caché"""
+
+    def ids_avisos(self):
+        return {aviso.id for aviso in verificar_rendimiento(None)}
+
+    def test_cache_por_proceso(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertIn('rendimiento.W008', self.ids_avisos())
+            self.assertIn('rendimiento.W009', self.ids_avisos())
+            with override_settings(LIMITE_ENVIOS={'usuario': None, 'ip': None}):
+                self.assertNotIn('rendimiento.W009', self.ids_avisos())
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertFalse({'rendimiento.W008', 'rendimiento.W009'} & self.ids_avisos())
+
+@override_settings(REPLICAS_LECTURA=['replica'])
+class RouterReplicasTests(SimpleTestCase):
+    """Lecturas de GET a la réplica; escrituras, POST y clientes recién escritos a la primaria"""
+
+    def peticion(self, request, escribir=False):
+        rutas = {}
+
+        def vista(request):
+            rutas['antes'] = router.db_for_read(Reto)
+            if escribir:
+                rutas['escritura'] = router.db_for_write(Reto)
+                rutas['despues'] = router.db_for_read(Reto)
+            with mock.patch.object(connection, 'in_atomic_block', True):
+                rutas['transaccion'] = router.db_for_read(Reto)
+            return HttpResponse()
+
+        response = ReplicasMiddleware(vista)(request)
+        return rutas, response
+
+    def test_get_lee_de_la_replica(self):
+        rutas, response = self.peticion(RequestFactory().get('/retos/'))
+        self.assertEqual(rutas['antes'], 'replica')
+        self.assertEqual(rutas['transaccion'], 'default')
+        self.assertNotIn(COOKIE_FIJACION, response.cookies)
+
+    def test_escritura_fija_la_primaria(self):
+        rutas, response = self.peticion(RequestFactory().post('/reto/1/intentar/'), escribir=True)
+        self.assertEqual(rutas['antes'], 'default')
+        self.assertEqual(rutas['escritura'], 'default')
+        self.assertIn(COOKIE_FIJACION, response.cookies)
+
+        # Un GET que escribe lee de la primaria desde la escritura
+        rutas, response = self.peticion(RequestFactory().get('/retos/'), escribir=True)
+        self.assertEqual((rutas['antes'], rutas['despues']), ('replica', 'default'))
+        self.assertIn(COOKIE_FIJACION, response.cookies)
+
+        # Las peticiones siguientes del mismo cliente leen de la primaria
+        request = RequestFactory().get('/retos/')
+        request.COOKIES[COOKIE_FIJACION] = '1'
+        rutas, _ = self.peticion(request)
+        self.assertEqual(rutas['antes'], 'default')
+
+    def test_fuera_de_peticiones_usa_la_primaria(self):
+        self.assertEqual(router.db_for_read(Reto), 'default')
+
+
+class DifusorTests(SimpleTestCase):
+    """Los clientes reciben lo publicado y, al reconectar, lo que se perdieron"""
+
+    def test_publica_a_los_suscriptores_del_canal(self):
+        difusor = Difusor()
+
+        async def escuchar():
+            suscripcion, pendientes = difusor.suscribir('ranking')
+            otra, _ = difusor.suscribir('reto-1')
+            # Publicado desde otro hilo, como hace la vista que escribe
+            await asyncio.to_thread(difusor.publicar, 'ranking', 'ranking', {'cambios': []})
+            mensaje = await asyncio.wait_for(suscripcion.cola.get(), 1)
+            difusor.cancelar(suscripcion)
+            difusor.cancelar(otra)
+            return pendientes, mensaje, otra.cola.empty()
+
+        pendientes, mensaje, otra_vacia = asyncio.run(escuchar())
+        self.assertEqual(pendientes, [])
+        self.assertIn('event: ranking\n', mensaje)
+        self.assertIn(f'id: {ARRANQUE}-1\n', mensaje)
+        self.assertTrue(otra_vacia)
+        self.assertFalse(difusor.tiene_suscriptores('ranking'))
+
+    def test_reconexion_reenvia_o_pide_recargar(self):
+        difusor = Difusor()
+        desde = difusor.ultimo_id('reto-1')
+        for n in range(3):
+            difusor.publicar('reto-1', 'estadisticas', {'intentos_totales': n})
+
+        async def pendientes(desde):
+            suscripcion, pendientes = difusor.suscribir('reto-1', desde)
+            difusor.cancelar(suscripcion)
+            return pendientes
+
+        self.assertEqual(len(asyncio.run(pendientes(desde))), 3)
+        self.assertEqual(len(asyncio.run(pendientes(difusor.ultimo_id('reto-1')))), 0)
+        # Id de un arranque anterior del proceso: se empieza de cero
+        self.assertEqual(asyncio.run(pendientes('otro-1')), [])
+
+        for n in range(HISTORIAL):
+            difusor.publicar('reto-1', 'estadisticas', {'intentos_totales': n})
+        self.assertEqual(asyncio.run(pendientes(desde)), [MENSAJE_RECARGAR])
+
+    def test_eventos_vivo_independiente_de_vistas_async(self):
+        request = RequestFactory().get('/juego/ranking/eventos/')
+        with override_settings(EVENTOS_VIVO=False, VISTAS_ASYNC=True):
+            self.assertIsNone(eventos_desde('ranking'))
+            self.assertEqual(respuesta_eventos(request, 'ranking').status_code, 204)
+        with override_settings(EVENTOS_VIVO=True, VISTAS_ASYNC=False):
+            self.assertIsNotNone(eventos_desde('ranking'))
+            response = respuesta_eventos(request, 'ranking')
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+
+@override_settings(LIMITE_ENVIOS={
+    'usuario': {'capacidad': 3, 'por_minuto': 60},
+    'ip': {'capacidad': 5, 'por_minuto': 1},
+})
+class LimiteEnviosTests(TestCase):
+    """Los envíos de más reciben 429 sin consultar la base de datos"""
+
+    def setUp(self):
+        cache.clear()
+        self.reto = Reto.objects.create(
+            titulo='Limitado', descripcion='-', enunciado='-', respuesta_correcta='42', max_intentos=50,
+        )
+        self.url = reverse('retos:intentar_reto', args=[self.reto.pk])
+        get_user_model().objects.create_user('envios', password='clave-envios')
+        self.client.login(username='envios', password='clave-envios')
+
+    def enviar(self, n=1, **extra):
+        return [self.client.post(self.url, {'respuesta': 'mal'}, **extra).status_code for _ in range(n)]
+
+    def test_rafaga_y_rechazo_sin_consultas(self):
+        self.assertEqual(self.enviar(3), [302, 302, 302])
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(self.url, {'respuesta': 'mal'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(len(consultas), 0)
+        self.assertEqual(Intento.objects.count(), 3)
+
+        # Un segundo después hay un token más
+        with mock.patch('retos.limitacion._ahora_ms', return_value=int(time.time() * 1000) + 1100):
+            self.assertEqual(self.enviar(2), [302, 429])
+
+        self.assertEqual(contadores(), {'permitidos': 4, 'rechazados': {'usuario': 2, 'ip': 0}})
+
+    def test_limite_por_ip_entre_usuarios(self):
+        self.assertEqual(self.enviar(3), [302, 302, 302])
+        self.client.logout()
+        get_user_model().objects.create_user('otro', password='clave-otro')
+        self.client.login(username='otro', password='clave-otro')
+        self.assertEqual(self.enviar(3), [302, 302, 429])
+        # El rechazo por IP no gasta tokens del usuario
+        self.assertEqual(self.enviar(1, REMOTE_ADDR='10.0.0.2'), [302])
+
+    def test_api_responde_429_en_json(self):
+        url = reverse('api:intentar_reto', args=[self.reto.pk])
+        estados = [self.client.post(url, {'respuesta': 'mal'}).status_code for _ in range(4)]
+        self.assertEqual(estados, [201, 201, 201, 429])
+        self.assertIn('error', self.client.post(url, {'respuesta': 'mal'}).json())
+
+    def test_metricas(self):
+        self.enviar(4)
+        response = self.client.get(reverse('retos:metricas'))
+        self.assertContains(response, 'retos_envios_permitidos_total 3\n')
+        self.assertContains(response, 'retos_envios_rechazados_total{ambito="usuario"} 1\n')
+        self.assertEqual(self.client.get(reverse('retos:metricas'), REMOTE_ADDR='10.0.0.2').status_code, 403)
+
+
+@override_settings(RETOS_CONFIG_CACHE_SEGUNDOS=3600)
+class EtagCatalogoTests(TestCase):
+    """El ETag del listado sale de la generación de la copia local de categorías"""
+
+    def setUp(self):
+        cache_configuracion.invalidar()
+        self.addCleanup(cache_configuracion.invalidar)
+        Categoria.objects.create(nombre='Lógica')
+        self.url = reverse('retos:lista_retos')
+
+    def test_guardado_en_admin_refresca_categorias(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # Otro proceso cambia el catálogo: esta copia sigue vigente hasta que
+        # venza el intervalo, así que el ETag debe seguir describiéndola
+        Categoria.objects.bulk_create([Categoria(nombre='Remota')])
+        ContadorGeneracion.incrementar(ContadorGeneracion.CATALOGO)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        generacion = cache_configuracion.generacion
+        # El admin usa otra sesión: su mensaje flash no debe tapar el ETag del listado
+        administrador = Client()
+        administrador.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'clave-admin'))
+        response = administrador.post(reverse(f'{admin_site.name}:retos_categoria_add'), {
+            'nombre': 'Geometría', 'descripcion': '', 'color': '#123456',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertGreater(cache_configuracion.generacion, generacion)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Geometría')
+        self.assertContains(response, 'Remota')
+
+
+class VistasAsyncTests(TestCase):
+    """Las vistas async dan el mismo contexto que sus versiones síncronas"""
+
+    VISTAS = [
+        (urls_retos, 'home', vistas_retos.home, vistas_retos.home_async),
+        (urls_juego, 'ranking', vistas_juego.RankingView.as_view(), vistas_juego.ranking_async),
+        (urls_juego, 'progreso_global', vistas_juego.progreso_global, vistas_juego.progreso_global_async),
+    ]
+
+    def setUp(self):
+        User = get_user_model()
+        self.usuario = User.objects.create_user('asincrono')
+        retos = [
+            Reto.objects.create(titulo=f'R{i}', descripcion='-', enunciado='-', respuesta_correcta='ok',
+                                puntos=10 * i, dificultad=dificultad)
+            for i, dificultad in enumerate(['facil', 'medio', 'dificil', 'facil'], 1)
+        ]
+        for i in range(25):
+            jugador = User.objects.create_user(f'jugador{i}')
+            for reto in retos[:i % 4]:
+                Intento.objects.create(usuario=jugador, reto=reto, respuesta_usuario='no')
+                Intento.objects.create(usuario=jugador, reto=reto, respuesta_usuario='ok', es_correcto=True)
+        Ranking.actualizar_ranking()
+
+    @staticmethod
+    def comparable(valor):
+        if isinstance(valor, Paginator):
+            return ('paginator', valor.count, valor.num_pages)
+        if isinstance(valor, Page):
+            return ('page', valor.number, list(valor.object_list))
+        if hasattr(valor, '__iter__') and not isinstance(valor, (str, dict)):
+            return list(valor)
+        return valor
+
+    # Claves que pone el framework (procesadores de contexto, ListView), no la vista
+    PROPIAS_DEL_FRAMEWORK = {'request', 'user', 'perms', 'messages', 'csrf_token', 'view', 'DEFAULT_MESSAGE_LEVELS'}
+
+    async def contexto(self, modulo, nombre, vista, **parametros):
+        patron = next(p for p in modulo.urlpatterns if p.name == nombre)
+        with mock.patch.object(patron, 'callback', vista):
+            response = await self.async_client.get(reverse(f'{modulo.app_name}:{nombre}'), parametros)
+        self.assertEqual(response.status_code, 200)
+        claves = set(response.context.keys()) - self.PROPIAS_DEL_FRAMEWORK - {'True', 'False', 'None'}
+        return {clave: await sync_to_async(self.comparable)(response.context[clave]) for clave in claves}
+
+    async def test_mismo_contexto(self):
+        await self.async_client.aforce_login(self.usuario)
+        for modulo, nombre, sincrona, asincrona in self.VISTAS:
+            for parametros in ({}, {'page': 2}) if nombre == 'ranking' else ({},):
+                with self.subTest(vista=nombre, **parametros):
+                    esperado = await self.contexto(modulo, nombre, sincrona, **parametros)
+                    obtenido = await self.contexto(modulo, nombre, asincrona, **parametros)
+                    self.assertTrue(esperado)
+                    self.assertEqual(obtenido, esperado)
+
+
+class CondicionalHtmlTests(TestCase):
+    """Listado y detalle de retos responden 304 hasta que cambia un reto o el progreso"""
+
+    def setUp(self):
+        cache.clear()
+        cache_configuracion.invalidar()
+        self.reto = Reto.objects.create(
+            titulo='Condicional', descripcion='-', enunciado='-', respuesta_correcta='42', max_intentos=5,
+        )
+        get_user_model().objects.create_user('condicional', password='clave-condicional')
+        self.client.login(username='condicional', password='clave-condicional')
+        self.urls = [reverse('retos:lista_retos'), reverse('retos:detalle_reto', args=[self.reto.pk])]
+
+    def etags(self):
+        etags = []
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etags.append(response['ETag'])
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        return etags
+
+    def assertCambian(self, antes):
+        for url, etag in zip(self.urls, antes):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_intento_cambia_el_etag(self):
+        antes = self.etags()
+        response = self.client.post(reverse('retos:intentar_reto', args=[self.reto.pk]), {
+            'respuesta': 'mal', 'clave_idempotencia': 'clave-de-la-pagina',
+        }, follow=True)
+        # La redirección muestra el mensaje del intento (sin ETag mientras haya mensajes)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertCambian(antes)
+
+    def test_editar_el_reto_cambia_el_etag(self):
+        antes = self.etags()
+        self.reto.enunciado = 'Otro enunciado'
+        self.reto.save()
+        self.assertCambian(antes)
+        self.assertEqual(self.etags(), self.etags())
+
+
+class AlmacenamientoContenidoTests(TestCase):
+    """Los archivos iguales se guardan una vez y se borran al liberar la última referencia"""
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def subir(self, nombre, contenido=b'mismo contenido'):
+        return default_storage.save(nombre, ContentFile(contenido, name=nombre))
+
+    def referencias(self, nombre):
+        return ArchivoContenido.objects.filter(nombre=nombre).values_list('referencias', flat=True).first()
+
+    def test_contenido_repetido_comparte_archivo(self):
+        primero = self.subir('perfiles/ana.png')
+        segundo = self.subir('perfiles/luis.PNG')
+        self.assertEqual(primero, segundo)
+        self.assertRegex(primero, r'^perfiles/[0-9a-f]{64}\.png$')
+        self.assertEqual(self.referencias(primero), 2)
+        self.assertEqual(os.listdir(os.path.dirname(default_storage.path(primero))), [os.path.basename(primero)])
+        self.assertNotEqual(self.subir('perfiles/otro.png', b'otro contenido'), primero)
+
+        miniatura = ruta_miniatura(primero, 40)
+        default_storage.save(miniatura, ContentFile(b'miniatura'))
+
+        default_storage.delete(primero)
+        self.assertTrue(default_storage.exists(primero))
+        self.assertTrue(default_storage.exists(miniatura))
+        self.assertEqual(self.referencias(primero), 1)
+
+        default_storage.delete(segundo)
+        self.assertFalse(default_storage.exists(primero))
+        self.assertFalse(default_storage.exists(miniatura))
+        self.assertIsNone(self.referencias(primero))
+
+    def test_immutable_solo_para_nombres_por_hash(self):
+        original = self.subir('retos/ilustracion.png')
+        default_storage.save(ruta_miniatura(original, 96), ContentFile(b'miniatura'))
+        with open(os.path.join(settings.MEDIA_ROOT, 'logo.png'), 'wb') as archivo:
+            archivo.write(b'sin hash')
+
+        for ruta, inmutable in [(original, True), (ruta_miniatura(original, 96), True), ('logo.png', False)]:
+            with self.subTest(ruta=ruta):
+                response = vistas_retos.servir_media(RequestFactory().get('/media/' + ruta), ruta)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual('immutable' in response.get('Cache-Control', ''), inmutable)
+
+
+class ProcesarImagenesTests(TestCase):
+    """El worker normaliza la imagen subida, genera sus variantes y reintenta los fallos"""
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def crear_reto(self, contenido):
+        return Reto.objects.create(
+            titulo='Con imagen', descripcion='-', enunciado='-', respuesta_correcta='-',
+            imagen_reto=ContentFile(contenido, name='subida.png'),
+        )
+
+    def png(self, ancho=800, alto=600):
+        buffer = io.BytesIO()
+        Image.new('RGB', (ancho, alto), '#3366cc').save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def procesar(self):
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('procesar_imagenes', una_vez=True, stdout=salida, stderr=errores)
+        return salida.getvalue(), errores.getvalue()
+
+    def test_genera_variantes(self):
+        formatos = [('JPEG', 'jpg')] + ([('WEBP', 'webp')] if features.check('webp') else [])
+        for formato, extension in formatos:
+            with self.subTest(formato=formato), \
+                    mock.patch.multiple(miniaturas, FORMATO=formato, EXTENSION=extension):
+                reto = self.crear_reto(self.png())
+                subida = reto.imagen_reto.name
+                self.assertEqual(TrabajoImagen.objects.count(), 1)
+
+                salida, _ = self.procesar()
+                self.assertIn('Imágenes procesadas: 1, con error: 0.', salida)
+                self.assertFalse(TrabajoImagen.objects.exists())
+
+                reto.refresh_from_db()
+                self.assertTrue(reto.imagen_miniaturas)
+                self.assertTrue(reto.imagen_reto.name.endswith('.' + extension))
+                self.assertFalse(reto.imagen_reto.storage.exists(subida))
+                for tamano in TAMANOS:
+                    ruta = ruta_miniatura(reto.imagen_reto.name, tamano)
+                    self.assertTrue(ruta.endswith(f'.{tamano}.{extension}'))
+                    with Image.open(reto.imagen_reto.storage.path(ruta)) as variante:
+                        self.assertEqual(variante.format, formato)
+                        self.assertEqual(min(variante.size), tamano)
+
+    def test_fallo_transitorio_se_reintenta(self):
+        reto = self.crear_reto(self.png())
+        normalizar = miniaturas.normalizar_imagen
+        llamadas = []
+
+        def falla_una_vez(campo):
+            llamadas.append(campo.name)
+            if len(llamadas) == 1:
+                raise OSError('disco lleno')
+            return normalizar(campo)
+
+        with mock.patch('retos.models.normalizar_imagen', falla_una_vez):
+            salida, errores = self.procesar()
+        self.assertEqual(len(llamadas), 2)
+        self.assertIn('OSError: disco lleno', errores)
+        self.assertIn('Imágenes procesadas: 1, con error: 1.', salida)
+        self.assertFalse(TrabajoImagen.objects.exists())
+        reto.refresh_from_db()
+        self.assertTrue(reto.imagen_miniaturas)
+
+    def test_fallo_permanente_queda_marcado(self):
+        reto = self.crear_reto(b'esto no es una imagen')
+        salida, _ = self.procesar()
+
+        trabajo = TrabajoImagen.objects.get()
+        self.assertEqual(trabajo.estado, TrabajoImagen.ERROR)
+        self.assertEqual(trabajo.intentos, TrabajoImagen.MAX_INTENTOS)
+        self.assertIn('UnidentifiedImageError', trabajo.error)
+        self.assertIn(f'con error: {TrabajoImagen.MAX_INTENTOS}.', salida)
+        # Un trabajo con error ya no se reclama; mientras tanto se sirve el original
+        self.assertIn('Imágenes procesadas: 0, con error: 0.', self.procesar()[0])
+        reto.refresh_from_db()
+        self.assertFalse(reto.imagen_miniaturas)
+        self.assertTrue(reto.imagen_reto.storage.exists(reto.imagen_reto.name))
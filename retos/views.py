@@ -1,11 +1,25 @@
+import uuid
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView
-from django.db.models import Q, Count
+from django.utils.decorators import method_decorator
+from django.db.models import Q, Count, Max
 from django.contrib import messages
-from .models import Reto, Categoria, ConfiguracionOrdenamiento
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.static import serve
+from .almacenamiento import es_inmutable
+from .asincrono import alista, renderizar
+from .models import Reto
+from .condicional import condicional, etag_usuario
+from .difusion import canal_reto, eventos_desde, respuesta_eventos
+from .configuracion import cache_configuracion
+from .limitacion import ip_cliente, limitar_envios, texto_metricas
 from juego.models import Intento, Ranking
+from juego.views import clave_idempotencia
 
 def home(request):
     """Vista principal del sitio"""
@@ -17,7 +31,7 @@ def home(request):
     retos_populares = Reto.objects.filter(activo=True).order_by('-intentos_totales')[:5]
     
     # Top 5 del ranking
-    top_ranking = Ranking.objects.all()[:5]
+    top_ranking = Ranking.objects.select_related('usuario')[:5]
     
     context = {
         'total_retos': total_retos,
@@ -27,6 +41,21 @@ def home(request):
     }
     return render(request, 'retos/home.html', context)
 
+async def home_async(request):
+    """Versión async (ASGI) de ``home``: espera las consultas sin ocupar un hilo del servidor"""
+    retos_activos = Reto.objects.filter(activo=True)
+    total_retos = await retos_activos.acount()
+    total_usuarios = await Ranking.objects.acount()
+    retos_populares = await alista(retos_activos.order_by('-intentos_totales')[:5])
+    top_ranking = await alista(Ranking.objects.select_related('usuario')[:5])
+    context = {
+        'total_retos': total_retos,
+        'total_usuarios': total_usuarios,
+        'retos_populares': retos_populares,
+        'top_ranking': top_ranking,
+    }
+    return await renderizar(request, 'retos/home.html', context)
+
 @login_required
 def dashboard(request):
     """Dashboard del usuario con sus estadísticas"""
@@ -71,51 +100,86 @@ def dashboard(request):
     }
     return render(request, 'retos/dashboard.html', context)
 
+# Ordenamientos del listado de retos (el orden 'aleatorio' se aplica aparte)
+ORDENAMIENTOS_RETOS = {
+    'fecha': ('-fecha_creacion',),
+    'dificultad': ('dificultad', 'puntos'),
+    'puntos': ('-puntos',),
+    'prioridad': ('-orden_prioridad', '-fecha_creacion'),
+    'popularidad': ('-intentos_totales',),
+}
+
+def filtrar_retos(queryset, params, usuario):
+    """Aplica los filtros del listado (dificultad, categoría, búsqueda) a un queryset de retos"""
+    # Ocultar retos sin categoría a usuarios no administradores
+    if not usuario.is_staff:
+        queryset = queryset.filter(categoria__isnull=False)
+    
+    dificultad = params.get('dificultad')
+    categoria = params.get('categoria')
+    busqueda = params.get('busqueda')
+    
+    if dificultad:
+        queryset = queryset.filter(dificultad=dificultad)
+    
+    if categoria:
+        queryset = queryset.filter(categoria_id=categoria)
+    
+    if busqueda:
+        queryset = queryset.filter(
+            Q(titulo__icontains=busqueda) |
+            Q(descripcion__icontains=busqueda) |
+            Q(enunciado__icontains=busqueda)
+        )
+    
+    return queryset
+
+def etag_lista_retos(request, *args, **kwargs):
+    """ETag del listado: retos activos, catálogo de categorías y progreso del usuario"""
+    if (request.GET.get('orden') or cache_configuracion.orden_por_defecto) == 'aleatorio':
+        return None
+    resumen = Reto.objects.filter(activo=True).aggregate(
+        ultima=Max('fecha_modificacion'),
+        total=Count('id'),
+    )
+    ultima = resumen['ultima'].timestamp() if resumen['ultima'] else 0
+    # la generación de la copia local es la de las categorías que se van a
+    # renderizar; leerla aparte de la BD podría etiquetar un catálogo viejo
+    catalogo = cache_configuracion.generacion
+    return f"lista-{resumen['total']}-{ultima}-{catalogo}-{etag_usuario(request)}"
+
+def etag_detalle_reto(request, pk, *args, **kwargs):
+    """ETag del detalle: última modificación del reto y progreso del usuario"""
+    if not request.user.is_authenticated:
+        return None
+    modificado = Reto.objects.filter(pk=pk).values_list('fecha_modificacion', flat=True).first()
+    if modificado is None:
+        return None
+    return f"reto-{pk}-{modificado.timestamp()}-{etag_usuario(request)}"
+
+@method_decorator(condicional(etag_lista_retos), name='dispatch')
 class ListaRetosView(ListView):
     """Vista para listar todos los retos disponibles"""
     model = Reto
     template_name = 'retos/lista_retos.html'
     context_object_name = 'retos'
-    paginate_by = 12
+    
+    def get_paginate_by(self, queryset):
+        return cache_configuracion.retos_por_pagina
+    
+    def get_orden(self):
+        """Orden pedido por el usuario o, si no hay, el de la configuración activa"""
+        return self.request.GET.get('orden') or cache_configuracion.orden_por_defecto
     
     def get_queryset(self):
         queryset = Reto.objects.filter(activo=True).select_related('categoria')
-        
-        # Ocultar retos sin categoría a usuarios no administradores
-        if not self.request.user.is_staff:
-            queryset = queryset.filter(categoria__isnull=False)
-
-        # Filtros
-        dificultad = self.request.GET.get('dificultad')
-        categoria = self.request.GET.get('categoria')
-        busqueda = self.request.GET.get('busqueda')
-        
-        if dificultad:
-            queryset = queryset.filter(dificultad=dificultad)
-        
-        if categoria:
-            queryset = queryset.filter(categoria_id=categoria)
-        
-        if busqueda:
-            queryset = queryset.filter(
-                Q(titulo__icontains=busqueda) |
-                Q(descripcion__icontains=busqueda) |
-                Q(enunciado__icontains=busqueda)
-            )
+        queryset = filtrar_retos(queryset, self.request.GET, self.request.user)
         
         # Aplicar ordenamiento
-        orden = self.request.GET.get('orden', 'fecha')
+        orden = self.get_orden()
         
-        if orden == 'fecha':
-            queryset = queryset.order_by('-fecha_creacion')
-        elif orden == 'dificultad':
-            queryset = queryset.order_by('dificultad', 'puntos')
-        elif orden == 'puntos':
-            queryset = queryset.order_by('-puntos')
-        elif orden == 'prioridad':
-            queryset = queryset.order_by('-orden_prioridad', '-fecha_creacion')
-        elif orden == 'popularidad':
-            queryset = queryset.order_by('-intentos_totales')
+        if orden in ORDENAMIENTOS_RETOS:
+            queryset = queryset.order_by(*ORDENAMIENTOS_RETOS[orden])
         elif orden == 'aleatorio':
             import random
             queryset = list(queryset)
@@ -125,13 +189,11 @@ class ListaRetosView(ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categorias'] = Categoria.objects.all()
+        context['categorias'] = cache_configuracion.categorias
+        context['orden_actual'] = self.get_orden()
+        context['orden_por_defecto'] = cache_configuracion.orden_por_defecto
         context['dificultades'] = Reto.DIFICULTAD_CHOICES
         
-        # Agregar timestamp para cache busting del JavaScript
-        import time
-        context['timestamp'] = int(time.time())
-        
         # Si el usuario está logueado, marcar qué retos ya intentó
         if self.request.user.is_authenticated:
             retos_intentados = Intento.objects.filter(
@@ -141,12 +203,18 @@ class ListaRetosView(ListView):
         
         return context
 
+@method_decorator(condicional(etag_detalle_reto), name='dispatch')
 class DetalleRetoView(LoginRequiredMixin, DetailView):
     """Vista para mostrar el detalle de un reto"""
     model = Reto
     template_name = 'retos/detalle_reto.html'
     context_object_name = 'reto'
     
+    def get(self, request, *args, **kwargs):
+        # Antes de leer el reto: un cambio intermedio se reenvía en vez de perderse
+        self.eventos_desde = eventos_desde(canal_reto(kwargs['pk']))
+        return super().get(request, *args, **kwargs)
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         reto = self.get_object()
@@ -162,56 +230,51 @@ class DetalleRetoView(LoginRequiredMixin, DetailView):
         
         # Estadísticas del reto
         context['tasa_exito'] = reto.calcular_tasa_exito()
+        context['eventos_desde'] = self.eventos_desde
+        # Un reenvío del formulario (doble clic, red inestable) no crea otro intento.
+        # Tras un 304 el navegador muestra la copia guardada con la clave de entonces:
+        # es lo buscado. Un envío con esa clave sube version_progreso y cambia el ETag,
+        # así que sólo se reutiliza una clave que nunca llegó a crear un intento.
+        context['clave_idempotencia'] = uuid.uuid4().hex
         
         return context
 
+async def eventos_reto(request, pk):
+    """Server-sent events con las estadísticas del reto (ver retos/difusion.py)"""
+    return respuesta_eventos(request, canal_reto(pk))
+
+@limitar_envios()
 @login_required
 def intentar_reto(request, pk):
     """Vista para procesar un intento de resolución de reto"""
     reto = get_object_or_404(Reto, pk=pk, activo=True)
     
-    # Verificar si ya resolvió el reto
-    if reto.usuario_resolvio_reto(request.user):
-        messages.info(request, 'Ya has resuelto correctamente este reto.')
-        return redirect('retos:detalle_reto', pk=pk)
-    
-    # Verificar si agotó los intentos
-    if reto.usuario_agoto_intentos(request.user):
-        messages.warning(request, 'Has agotado todos tus intentos para este reto.')
-        return redirect('retos:detalle_reto', pk=pk)
-    
     if request.method == 'POST':
-        respuesta_usuario = request.POST.get('respuesta', '').strip()
-        
-        if not respuesta_usuario:
-            messages.error(request, 'Debes proporcionar una respuesta.')
-            return redirect('retos:detalle_reto', pk=pk)
-        
-        # Verificar si la respuesta es correcta (validación flexible)
-        es_correcto = reto.validar_respuesta(respuesta_usuario)
-        
-        # Crear el intento
-        intento = Intento.objects.create(
-            usuario=request.user,
-            reto=reto,
-            respuesta_usuario=respuesta_usuario,
-            es_correcto=es_correcto
-        )
-        
-        # Actualizar ranking
-        Ranking.actualizar_ranking()
-        
-        # Calcular intentos restantes
-        intentos_restantes = reto.get_intentos_restantes(request.user)
-        
-        if es_correcto:
-            messages.success(request, f'¡Correcto! Has ganado {intento.puntuacion_obtenida} puntos.')
-        else:
-            if intentos_restantes > 0:
-                messages.error(request, f'Respuesta incorrecta. Te quedan {intentos_restantes} intentos.')
-            else:
-                messages.error(request, 'Respuesta incorrecta. Has agotado todos tus intentos.')
-        
-        return redirect('retos:detalle_reto', pk=pk)
+        try:
+            clave = clave_idempotencia(request)
+        except ValueError:
+            clave = None
+        resultado = Intento.registrar(request.user, reto, request.POST.get('respuesta', ''), clave)
+    else:
+        resultado = Intento.comprobar_disponibilidad(request.user, reto)
+    
+    if resultado is not None:
+        messages.add_message(request, resultado.nivel_mensaje, resultado.mensaje)
     
     return redirect('retos:detalle_reto', pk=pk)
+
+def metricas(request):
+    """Métricas en formato de texto de Prometheus (IPs de METRICAS_IPS o staff)"""
+    if ip_cliente(request) not in settings.METRICAS_IPS and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(texto_metricas(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Un año: el máximo que respetan navegadores y CDNs
+CACHE_INMUTABLE = 60 * 60 * 24 * 365
+
+def servir_media(request, path):
+    """Sirve MEDIA_ROOT en desarrollo; los archivos nombrados por hash, con caché immutable"""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if es_inmutable(path):
+        patch_cache_control(response, public=True, max_age=CACHE_INMUTABLE, immutable=True)
+    return response